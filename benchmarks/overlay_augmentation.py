@@ -0,0 +1,73 @@
+"""
+Per-frame cost of the camera overlays: drawing them with cv2 on every frame vs apply_overlay, which composites
+the cached overlay or, for overlays too large to composite cheaply, draws directly as well ("composited": false).
+
+    python benchmarks/overlay_augmentation.py --repeat 200
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from robocrew.core.utils import apply_overlay, cached_overlay, draw_angle_grid
+
+SIZES = [(640, 480), (1920, 1080)]
+
+
+def overlays():
+    """(name, draw function, draw arguments) of the overlays to measure."""
+    found = [
+        ("angle_grid", draw_angle_grid, (90, 0, "normal")),
+        ("angle_grid_precision", draw_angle_grid, (90, 0, "precision")),
+    ]
+    try:
+        from robocrew.robots.EarthRover.Earth_Rover_LLM_agent import draw_front_path_markers
+        found.append(("earth_rover_front", draw_front_path_markers, ()))
+    except ImportError as exc:
+        print(f"earth_rover_front skipped: {exc}")
+    return found
+
+
+def median_ms_per_frame(augments, frame, repeat):
+    """Median time of each augment over `repeat` fresh copies of frame, the augments interleaved so they share noise."""
+    image = frame.copy()
+    times = [[] for _ in augments]
+    for augment in augments:
+        augment(image)  # fills the overlay cache
+    for _ in range(repeat):
+        for augment, augment_times in zip(augments, times):
+            np.copyto(image, frame)
+            start = time.perf_counter()
+            augment(image)
+            augment_times.append(time.perf_counter() - start)
+    return [float(np.median(augment_times)) * 1000 for augment_times in times]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    measured = overlays()
+    results = {}
+    for width, height in SIZES:
+        frame = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+        for name, draw, draw_args in measured:
+            direct, cached = median_ms_per_frame([
+                lambda image: draw(image, *draw_args),
+                lambda image: apply_overlay(image, draw, *draw_args),
+            ], frame, args.repeat)
+            results[f"{name} {width}x{height}"] = {
+                "composited": cached_overlay(draw, width, height, *draw_args).composite,
+                "direct_ms": round(direct, 3),
+                "cached_ms": round(cached, 3),
+                "speedup": round(direct / cached, 2),
+            }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
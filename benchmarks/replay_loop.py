@@ -0,0 +1,55 @@
+"""
+Agent loop throughput/latency benchmark on a recorded (or synthetic) trace. No robot, GPU or network needed.
+
+    python benchmarks/replay_loop.py run.jsonl.gz --history-len 10
+    python benchmarks/replay_loop.py --synthetic 50 --compact --stream
+
+Record a trace by passing step_recorder=StepRecorder("run.jsonl.gz") to the agent.
+"""
+
+import argparse
+import json
+
+from robocrew.core.history import HistoryCompactor
+from robocrew.core.replay import load_trace, make_synthetic_trace, run_replay
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("trace", nargs="?", help="trace recorded by StepRecorder")
+    parser.add_argument("--synthetic", type=int, default=None, metavar="STEPS", help="use a synthetic trace with this many steps")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--latency-scale", type=float, default=0.0, help="fraction of recorded LLM/tool time to sleep")
+    parser.add_argument("--history-len", type=int, default=None)
+    parser.add_argument("--compact", action="store_true", help="use HistoryCompactor with default settings")
+    parser.add_argument("--max-bytes", type=int, default=None, help="HistoryCompactor request size budget")
+    parser.add_argument("--parallel-tools", action="store_true")
+    parser.add_argument("--stream", action="store_true")
+    parser.add_argument("--no-augment", action="store_true", help="serve recorded frames without re-augmenting")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        steps = make_synthetic_trace(args.synthetic)
+    elif args.trace:
+        steps = load_trace(args.trace)
+    else:
+        parser.error("give a trace path or --synthetic STEPS")
+
+    results = []
+    for _ in range(args.repeat):
+        compactor = HistoryCompactor(max_bytes=args.max_bytes) if args.compact or args.max_bytes else None
+        results.append(run_replay(
+            steps,
+            latency_scale=args.latency_scale,
+            augment=not args.no_augment,
+            history_len=args.history_len,
+            history_compactor=compactor,
+            parallel_tools=args.parallel_tools,
+            stream_response=args.stream,
+        ))
+    best = max(results, key=lambda result: result["steps_per_s"])
+    print(json.dumps(best, indent=2))
+
+
+if __name__ == "__main__":
+    main()
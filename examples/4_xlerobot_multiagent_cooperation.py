@@ -8,6 +8,7 @@ from pathlib import Path
 from robocrew.core.LLMAgent import LLMAgent
 from robocrew.core.camera import RobotCamera
 from robocrew.core.tools import finish_task, create_execute_subtask
+from robocrew.core.lookahead import SubtaskLookahead
 from robocrew.robots.XLeRobot.xlerobot_LLM_agent import XLeRobotAgent
 from robocrew.robots.XLeRobot.tools import \
     create_vla_single_arm_manipulation, \
@@ -108,8 +109,9 @@ executor = XLeRobotAgent(
     system_prompt=controller_prompt,
 )
 
-# set up planner tools
-execute_subtask = create_execute_subtask(executor)
+# set up planner tools; the planner plans its next subtask while the controller works on the current one
+lookahead = SubtaskLookahead()
+execute_subtask = create_execute_subtask(executor, lookahead=lookahead)
 
 # init planner agent (smart model, subtask delegation)
 planner = LLMAgent(
@@ -124,6 +126,8 @@ planner = LLMAgent(
     camera_fov=90,
     servo_controler=servo_controler,
     system_prompt=planner_prompt,
+    llm_priority="planner",  # controller requests go first when both wait for the provider
+    lookahead=lookahead,
 )
 
 # run mission
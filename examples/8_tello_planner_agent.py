@@ -58,6 +58,7 @@ planner = TelloAgent(
     tello=tello,
     system_prompt=(prompt_dir / "tello_planner.prompt").read_text(encoding="utf-8"),
     history_len=20,
+    llm_priority="planner",  # controller requests go first when both wait for the provider
 )
 
 planner.task = (
@@ -4,10 +4,22 @@ from robocrew.core.skills import load_skills
 from dotenv import find_dotenv, load_dotenv
 import time
 import base64
+import contextvars
 from robocrew.core.lidar import init_lidar, run_scanner
+from robocrew.core.tool_executor import ToolExecutor, get_tool_resources, MOTION_RESOURCES
+from robocrew.core.streaming import ToolCallStream
+from robocrew.core import tracing
+from robocrew.core.tracing import span
+from robocrew.core.progress import ProgressMonitor
+from robocrew.core.hedging import HedgedInvoker, LLMDeadlineExceeded
+from robocrew.core.task_queue import TaskQueue
+from robocrew.core.llm_scheduler import default_scheduler
+from robocrew.core.history import estimate_message_size
+from robocrew.core.image_payload import ImagePayload, as_image_payload, image_data_url
+from robocrew.core.prompt_cache import CacheStats, cache_bind_kwargs, model_provider, with_cache_markers
 from langchain_core.messages import HumanMessage, SystemMessage, ToolMessage
 from langchain.chat_models import init_chat_model
-import queue
+from concurrent.futures import ThreadPoolExecutor
 load_dotenv(find_dotenv())
 
 
@@ -27,7 +39,7 @@ base_system_prompt = """
 class LLMAgent():
     def __init__(
             self,
-            model: str,
+            model,
             tools: list,
             main_camera,
             name: str | None = None,
@@ -44,9 +56,29 @@ class LLMAgent():
             skills: list | None = None,
             skills_dir=None,
             skill_context=None,
+            prefetch_observations: bool = False,
+            parallel_tools: bool = False,
+            history_compactor=None,
+            prompt_caching: bool = False,
+            stream_response: bool = False,
+            step_recorder=None,
+            escalation_model=None,
+            escalation_thinking_level: str | None = None,
+            progress_monitor=None,
+            image_budget=None,
+            history_archive=None,
+            backup_model=None,
+            llm_deadline: float | None = None,
+            hedge_percentile: float = 90,
+            token_governor=None,
+            llm_scheduler=None,
+            llm_priority: str | int = "executor",
+            lookahead=None,
+            camera_rig=None,
         ):
         """
-        model: name of the model to use (e.g. 'google_genai:gemini-3.1-pro-preview').
+        model: name of the model to use (e.g. 'google_genai:gemini-3.1-pro-preview'),
+            or an already created langchain chat model (e.g. robocrew.core.replay.ReplayChatModel).
         tools: list of langchain tools.
         main_camera: robot front camera object.
         name: optional agent name shown in logs (e.g. 'Planner', 'Controller').
@@ -63,6 +95,45 @@ class LLMAgent():
         skills: optional SKILL.md folder names or paths.
         skills_dir: base directory for skill names.
         skill_context: object passed to optional skill tool factories.
+        prefetch_observations: set to True to capture the next camera/LiDAR observation in the background
+            while the LLM is thinking, instead of at the start of every step.
+        parallel_tools: set to True to run tool calls of one response concurrently. Only calls
+            using the same robot resources (see robocrew.core.tool_executor) are run one after another.
+        history_compactor: optional robocrew.core.history.HistoryCompactor which downscales older images
+            and keeps each request within a size budget.
+        prompt_caching: set to True to mark the system prompt and tool schemas for provider-side
+            prompt caching and print cache hits per step. Markers follow each model's own provider,
+            inferred from the model name or class when there is no 'provider:' prefix. Gemini gets no
+            explicit cached content; its implicit cache hits are only reported.
+        stream_response: set to True to stream LLM responses and start each tool call as soon as
+            it is fully formed, instead of waiting for the whole response.
+        step_recorder: optional robocrew.core.replay.StepRecorder saving every step to a trace file
+            for offline replay and benchmarking.
+        escalation_model: stronger model used for a step when the agent seems stuck (repeated tool calls,
+            unchanged camera view or lidar distance despite moving). Other steps use `model`.
+        escalation_thinking_level: thinking_level of the escalation model.
+        progress_monitor: optional robocrew.core.progress.ProgressMonitor with custom stuck thresholds.
+        image_budget: optional robocrew.core.image_budget.ImageBudget (size, JPEG quality, grayscale, crop)
+            for camera frames, or a dict of them keyed by navigation mode ('normal', 'precision').
+            Frames are sent at native resolution if not set.
+        history_archive: optional robocrew.core.history_store.MessageArchive keeping the message history
+            in RAM under a memory cap. Older images and steps are spilled to disk and loaded only on request.
+        backup_model: model (or other endpoint of the same model) the request is also sent to when `model`
+            is slower than `hedge_percentile` of its recent latencies. The first response is used.
+        llm_deadline: seconds for one LLM request including retries. A step without response in time is skipped.
+            Failed requests are retried with exponential backoff. Hedging and deadline don't apply to stream_response.
+        token_governor: optional robocrew.core.governor.TokenGovernor counting tokens per agent and task
+            (see `token_governor.totals()`), and lowering thinking level, history length and image size
+            when a token budget or latency target is exceeded.
+        llm_scheduler: robocrew.core.llm_scheduler.LLMScheduler limiting concurrent requests and tokens per minute
+            per provider. Defaults to the process-wide scheduler shared by all agents, which has no limits
+            until configured with `default_scheduler.configure(provider, concurrency, tokens_per_minute)`.
+        llm_priority: 'executor' (default) or 'planner'; queued executor requests are sent before planner ones.
+        lookahead: optional robocrew.core.lookahead.SubtaskLookahead, also passed to create_execute_subtask.
+            Not supported by AsyncLLMAgent.
+            The planner then plans its next step while the executor still works on the current subtask.
+        camera_rig: optional robocrew.core.camera_rig.CameraRig with the main camera and additional cameras.
+            Their views are added to every step, captured at the same moment as the main camera view.
         """
         system_prompt = system_prompt or base_system_prompt
         self.name = name
@@ -82,11 +153,11 @@ class LLMAgent():
         #self.sound_receiver = None
 
         self.task = None
+        self.task_queue = TaskQueue()
         
         self.sounddevice_index_or_alias = sounddevice_index_or_alias
         if self.sounddevice_index_or_alias is not None:
             from robocrew.core.sound_receiver import SoundReceiver
-            self.task_queue = queue.Queue()
             self.sound_receiver = SoundReceiver(self.sounddevice_index_or_alias, self.task_queue, wakeword)
             
         self.navigation_mode = "normal"  # or "precision"
@@ -106,21 +177,66 @@ class LLMAgent():
             system_prompt += "\n\n" + skills_prompt
             tools.extend(skills_tools)
 
-        model_kwargs = {}
-        if thinking_level is not None:
-            model_kwargs["generation_config"] = {"thinking_config": {"thinking_level": thinking_level.upper()}}
-
-        llm = init_chat_model(model, model_kwargs=model_kwargs or {})
-        #llm = init_chat_model(model="google/gemini-3-flash-preview", model_provider="openai", base_url="https://openrouter.ai/api/v1", api_key=getenv("OPENROUTER_API_KEY"))
-        self.llm = llm.bind_tools(tools)#, parallel_tool_calls=False)
+        provider = model_provider(model)
+        self.provider = provider
+        self.llm_scheduler = llm_scheduler or default_scheduler
+        self.llm_priority = llm_priority
+        self.lookahead = lookahead
+        if lookahead is not None:
+            lookahead.attach(self)
+        self.image_budget = image_budget
+        budgets = image_budget.values() if isinstance(image_budget, dict) else [image_budget]
+        for budget in budgets:
+            if budget is not None and budget.provider is None:
+                budget.provider = provider
+        self.prompt_caching = prompt_caching
+        self.prompt_cache_key = f"robocrew-{name or type(self).__name__}"
+        self.model = model
+        self.thinking_level = thinking_level
+        self.llm = self._init_llm(model, thinking_level, tools)
+        self.token_governor = token_governor
+        if backup_model is not None or llm_deadline is not None:
+            backup_llm = self._init_llm(backup_model, thinking_level, tools) if backup_model is not None else None
+            self.hedged_invoker = HedgedInvoker(backup_llm, deadline=llm_deadline, hedge_percentile=hedge_percentile)
+        else:
+            self.hedged_invoker = None
+        self.escalation_model = escalation_model
+        if escalation_model is not None:
+            self.escalation_llm = self._init_llm(escalation_model, escalation_thinking_level, tools)
+            self.progress_monitor = progress_monitor or ProgressMonitor()
+        else:
+            self.escalation_llm = None
+            self.progress_monitor = progress_monitor
         self.tools = tools
         self.tool_name_to_tool = {tool.name: tool for tool in self.tools}
+        self.parallel_tools = parallel_tools
+        self.stream_response = stream_response
+        if parallel_tools:
+            self.tool_executor = ToolExecutor(self.invoke_tool, self.tool_call_resources)
+        elif stream_response:
+            # tools start while the response is streaming, but still one after another
+            self.tool_executor = ToolExecutor(self.invoke_tool, lambda tool_call: None)
+        else:
+            self.tool_executor = None
+        # cache markers are added per model when it is called, see _init_llm
         self.system_message = SystemMessage(content=system_prompt)
+        self.cache_stats = CacheStats() if prompt_caching else None
         self.message_history = [self.system_message]
+        self.step_count = 0
         self.history_len = history_len
+        self.history_compactor = history_compactor
+        self.history_archive = history_archive
+        self.step_recorder = step_recorder
         # cameras
         self.main_camera = main_camera
         self.camera_fov = camera_fov
+        self.camera_rig = camera_rig
+        self.extra_camera_names = []
+        if camera_rig is not None:
+            main_camera_name = camera_rig.name_of(main_camera)
+            if main_camera_name is None:
+                raise ValueError("camera_rig must include the agent's main_camera")
+            self.extra_camera_names = [name for name in camera_rig.cameras if name != main_camera_name]
         self.servo_controler = servo_controler
 
         # lidar
@@ -131,43 +247,186 @@ class LLMAgent():
         
         if lidar_usb_port:
             self.lidar, self.lidar_bg, self.lidar_scale = init_lidar(lidar_usb_port)
+
+        # observation prefetch
+        self.prefetch_executor = ThreadPoolExecutor(max_workers=1) if prefetch_observations else None
+        self.prefetch_future = None
+        self.last_motion_end = 0.0
+        self.last_observation = None
         if self.servo_controler and self.servo_controler.left_arm_head_usb:
             self.servo_controler.reset_head_position()
             self.servo_controler.set_saved_position("default", "both")  # optionally if you have saved positions (example 5_xlerobot_test_save_recall_positions), set a default position for both arms before starting the agent.
 
 
+    def _init_llm(self, model, thinking_level, tools):
+        model_kwargs = {}
+        if thinking_level is not None:
+            model_kwargs["generation_config"] = {"thinking_config": {"thinking_level": thinking_level.upper()}}
+        llm = init_chat_model(model, model_kwargs=model_kwargs or {}) if isinstance(model, str) else model
+        #llm = init_chat_model(model="google/gemini-3-flash-preview", model_provider="openai", base_url="https://openrouter.ai/api/v1", api_key=getenv("OPENROUTER_API_KEY"))
+        if not self.prompt_caching:
+            return llm.bind_tools(tools)#, parallel_tool_calls=False)
+        # backup and escalation models may come from other providers than the primary one
+        provider = model_provider(model)
+        return with_cache_markers(llm.bind_tools(tools, **cache_bind_kwargs(provider, self.prompt_cache_key)), provider)
+
+    def set_thinking_level(self, thinking_level):
+        self.thinking_level = thinking_level
+        self.llm = self._init_llm(self.model, thinking_level, self.tools)
+
     def invoke_tool(self, tool_call):
         # convert string to real function
         requested_tool = self.tool_name_to_tool[tool_call["name"]]
         args = tool_call["args"]
-        tool_output = requested_tool.invoke(args)
+        with span(f"tool:{tool_call['name']}"):
+            tool_output = requested_tool.invoke(args)
+        return self.tool_output_to_messages(tool_call, tool_output)
+
+    def tool_output_to_messages(self, tool_call, tool_output):
         # f aitional output is present
+        # (text, content) or (text, content, artifact); the artifact (e.g. timings) is kept but not sent to the LLM
+        artifact = None
+        if isinstance(tool_output, tuple) and len(tool_output) == 3:
+            tool_output, artifact = tool_output[:2], tool_output[2]
         if isinstance(tool_output, tuple) and len(tool_output) == 2:
             additional_output = HumanMessage(content=tool_output[1])
             tool_output = tool_output[0]
         else:
             additional_output = None
-        return ToolMessage(tool_output, tool_call_id=tool_call["id"]), additional_output
+        return ToolMessage(tool_output, tool_call_id=tool_call["id"], artifact=artifact), additional_output
+
+    def tool_call_resources(self, tool_call):
+        return get_tool_resources(self.tool_name_to_tool[tool_call["name"]])
+
+    def is_motion_call(self, tool_call):
+        """True if the tool call may change what the robot sees (undeclared tools are assumed to)."""
+        resources = self.tool_call_resources(tool_call)
+        return resources is None or bool(resources & MOTION_RESOURCES)
+
+    def tool_calls_to_run(self, tool_calls):
+        """Drops tool calls requested after finish_task."""
+        for i, tool_call in enumerate(tool_calls):
+            if tool_call["name"] == "finish_task":
+                return tool_calls[:i + 1]
+        return tool_calls
+
+    def invoke_tools(self, tool_calls):
+        """Executes tool calls and returns their (ToolMessage, additional output) pairs in the original order."""
+        if self.tool_executor is None:
+            return [self.invoke_tool(tool_call) for tool_call in tool_calls]
+        return self.tool_executor.run(tool_calls)
     
     def cut_off_context(self, nr_of_loops):
         """
         Trims the message history in the state to keep only the most recent context for the agent.
         """        
-        ai_indices = [i for i, msg in enumerate(self.message_history) if msg.type == "human"]
-        if len(ai_indices) >= nr_of_loops:
-            start_index = ai_indices[-nr_of_loops]
-            self.message_history = [self.system_message] + self.message_history[start_index:]
+        with span("history_trim"):
+            ai_indices = [i for i, msg in enumerate(self.message_history) if msg.type == "human"]
+            if len(ai_indices) >= nr_of_loops:
+                start_index = ai_indices[-nr_of_loops]
+                self.message_history = [self.system_message] + self.message_history[start_index:]
+
+    def stream_llm(self, messages, llm=None):
+        """
+        Streams the LLM response, printing text as it arrives and submitting each tool call
+        to the tool executor as soon as it is fully formed.
+        Returns the response and the submitted tool calls.
+        """
+        stream = ToolCallStream()
+        started = []
+
+        def start(new_tool_calls):
+            for tool_call in new_tool_calls:
+                if started and started[-1]["name"] == "finish_task":
+                    return
+                self.tool_executor.submit(tool_call)
+                started.append(tool_call)
+
+        start_time = time.perf_counter()
+        try:
+            with span("llm_total", streamed=True):
+                for chunk in (llm or self.llm).stream(messages):
+                    if stream.response_chunk is None:
+                        tracing.record("llm_ttft", time.perf_counter() - start_time)
+                    if chunk.text:
+                        print(chunk.text, end="", flush=True)
+                    start(stream.add(chunk))
+            print()
+            response, remaining_tool_calls = stream.finish()
+            start(remaining_tool_calls)
+        except Exception:
+            self.tool_executor.discard()
+            raise
+        return response, started
+
+    def record_usage(self, response, llm_latency=None):
+        """Prints reasoning tokens and prompt cache usage of a response, and passes it to the token governor."""
+        usage_metadata = getattr(response, "usage_metadata", None) or {}
+        reasoning_tokens = usage_metadata.get('output_token_details', {}).get('reasoning', 0)
+        if reasoning_tokens:
+            print(f"[thinking: {reasoning_tokens} tokens]")
+        if self.cache_stats is not None:
+            step = self.cache_stats.record(usage_metadata)
+            print(f"[cache {'hit' if step['hit'] else 'miss'}: {step['cached_tokens']}/{step['input_tokens']} input tokens cached]")
+        if self.token_governor is not None:
+            change = self.token_governor.record(self, response, llm_latency)
+            if change:
+                print(f"[governor: {change}]")
+
+    def compact_history(self):
+        """
+        Downscales older images and enforces the request size budget, if a history compactor is set.
+        Then spills older images and steps to disk, if a history archive is set.
+        """
+        if self.history_compactor is not None:
+            with span("history_trim"):
+                self.message_history = self.history_compactor.compact(self.message_history)
+            stats = self.history_compactor.last_stats
+            print(f"[context: {stats['bytes'] / 1024:.0f} KB, ~{stats['estimated_tokens']} tokens]")
+        if self.history_archive is not None:
+            with span("history_spill"):
+                self.message_history = self.history_archive.spill(self.message_history)
+            stats = self.history_archive.last_stats
+            if stats["spilled_images"] or stats["archived_messages"]:
+                print(f"[history: {stats['spilled_images']} images and {stats['archived_messages']} messages "
+                      f"spilled to disk, {stats['bytes'] / 1024:.0f} KB in RAM]")
 
     def check_for_new_task(self):
         """Non-blockingly checks the queue for a new task."""
         if self.sounddevice_index_or_alias and not self.task_queue.empty():
             self.task = self.task_queue.get()
+
+    @property
+    def task(self):
+        return self._task
+
+    @task.setter
+    def task(self, task):
+        """A task set directly (UI, MCP runtime, planner) wakes an idle `go` loop too, like submit_task."""
+        self._task = task
+        # a plain queue.Queue set as task_queue has no waiters to wake
+        notify = getattr(getattr(self, "task_queue", None), "notify", None)
+        if task and notify is not None:
+            notify()
+
+    def submit_task(self, task):
+        """Queues a task; an idle `go` loop wakes up and starts it immediately."""
+        self.task_queue.put(task)
+
+    def cancel_task(self):
+        """Stops the current task after its running step and drops queued tasks."""
+        self.task = None
+        self.task_queue.cancel()
             
-    def lidar_content(self, content):
-        lidar_buf, lidar_front_dist = run_scanner(self.lidar, self.lidar_bg, self.lidar_scale, flip_x=True)
+    def fetch_lidar_scan(self):
+        with span("lidar_scan"):
+            lidar_buf, lidar_front_dist = run_scanner(self.lidar, self.lidar_bg, self.lidar_scale, flip_x=True)
         lidar_image_base64 = base64.b64encode(lidar_buf.getvalue()).decode('utf-8')
-        
         self.latest_lidar_b64 = lidar_image_base64
+        return lidar_image_base64, lidar_front_dist
+
+    def lidar_content(self, content, lidar_scan=None):
+        lidar_image_base64, lidar_front_dist = lidar_scan or self.fetch_lidar_scan()
         
         content.extend([{
             "type": "text", 
@@ -184,9 +443,68 @@ Remember that lidar scans only in one horizontal plane (0.5m high), so obstacles
         return content
 
 
+    def current_image_budget(self):
+        """ImageBudget for the current navigation mode, or None."""
+        if isinstance(self.image_budget, dict):
+            return self.image_budget.get(self.navigation_mode)
+        return self.image_budget
+
+    def image_payload(self, frame):
+        """ImagePayload of a camera frame, encoded within the image budget of the current navigation mode."""
+        return ImagePayload(frame=frame, budget=self.current_image_budget())
+
+    def encode_frame(self, frame):
+        """JPEG bytes of a camera frame within the image budget of the current navigation mode."""
+        return self.image_payload(frame).jpeg
+
+    def print_image_stats(self):
+        budget = self.current_image_budget()
+        if budget is not None and budget.last_stats:
+            print(f"[image: {budget.describe()}]")
+
     def fetch_camera_images_base64(self):
-            image_bytes = self.main_camera.capture_image(camera_fov=self.camera_fov, navigation_mode=self.navigation_mode)
-            return [base64.b64encode(image_bytes).decode('utf-8')]
+        """
+        Camera images of one step as ImagePayload objects (robot agents overriding this may return base64 strings).
+        Their base64 form is encoded here once and shared by the request, history, step recorder and UI.
+        With a camera rig, the main camera image is followed by images of the other rig cameras.
+        """
+        if self.camera_rig is not None:
+            return self.fetch_camera_rig_images()
+        image = self.main_camera.capture_payload(
+            camera_fov=self.camera_fov,
+            navigation_mode=self.navigation_mode,
+            budget=self.current_image_budget(),
+            newer_than=self.last_motion_end,
+        )
+        with span("base64"):
+            image.base64
+        return [image]
+
+    def fetch_camera_rig_images(self):
+        with span("capture"):
+            bundle = self.camera_rig.capture(newer_than=self.last_motion_end)
+        main_camera_name = self.camera_rig.name_of(self.main_camera)
+        images = [self.main_camera.payload_from_frame(
+            bundle[main_camera_name],
+            camera_fov=self.camera_fov,
+            navigation_mode=self.navigation_mode,
+            budget=self.current_image_budget(),
+        )]
+        images += [self.image_payload(bundle[name]) for name in self.extra_camera_names]
+        with span("base64"):
+            for image in images:
+                image.base64
+        return images
+
+    def display_image(self, max_age: float = 0.5):
+        """
+        Main camera ImagePayload for the UI: the image of the last step if it is at most `max_age` seconds old,
+        otherwise a fresh capture.
+        """
+        observation = self.last_observation
+        if observation is None or time.monotonic() - observation["captured_at"] > max_age:
+            observation = {"camera_images": self.fetch_camera_images_base64()}
+        return as_image_payload(observation["camera_images"][0])
 
     # def fetch_camera_images_base64(self):
     #     for attempt in range(3):
@@ -203,43 +521,119 @@ Remember that lidar scans only in one horizontal plane (0.5m high), so obstacles
     #             self.main_camera.reopen()
     #     raise RuntimeError("Failed to fetch camera image after retries.")
     
-    def main_loop_content(self):
-        try:
-            camera_images = self.fetch_camera_images_base64()
-        except RuntimeError as exc:
-            print(f"Skipping this loop because camera is unavailable: {exc}")
-            time.sleep(0.5)
-            return
-        
+    def capture_observation(self):
+        """Capture camera images and LiDAR scan for one loop step."""
+        captured_at = time.monotonic()
+        camera_images = self.fetch_camera_images_base64()
+        self.print_image_stats()
+        lidar_scan = self.fetch_lidar_scan() if self.lidar else None
+        return {"captured_at": captured_at, "camera_images": camera_images, "lidar_scan": lidar_scan}
+
+    def prefetch_observation(self):
+        """Start capturing the next observation on the background worker (if prefetch is enabled)."""
+        if self.prefetch_executor is not None:
+            self.prefetch_future = self.prefetch_executor.submit(contextvars.copy_context().run, self.capture_observation)
+
+    def next_observation(self):
+        """
+        Returns the prefetched observation if it was captured after the last robot motion finished,
+        otherwise captures a fresh one.
+        """
+        future, self.prefetch_future = self.prefetch_future, None
+        if future is not None:
+            observation = future.result()
+            if observation["captured_at"] >= self.last_motion_end:
+                return observation
+        return self.capture_observation()
+
+    def observation_content(self, observation):
+        """Builds content of the step's HumanMessage from a captured observation."""
+        camera_images = observation["camera_images"]
         content=[
                 {"type": "text", "text": "Main camera view:"},
                 {
                     "type": "image_url",
-                    "image_url": {"url": f"data:image/jpeg;base64,{camera_images[0]}"}
+                    "image_url": {"url": image_data_url(camera_images[0])}
                 },
                 {"type": "text", "text": f"\n\nYour task is: '{self.task}'"}
         ]
+        for name, image in zip(self.extra_camera_names, camera_images[1:]):
+            content[-1:-1] = [
+                {"type": "text", "text": f"\n{name} camera view:"},
+                {"type": "image_url", "image_url": {"url": image_data_url(image)}},
+            ]
         
-        if self.lidar:
-            content = self.lidar_content(content)
-        message = HumanMessage(content)
-        
-        self.message_history.append(message)
-        response = self.llm.invoke(self.message_history)
+        if observation["lidar_scan"]:
+            content = self.lidar_content(content, observation["lidar_scan"])
+        return content
+
+    def select_llm(self, observation):
+        """
+        Returns the model for this step and why the agent seems stuck (None if it makes progress).
+        Stuck steps go to the escalation model, if one is set; the next steps drop back to the default one.
+        """
+        if self.progress_monitor is None:
+            return self.llm, None
+        with span("progress_check"):
+            self.progress_monitor.observe(observation)
+            stuck_reason = self.progress_monitor.stuck_reason()
+        if stuck_reason is None:
+            return self.llm, None
+        self.progress_monitor.reset()
+        if self.escalation_llm is None:
+            print(f"[stuck: {stuck_reason}]")
+            return self.llm, stuck_reason
+        print(f"[stuck: {stuck_reason}, escalating to {self.escalation_model if isinstance(self.escalation_model, str) else 'escalation model'}]")
+        return self.escalation_llm, stuck_reason
+
+    def stuck_content(self, stuck_reason):
+        return {"type": "text", "text": f"\n\nWarning: you seem to be stuck ({stuck_reason}). Try a different approach."}
+
+    def estimate_request_tokens(self):
+        return sum(estimate_message_size(message)[1] for message in self.message_history)
+
+    def call_llm(self, llm=None):
+        """
+        Requests the next response through the LLM scheduler.
+        Returns it with the tool calls to run (started already if streaming).
+        """
+        with self.llm_scheduler.slot(self.provider, self.llm_priority, self.estimate_request_tokens()) as ticket:
+            if ticket.queue_delay > 0.1:
+                print(f"[llm queue: waited {ticket.queue_delay:.1f} s]")
+            response, tool_calls = self.request_llm(llm)
+            ticket.tokens = (getattr(response, "usage_metadata", None) or {}).get("total_tokens", ticket.tokens)
+        return response, tool_calls
+
+    def request_llm(self, llm=None):
+        if self.stream_response:
+            return self.stream_llm(self.message_history, llm)
+        with span("llm_total") as llm_span:
+            if self.hedged_invoker is not None:
+                response = self.hedged_invoker.invoke(llm or self.llm, self.message_history)
+                llm_span.set(path=self.hedged_invoker.last_stats["path"])
+                print(f"[llm: {self.hedged_invoker.describe()}]")
+            else:
+                response = (llm or self.llm).invoke(self.message_history)
         print(response.content)
-        reasoning_tokens = response.usage_metadata.get('output_token_details', {}).get('reasoning', 0)
-        if reasoning_tokens:
-            print(f"[thinking: {reasoning_tokens} tokens]")
+        return response, self.tool_calls_to_run(response.tool_calls)
+
+    def add_response(self, response, llm_latency=None):
+        self.record_usage(response, llm_latency)
         for tool_call in response.tool_calls:
-                    print(f"Calling {tool_call['name']} with {tool_call['args']} args")
-        
-        
+            print(f"Calling {tool_call['name']} with {tool_call['args']} args")
         self.message_history.append(response)
         if self.history_len:
             self.cut_off_context(self.history_len)
-        # execute tool
-        for tool_call in response.tool_calls:
-            tool_response, additional_response = self.invoke_tool(tool_call)
+
+    def add_tool_results(self, tool_calls, tool_results):
+        """Appends tool results to the history. Returns the report if the task was finished."""
+        moved = any(self.is_motion_call(tool_call) for tool_call in tool_calls)
+        if moved:
+            self.last_motion_end = time.monotonic()
+        if self.progress_monitor is not None:
+            self.progress_monitor.record_step(tool_calls, moved)
+
+        for tool_call, (tool_response, additional_response) in zip(tool_calls, tool_results):
             self.message_history.append(tool_response)
             if additional_response:
                 self.message_history.append(additional_response)
@@ -253,7 +647,112 @@ Remember that lidar scans only in one horizontal plane (0.5m high), so obstacles
                 print(f"Task finished: {report}")
                 return report
 
+        # without motion, the observation prefetched during the LLM call is still valid
+        if tool_calls and (moved or self.prefetch_future is None):
+            self.prefetch_observation()
+
+    def begin_step(self):
+        """Counts the step and tags its trace spans with the agent name and step number."""
+        self.step_count += 1
+        tracing.begin_step(self.name or type(self).__name__, self.step_count)
+
+    def run_planned_step(self, planned):
+        """
+        Runs a step whose observation and response were prepared ahead by the lookahead, without an LLM call.
+        History, progress monitor and step recorder are updated like in main_loop_content; the LLM time was
+        spent while the subtask ran, so the step records it as lookahead_llm.
+        """
+        step_start = time.perf_counter()
+        self.last_observation = planned.observation
+        if self.progress_monitor is not None:
+            with span("progress_check"):
+                self.progress_monitor.observe(planned.observation)
+        self.message_history.append(planned.message)
+        self.compact_history()
+        self.add_response(planned.response, planned.latency)
+        tool_calls = self.tool_calls_to_run(planned.response.tool_calls)
+        tools_start = time.perf_counter()
+        tool_results = self.invoke_tools(tool_calls)
+        if self.step_recorder is not None:
+            step_end = time.perf_counter()
+            timings = {
+                "observation": 0.0,
+                "llm": 0.0,
+                "lookahead_llm": planned.latency,
+                "tools": step_end - tools_start,
+                "step": step_end - step_start,
+            }
+            self.step_recorder.record(
+                self, planned.observation, planned.request, planned.response, tool_calls, tool_results, timings,
+            )
+        return self.add_tool_results(tool_calls, tool_results)
+
+    def main_loop_content(self):
+        self.begin_step()
+        if self.lookahead is not None:
+            planned = self.lookahead.take(self)
+            if planned is not None:
+                return self.run_planned_step(planned)
+        step_start = time.perf_counter()
+        try:
+            observation = self.next_observation()
+        except RuntimeError as exc:
+            print(f"Skipping this loop because camera is unavailable: {exc}")
+            time.sleep(0.5)
+            return
+        self.last_observation = observation
+        observation_end = time.perf_counter()
+        llm, stuck_reason = self.select_llm(observation)
+        content = self.observation_content(observation)
+        if stuck_reason:
+            content.append(self.stuck_content(stuck_reason))
+        message = HumanMessage(content)
+        
+        self.message_history.append(message)
+        self.compact_history()
+        # if the model answers without moving, observation captured meanwhile is still valid
+        self.prefetch_observation()
+        request = list(self.message_history) if self.step_recorder is not None else None
+        llm_start = time.perf_counter()
+        try:
+            response, tool_calls = self.call_llm(llm)
+        except LLMDeadlineExceeded as exc:
+            self.skip_step(exc)
+            return
+        llm_end = time.perf_counter()
+        self.add_response(response, llm_end - llm_start)
+        # execute tools; calls after finish_task are dropped
+        if self.stream_response:
+            tool_results = self.tool_executor.collect()  # already started while streaming
+        else:
+            tool_results = self.invoke_tools(tool_calls)
+        if self.step_recorder is not None:
+            step_end = time.perf_counter()
+            self.step_recorder.record(self, observation, request, response, tool_calls, tool_results, {
+                "observation": observation_end - step_start,
+                "llm": llm_end - llm_start,
+                "tools": step_end - llm_end,
+                "step": step_end - step_start,
+            })
+        return self.add_tool_results(tool_calls, tool_results)
+
+    def skip_step(self, exc):
+        """Drops the observation of a step that got no LLM response, the next step sends a fresh one."""
+        print(f"Skipping this loop, {exc}")
+        if self.message_history[-1].type == "human":
+            self.message_history.pop()
+
     def cleanup(self):
+        if self.lookahead is not None:
+            self.lookahead.shutdown()
+        if self.hedged_invoker is not None:
+            self.hedged_invoker.shutdown()
+        if self.prefetch_executor is not None:
+            self.prefetch_executor.shutdown(wait=False, cancel_futures=True)
+        if self.tool_executor is not None:
+            self.tool_executor.shutdown()
+        if self.step_recorder is not None:
+            self.step_recorder.close()
         if self.servo_controler:
             print("Disconnecting servo controller...")
             self.servo_controler.disconnect()
@@ -261,12 +760,14 @@ Remember that lidar scans only in one horizontal plane (0.5m high), so obstacles
     def go(self):
         try:
             while True:
-                if self.task:
-                    self.main_loop_content()
-                else:
-                    # idle mode
-                    time.sleep(0.5)
-                    
+                if not self.task:
+                    # idle mode, blocks until a task is submitted or set directly
+                    task = self.task_queue.get(wake_when=lambda: bool(self.task))
+                    if task is not None:
+                        self.task = task
+                    continue
+                self.main_loop_content()
+
                 if self.sounddevice_index_or_alias:
                     self.check_for_new_task()
 
@@ -0,0 +1,172 @@
+"""asyncio variant of LLMAgent, so one event loop can drive several agents (e.g. planner + executors + UI)."""
+
+import asyncio
+import time
+from langchain_core.messages import HumanMessage
+from robocrew.core.LLMAgent import LLMAgent
+from robocrew.core.streaming import ToolCallStream
+from robocrew.core.hedging import LLMDeadlineExceeded
+from robocrew.core import tracing
+from robocrew.core.tracing import span
+from robocrew.core.tool_executor import resources_conflict
+
+
+class AsyncLLMAgent(LLMAgent):
+    """
+    LLMAgent with an async loop: `await agent.ago()` or `await agent.amain_loop_content()`.
+    The LLM is called with ainvoke/astream, blocking sensor reads run in worker threads
+    and tools run through tool.ainvoke (langchain offloads sync tools to a thread).
+    Accepts the same arguments as LLMAgent except `lookahead`; the blocking `go()` keeps working too.
+    Robot variants combine it with a robot agent, e.g. `class AsyncXLeRobotAgent(AsyncLLMAgent, XLeRobotAgent)`.
+    """
+
+    def __init__(self, *args, **kwargs):
+        if kwargs.get("lookahead") is not None:
+            raise ValueError("lookahead plans with blocking LLM calls and works with LLMAgent planners only")
+        super().__init__(*args, **kwargs)
+
+    async def ainvoke_tool(self, tool_call):
+        requested_tool = self.tool_name_to_tool[tool_call["name"]]
+        with span(f"tool:{tool_call['name']}"):
+            tool_output = await requested_tool.ainvoke(tool_call["args"])
+        return self.tool_output_to_messages(tool_call, tool_output)
+
+    def start_tool_task(self, tool_call, running):
+        """
+        Schedules a tool call after earlier conflicting ones. `running` holds (resources, task) pairs
+        of this step's calls; without parallel_tools every call conflicts, so calls run one by one.
+        """
+        resources = self.tool_call_resources(tool_call) if self.parallel_tools else None
+        dependencies = [task for other, task in running if resources_conflict(resources, other)]
+
+        async def run_after():
+            if dependencies:
+                await asyncio.wait(dependencies)  # failures are reported by their own tasks
+            return await self.ainvoke_tool(tool_call)
+
+        task = asyncio.create_task(run_after())
+        running.append((resources, task))
+        return task
+
+    async def ainvoke_tools(self, tool_calls):
+        """Executes tool calls and returns their (ToolMessage, additional output) pairs in the original order."""
+        running = []
+        for tool_call in tool_calls:
+            self.start_tool_task(tool_call, running)
+        return await asyncio.gather(*(task for _, task in running))
+
+    async def astream_llm(self, messages, running, llm=None):
+        """Async counterpart of stream_llm; started tool tasks are added to `running`."""
+        stream = ToolCallStream()
+        started = []
+
+        def start(new_tool_calls):
+            for tool_call in new_tool_calls:
+                if started and started[-1]["name"] == "finish_task":
+                    return
+                self.start_tool_task(tool_call, running)
+                started.append(tool_call)
+
+        start_time = time.perf_counter()
+        try:
+            with span("llm_total", streamed=True):
+                async for chunk in (llm or self.llm).astream(messages):
+                    if stream.response_chunk is None:
+                        tracing.record("llm_ttft", time.perf_counter() - start_time)
+                    if chunk.text:
+                        print(chunk.text, end="", flush=True)
+                    start(stream.add(chunk))
+            print()
+            response, remaining_tool_calls = stream.finish()
+            start(remaining_tool_calls)
+        except BaseException:
+            tasks = [task for _, task in running]
+            if tasks:
+                await asyncio.wait(tasks)
+            raise
+        return response, started
+
+    async def acall_llm(self, running, llm=None):
+        async with self.llm_scheduler.aslot(self.provider, self.llm_priority, self.estimate_request_tokens()) as ticket:
+            if ticket.queue_delay > 0.1:
+                print(f"[llm queue: waited {ticket.queue_delay:.1f} s]")
+            response, tool_calls = await self.arequest_llm(running, llm)
+            ticket.tokens = (getattr(response, "usage_metadata", None) or {}).get("total_tokens", ticket.tokens)
+        return response, tool_calls
+
+    async def arequest_llm(self, running, llm=None):
+        if self.stream_response:
+            return await self.astream_llm(self.message_history, running, llm)
+        with span("llm_total") as llm_span:
+            if self.hedged_invoker is not None:
+                response = await self.hedged_invoker.ainvoke(llm or self.llm, self.message_history)
+                llm_span.set(path=self.hedged_invoker.last_stats["path"])
+                print(f"[llm: {self.hedged_invoker.describe()}]")
+            else:
+                response = await (llm or self.llm).ainvoke(self.message_history)
+        print(response.content)
+        tool_calls = self.tool_calls_to_run(response.tool_calls)
+        for tool_call in tool_calls:
+            self.start_tool_task(tool_call, running)
+        return response, tool_calls
+
+    async def amain_loop_content(self):
+        self.begin_step()
+        step_start = time.perf_counter()
+        try:
+            observation = await asyncio.to_thread(self.next_observation)
+        except RuntimeError as exc:
+            print(f"Skipping this loop because camera is unavailable: {exc}")
+            await asyncio.sleep(0.5)
+            return
+        self.last_observation = observation
+        observation_end = time.perf_counter()
+        llm, stuck_reason = await asyncio.to_thread(self.select_llm, observation)
+        content = self.observation_content(observation)
+        if stuck_reason:
+            content.append(self.stuck_content(stuck_reason))
+        self.message_history.append(HumanMessage(content))
+        await asyncio.to_thread(self.compact_history)
+        # if the model answers without moving, observation captured meanwhile is still valid
+        self.prefetch_observation()
+        request = list(self.message_history) if self.step_recorder is not None else None
+        running = []
+        llm_start = time.perf_counter()
+        try:
+            response, tool_calls = await self.acall_llm(running, llm)
+        except LLMDeadlineExceeded as exc:
+            self.skip_step(exc)
+            return
+        llm_end = time.perf_counter()
+        self.add_response(response, llm_end - llm_start)
+        tool_results = await asyncio.gather(*(task for _, task in running))
+        if self.step_recorder is not None:
+            step_end = time.perf_counter()
+            self.step_recorder.record(self, observation, request, response, tool_calls, tool_results, {
+                "observation": observation_end - step_start,
+                "llm": llm_end - llm_start,
+                "tools": step_end - llm_end,
+                "step": step_end - step_start,
+            })
+        return self.add_tool_results(tool_calls, tool_results)
+
+    async def ago(self):
+        try:
+            while True:
+                if not self.task:
+                    # idle mode, awaits until a task is submitted or set directly
+                    task = await self.task_queue.aget(wake_when=lambda: bool(self.task))
+                    if task is not None:
+                        self.task = task
+                    continue
+                await self.amain_loop_content()
+
+                if self.sounddevice_index_or_alias:
+                    self.check_for_new_task()
+
+        except asyncio.CancelledError:
+            print("Agent loop cancelled, shutting down.")
+            raise
+
+        finally:
+            self.cleanup()
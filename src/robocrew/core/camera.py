@@ -1,22 +1,141 @@
+import threading
+import time
+from collections import deque
 import cv2
 from robocrew.core.utils import basic_augmentation
+from robocrew.core.tracing import span
+from robocrew.core.sim import open_video_capture
+from robocrew.core.image_payload import ImagePayload
+
+# grabbed frames kept per camera in background mode, for matching frames of several cameras (CameraRig)
+FRAME_HISTORY = 8
 
 class RobotCamera:
-    def __init__(self, usb_port):
+    def __init__(self, usb_port, background_capture: bool = False, frame_timeout: float = 2.0):
+        """
+        usb_port: camera device path (e.g. '/dev/camera_center'), a "sim:" source,
+            or a "broker:" camera shared with other processes (see robocrew.core.camera_broker).
+        background_capture: set to True to read the camera continuously in a background thread.
+            capture_image then returns the latest frame right away instead of waiting for the device.
+        frame_timeout: seconds capture_image waits for a new enough frame in background mode.
+        """
         self.usb_port = usb_port
-        self.capture = cv2.VideoCapture(usb_port)
+        self.capture = open_video_capture(usb_port)
         self.capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        # capture can be called from agent prefetch worker, tools and UI at the same time
+        self.lock = threading.Lock()
+        self.background_capture = background_capture
+        self.frame_timeout = frame_timeout
+        self.frame_ready = threading.Condition()
+        self.latest_frame = None
+        self.latest_frame_time = 0.0
+        self.recent_frames = deque(maxlen=FRAME_HISTORY)  # (time.monotonic() of grab, frame)
+        self.frames_grabbed = 0
+        self.dropped_frames = 0
+        self.failed_reads = 0
+        self.grabber = None
+        self.stop_grabbing = None
+        if background_capture:
+            self.start_grabber()
+
+    def start_grabber(self):
+        self.stop_grabbing = threading.Event()
+        self.grabber = threading.Thread(
+            target=self._grab_frames, args=(self.stop_grabbing,), name=f"camera:{self.usb_port}", daemon=True,
+        )
+        self.grabber.start()
+
+    def stop_grabber(self):
+        if self.grabber is None:
+            return
+        self.stop_grabbing.set()
+        self.grabber.join(timeout=1.0)
+        self.grabber = None
+        with self.frame_ready:
+            self.latest_frame = None
+            self.recent_frames.clear()
+
+    def _grab_frames(self, stop):
+        """Keeps the device buffer drained and the newest frames in `latest_frame` and `recent_frames`."""
+        nominal_fps = self.capture.get(cv2.CAP_PROP_FPS) or 0
+        while not stop.is_set():
+            with self.lock:
+                ok = self.capture.grab()
+                # stamped before decoding, so the time is close to the exposure
+                grabbed_at = time.monotonic()
+                if ok:
+                    ok, frame = self.capture.retrieve()
+                    # brokered cameras report the broker's grab time
+                    grabbed_at = getattr(self.capture, "grabbed_at", None) or grabbed_at
+            if not ok:
+                self.failed_reads += 1
+                time.sleep(0.01)
+                continue
+            with self.frame_ready:
+                interval = grabbed_at - self.latest_frame_time
+                if nominal_fps and self.recent_frames and interval > 1.5 / nominal_fps:
+                    self.dropped_frames += round(interval * nominal_fps) - 1
+                self.frames_grabbed += 1
+                self.latest_frame = frame
+                self.latest_frame_time = grabbed_at
+                self.recent_frames.append((grabbed_at, frame))
+                self.frame_ready.notify_all()
+
+    def stats(self):
+        """Background mode frame rate over the recent frames, frames grabbed, dropped (gaps in the stream) and failed reads."""
+        with self.frame_ready:
+            times = [grabbed_at for grabbed_at, _ in self.recent_frames]
+        fps = (len(times) - 1) / (times[-1] - times[0]) if len(times) > 1 and times[-1] > times[0] else 0.0
+        return {"fps": round(fps, 1), "frames": self.frames_grabbed, "dropped": self.dropped_frames, "failed_reads": self.failed_reads}
 
     def release(self):
-        self.capture.release()
-        
+        self.stop_grabber()
+        with self.lock:
+            self.capture.release()
+
     def reopen(self):
-        self.capture.open(self.usb_port)
-        self.capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        with self.lock:
+            self.capture.open(self.usb_port)
+            self.capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        if self.background_capture and self.grabber is None:
+            self.start_grabber()
+
+    def read_frame(self, newer_than=None):
+        """
+        Raw frame from the camera. In background mode, the latest grabbed frame; with `newer_than`
+        (time.monotonic() value, e.g. the end of the last motion) it waits for a frame grabbed after it.
+        """
+        if self.grabber is None:
+            with self.lock:
+                self.capture.grab() # Clear the buffer
+                _, frame = self.capture.read()
+            return frame
+        newer_than = newer_than or 0.0
+        with self.frame_ready:
+            if not self.frame_ready.wait_for(
+                    lambda: self.latest_frame is not None and self.latest_frame_time > newer_than, self.frame_timeout):
+                raise RuntimeError(f"No new frame from camera {self.usb_port} within {self.frame_timeout} s")
+            # augmentation draws on the frame, other callers may get the same one
+            return self.latest_frame.copy()
+
+    def capture_payload(self, camera_fov=120, center_angle=0, navigation_mode="normal", budget=None, newer_than=None):
+        """
+        ImagePayload of the augmented frame, its JPEG prepared by `budget` (ImageBudget) if given.
+        newer_than: in background mode, wait for a frame grabbed after this time.monotonic() value.
+        """
+        with span("capture"):
+            frame = self.read_frame(newer_than)
+        return self.payload_from_frame(frame, camera_fov, center_angle, navigation_mode, budget)
+
+    def payload_from_frame(self, frame, camera_fov=120, center_angle=0, navigation_mode="normal", budget=None):
+        """ImagePayload of an already captured frame (e.g. from a CameraRig bundle), augmented like capture_payload."""
+        with span("augmentation"):
+            frame = basic_augmentation(frame, h_fov=camera_fov, center_angle=center_angle, navigation_mode=navigation_mode)
+        image = ImagePayload(frame=frame, budget=budget)
+        with span("encode"):
+            image.jpeg  # encoded now, so the JPEG is ready and its cost shows in the trace
+        return image
 
-    def capture_image(self, camera_fov=120, center_angle=0, navigation_mode="normal"):
-        self.capture.grab() # Clear the buffer
-        _, frame = self.capture.read()
-        frame = basic_augmentation(frame, h_fov=camera_fov, center_angle=center_angle, navigation_mode=navigation_mode)
-        _, buffer = cv2.imencode('.jpg', frame)
-        return buffer.tobytes()
\ No newline at end of file
+    def capture_image(self, camera_fov=120, center_angle=0, navigation_mode="normal", budget=None, newer_than=None):
+        """JPEG bytes of the augmented frame, see capture_payload."""
+        return self.capture_payload(camera_fov, center_angle, navigation_mode, budget, newer_than).jpeg
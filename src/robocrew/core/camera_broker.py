@@ -0,0 +1,421 @@
+"""
+Camera broker: one process per camera owns the device and publishes its frames to any number of local
+consumers through a shared-memory ring, so the agent, VLA policies and UI share cameras without
+releasing and reopening the device.
+
+    robocrew-camera-broker center=/dev/camera_center right=/dev/camera_right --width 640 --height 480 --fps 30
+
+    RobotCamera("broker:center")                                   # agent main camera
+    CameraRig({"camera1": "broker:center", "camera2": "broker:right"})   # GR00T
+    camera_config={"main": {"index_or_path": "broker:center"}}    # LeRobot VLA tools, see broker_opencv_cameras
+
+The broker can also run inside a script: `with CameraBroker({"center": "/dev/camera_center"}): ...`.
+"""
+
+import argparse
+import math
+import multiprocessing
+import signal
+import threading
+import time
+from contextlib import contextmanager
+from multiprocessing import resource_tracker, shared_memory
+
+import cv2
+import numpy as np
+
+from robocrew.core.sim import open_video_capture
+
+BROKER_PREFIX = "broker:"
+SHARED_MEMORY_PREFIX = "robocrew_camera_"
+DEFAULT_SLOTS = 4
+ATTACH_TIMEOUT = 5.0
+FRAME_TIMEOUT = 2.0
+POLL_INTERVAL = 0.002
+
+# ring header fields (int64)
+HEIGHT, WIDTH, CHANNELS, SLOTS, LATEST, FPS_MILLI, CLOSED = range(7)
+HEADER_FIELDS = 8
+
+
+def is_broker_port(port):
+    return isinstance(port, str) and port.startswith(BROKER_PREFIX)
+
+
+def _shared_memory(name, create=False, size=0):
+    """
+    SharedMemory not tracked by multiprocessing's resource tracker, which would unlink the ring when any
+    consumer exits. The broker unlinks its rings itself; a ring left behind by a crash is replaced on restart.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, create=create, size=size, track=False)  # Python 3.13+
+    except TypeError:
+        memory = shared_memory.SharedMemory(name=name, create=create, size=size)
+        resource_tracker.unregister(memory._name, "shared_memory")
+        return memory
+
+
+def _unlink(memory):
+    if not hasattr(memory, "_track"):
+        # before 3.13 unlink() also unregisters the segment, which _shared_memory already did
+        resource_tracker.register(memory._name, "shared_memory")
+    memory.unlink()
+
+
+class FrameRing:
+    """
+    The newest `slots` frames of one camera in shared memory. One writer (the broker process), any number of readers.
+    Each slot holds the number of the frame in it, -1 while it is written, so readers detect frames
+    overwritten while they copied them.
+    """
+
+    def __init__(self, memory, owner=False):
+        self.memory = memory
+        self.owner = owner
+        self.header = np.ndarray((HEADER_FIELDS,), np.int64, memory.buf)
+        slots = int(self.header[SLOTS])
+        shape = (int(self.header[HEIGHT]), int(self.header[WIDTH]), int(self.header[CHANNELS]))
+        offset = self.header.nbytes
+        self.numbers = np.ndarray((slots,), np.int64, memory.buf, offset)
+        offset += self.numbers.nbytes
+        self.times = np.ndarray((slots,), np.float64, memory.buf, offset)
+        offset += self.times.nbytes
+        self.frames = np.ndarray((slots, *shape), np.uint8, memory.buf, offset)
+
+    @classmethod
+    def create(cls, name, shape, slots=DEFAULT_SLOTS, fps=0.0):
+        height, width = shape[:2]
+        channels = shape[2] if len(shape) > 2 else 1
+        size = 8 * HEADER_FIELDS + 16 * slots + slots * height * width * channels
+        memory_name = SHARED_MEMORY_PREFIX + name
+        try:
+            memory = _shared_memory(memory_name, create=True, size=size)
+        except FileExistsError:
+            print(f"[camera broker: replacing stale ring of camera '{name}']")
+            stale = _shared_memory(memory_name)
+            stale.close()
+            _unlink(stale)
+            memory = _shared_memory(memory_name, create=True, size=size)
+        header = np.ndarray((HEADER_FIELDS,), np.int64, memory.buf)
+        header[:] = 0
+        header[[HEIGHT, WIDTH, CHANNELS, SLOTS, LATEST, FPS_MILLI]] = (
+            height, width, channels, slots, -1, round((fps or 0) * 1000),
+        )
+        del header
+        ring = cls(memory, owner=True)
+        ring.numbers[:] = -1
+        return ring
+
+    @classmethod
+    def attach(cls, name):
+        return cls(_shared_memory(SHARED_MEMORY_PREFIX + name))
+
+    @property
+    def latest(self):
+        """Number of the newest complete frame, -1 before the first one."""
+        return int(self.header[LATEST])
+
+    @property
+    def closed(self):
+        return bool(self.header[CLOSED])
+
+    @property
+    def fps(self):
+        return self.header[FPS_MILLI] / 1000
+
+    def write(self, frame, grabbed_at):
+        number = self.latest + 1
+        slot = number % len(self.numbers)
+        self.numbers[slot] = -1
+        self.frames[slot].reshape(frame.shape)[:] = frame
+        self.times[slot] = grabbed_at
+        self.numbers[slot] = number
+        self.header[LATEST] = number
+
+    def read(self, number):
+        """(frame copy, grab time) of frame `number`, None if it is no longer in the ring."""
+        slot = number % len(self.numbers)
+        if self.numbers[slot] != number:
+            return None
+        frame = self.frames[slot].copy()
+        grabbed_at = float(self.times[slot])
+        if self.numbers[slot] != number:
+            return None
+        if frame.shape[2] == 1:
+            frame = frame[:, :, 0]
+        return frame, grabbed_at
+
+    def close(self):
+        if self.owner:
+            self.header[CLOSED] = 1
+        # numpy views must go before the shared memory is closed
+        del self.header, self.numbers, self.times, self.frames
+        self.memory.close()
+        if self.owner:
+            _unlink(self.memory)
+
+
+class BrokerVideoCapture:
+    """
+    cv2.VideoCapture stand-in for "broker:<name>" sources, reading the frames a CameraBroker publishes.
+    read() returns the newest frame not returned yet, waiting for the next one like a camera would.
+    Resolution and fps are set on the broker; set() can't change them and only reports whether the
+    requested value matches the broker's, like a device accepting or rejecting a setting.
+    """
+
+    def __init__(self, source, attach_timeout=ATTACH_TIMEOUT, frame_timeout=FRAME_TIMEOUT):
+        self.source = None
+        self.ring = None
+        self.attach_timeout = attach_timeout
+        self.frame_timeout = frame_timeout
+        self.open(source)
+
+    def open(self, source=None):
+        self.release()
+        self.source = source or self.source
+        name = self.source[len(BROKER_PREFIX):]
+        deadline = time.monotonic() + self.attach_timeout
+        while True:
+            try:
+                self.ring = FrameRing.attach(name)
+                break
+            except FileNotFoundError:
+                if time.monotonic() >= deadline:
+                    print(f"[camera broker: no broker publishes camera '{name}']")
+                    return False
+                time.sleep(0.05)
+        # the newest published frame is read right away, older ones count as read
+        self.last_read = self.ring.latest - 1
+        self.grabbed = None
+        self.grabbed_at = None
+        return True
+
+    def isOpened(self):
+        return self.ring is not None
+
+    def release(self):
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+
+    def set(self, prop, value):
+        if self.ring is None:
+            return False
+        if prop == cv2.CAP_PROP_BUFFERSIZE:
+            # read() always returns the newest frame, as with a one-frame buffer
+            return value == 1
+        if prop not in (cv2.CAP_PROP_FRAME_WIDTH, cv2.CAP_PROP_FRAME_HEIGHT, cv2.CAP_PROP_FPS):
+            return False
+        return math.isclose(value, self.get(prop), rel_tol=1e-3)
+
+    def get(self, prop):
+        if self.ring is None:
+            return 0.0
+        return {
+            cv2.CAP_PROP_FRAME_WIDTH: float(self.ring.header[WIDTH]),
+            cv2.CAP_PROP_FRAME_HEIGHT: float(self.ring.header[HEIGHT]),
+            cv2.CAP_PROP_FPS: self.ring.fps,
+            cv2.CAP_PROP_POS_FRAMES: float(self.ring.latest + 1),
+            cv2.CAP_PROP_BUFFERSIZE: 1.0,
+        }.get(prop, 0.0)
+
+    def grab(self):
+        """Picks the newest frame not read yet, waiting up to `frame_timeout` for one."""
+        if self.ring is None:
+            return False
+        deadline = time.monotonic() + self.frame_timeout
+        while self.ring.latest <= self.last_read:
+            if self.ring.closed or time.monotonic() >= deadline:
+                return False
+            time.sleep(POLL_INTERVAL)
+        self.grabbed = self.ring.latest
+        return True
+
+    def retrieve(self):
+        if self.ring is None or self.grabbed is None:
+            return False, None
+        result = self.ring.read(self.grabbed)
+        while result is None:
+            # overwritten while copying, take the newest one instead
+            self.grabbed = self.ring.latest
+            result = self.ring.read(self.grabbed)
+        frame, self.grabbed_at = result
+        self.last_read = self.grabbed
+        return True, frame
+
+    def read(self):
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+
+def publish_camera(name, port, width=None, height=None, fps=None, slots=DEFAULT_SLOTS, stop=None):
+    """Broker process body: owns the camera at `port` and writes its frames into the ring of `name` until `stop` is set."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the parent stops it
+    capture = open_video_capture(port)
+    if width:
+        capture.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+    if height:
+        capture.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+    if fps:
+        capture.set(cv2.CAP_PROP_FPS, fps)
+    capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    ring = None
+    try:
+        while stop is None or not stop.is_set():
+            ok = capture.grab()
+            # stamped before decoding, so the time is close to the exposure
+            grabbed_at = time.monotonic()
+            if ok:
+                ok, frame = capture.retrieve()
+            if not ok:
+                time.sleep(0.01)
+                continue
+            if ring is None:
+                ring = FrameRing.create(name, frame.shape, slots, capture.get(cv2.CAP_PROP_FPS))
+                print(f"[camera broker: publishing '{name}' from {port}, {frame.shape[1]}x{frame.shape[0]}]")
+            ring.write(frame, grabbed_at)
+    finally:
+        capture.release()
+        if ring is not None:
+            ring.close()
+
+
+class CameraBroker:
+    """
+    Publishes cameras to other processes, one broker process per camera.
+    cameras: {name: device path or "sim:" source}. Consumers open "broker:<name>".
+    width, height, fps: set on every device; LeRobot camera configs must use the same values.
+    slots: frames kept per camera ring.
+    """
+
+    def __init__(self, cameras: dict, width: int | None = None, height: int | None = None, fps: float | None = None,
+                 slots: int = DEFAULT_SLOTS):
+        self.cameras = cameras
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.slots = slots
+        # spawn, so the broker processes don't inherit the agent's threads and open devices
+        self.context = multiprocessing.get_context("spawn")
+        self.stop_event = None
+        self.processes = {}
+
+    def start(self, timeout: float = 10.0):
+        """Starts the broker processes and waits until every camera publishes frames."""
+        self.stop_event = self.context.Event()
+        for name, port in self.cameras.items():
+            process = self.context.Process(
+                target=publish_camera,
+                args=(name, port, self.width, self.height, self.fps, self.slots, self.stop_event),
+                name=f"camera_broker:{name}",
+                daemon=True,
+            )
+            process.start()
+            self.processes[name] = process
+        deadline = time.monotonic() + timeout
+        for name in self.cameras:
+            while not self.is_publishing(name):
+                if not self.processes[name].is_alive() or time.monotonic() >= deadline:
+                    self.stop()
+                    raise RuntimeError(f"Camera broker for '{name}' did not start publishing within {timeout} s")
+                time.sleep(0.05)
+        return self
+
+    def is_publishing(self, name):
+        try:
+            ring = FrameRing.attach(name)
+        except FileNotFoundError:
+            return False
+        try:
+            return ring.latest >= 0 and not ring.closed
+        finally:
+            ring.close()
+
+    def stop(self):
+        if self.stop_event is not None:
+            self.stop_event.set()
+        for process in self.processes.values():
+            process.join(timeout=2.0)
+            if process.is_alive():
+                process.terminate()
+        self.processes = {}
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+class BrokerCv2:
+    """The cv2 module as LeRobot's camera module sees it: VideoCapture opens "broker:<name>" sources from the broker."""
+
+    def __init__(self, cv2_module):
+        self.cv2 = cv2_module
+
+    def __getattr__(self, name):
+        return getattr(self.cv2, name)
+
+    def VideoCapture(self, index_or_path, *args):
+        if is_broker_port(str(index_or_path)):
+            return BrokerVideoCapture(str(index_or_path))
+        return self.cv2.VideoCapture(index_or_path, *args)
+
+
+# LeRobot's camera module keeps the proxy while any broker_opencv_cameras block is open
+_cv2_patch_lock = threading.Lock()
+_cv2_patch_users = 0
+_cv2_original = None
+
+
+@contextmanager
+def broker_opencv_cameras():
+    """
+    While active, LeRobot OpenCV cameras connected with a "broker:<name>" index_or_path read from the camera broker.
+    Keep it open for the whole life of the robot connection (e.g. a lerobot RobotClient, until it's stopped),
+    so cameras reconnecting meanwhile read from the broker too. Blocks may overlap across threads;
+    the patch is removed when the last one ends.
+    Only the cv2 reference of LeRobot's camera module is swapped; the cv2 module other code uses is left alone.
+    """
+    global _cv2_patch_users, _cv2_original
+    from lerobot.cameras.opencv import camera_opencv
+
+    with _cv2_patch_lock:
+        if _cv2_patch_users == 0:
+            _cv2_original = camera_opencv.cv2
+            camera_opencv.cv2 = BrokerCv2(_cv2_original)
+        _cv2_patch_users += 1
+    try:
+        yield
+    finally:
+        with _cv2_patch_lock:
+            _cv2_patch_users -= 1
+            if _cv2_patch_users == 0:
+                camera_opencv.cv2 = _cv2_original
+                _cv2_original = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish robot cameras to local processes through shared memory.")
+    parser.add_argument("cameras", nargs="+", help="name=device pairs, e.g. center=/dev/camera_center")
+    parser.add_argument("--width", type=int, default=None)
+    parser.add_argument("--height", type=int, default=None)
+    parser.add_argument("--fps", type=float, default=None)
+    parser.add_argument("--slots", type=int, default=DEFAULT_SLOTS)
+    args = parser.parse_args()
+
+    cameras = dict(camera.split("=", 1) for camera in args.cameras)
+    broker = CameraBroker(cameras, args.width, args.height, args.fps, args.slots)
+    with broker:
+        signal.signal(signal.SIGTERM, lambda *_: broker.stop_event.set())
+        print(f"Camera broker running: {', '.join(BROKER_PREFIX + name for name in cameras)}. Ctrl+C to stop.")
+        try:
+            while not broker.stop_event.is_set():
+                time.sleep(0.5)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
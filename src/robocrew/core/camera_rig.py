@@ -0,0 +1,140 @@
+"""
+Several robot cameras captured together, so frames of one bundle were taken at the same moment.
+
+    rig = CameraRig({"center": main_camera, "left": "/dev/camera_left", "right": "/dev/camera_right"})
+    bundle = rig.capture()
+    bundle["left"], bundle.timestamps["left"], bundle.skew
+    rig.stats()   # {"center": {"fps": 29.8, "frames": 412, "dropped": 3, "failed_reads": 0}, ...}
+"""
+
+import time
+
+import cv2
+
+from robocrew.core.camera import RobotCamera
+
+
+class CameraBundle:
+    """Frames of all rig cameras keyed by camera name, with their grab times (time.monotonic())."""
+
+    def __init__(self, frames, timestamps):
+        self.frames = frames
+        self.timestamps = timestamps
+
+    def __getitem__(self, name):
+        return self.frames[name]
+
+    @property
+    def captured_at(self):
+        return min(self.timestamps.values())
+
+    @property
+    def skew(self):
+        """Seconds between the first and the last frame of the bundle."""
+        return max(self.timestamps.values()) - min(self.timestamps.values())
+
+
+class CameraRig:
+    """
+    Each camera is read continuously by its own background grabber thread (see RobotCamera background_capture),
+    and `capture` pairs their frames by grab time.
+    cameras: {name: RobotCamera or device path / "sim:" source}. Cameras given as objects may be shared
+        with an agent (e.g. its main camera); they are switched to background capture.
+    tolerance: max seconds between the frames of one bundle.
+    width, height: resolution set on cameras opened from a path.
+    frame_timeout: seconds `capture` waits for frames matching within the tolerance.
+    """
+
+    def __init__(self, cameras: dict, tolerance: float = 0.02, width: int | None = None, height: int | None = None,
+                 frame_timeout: float = 2.0):
+        self.cameras = {}
+        for name, camera in cameras.items():
+            if not isinstance(camera, RobotCamera):
+                camera = RobotCamera(camera)
+                if width:
+                    camera.capture.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+                if height:
+                    camera.capture.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+            self.cameras[name] = camera
+        self.tolerance = tolerance
+        self.frame_timeout = frame_timeout
+        self.start()
+
+    def start(self):
+        for camera in self.cameras.values():
+            camera.background_capture = True
+            if camera.grabber is None:
+                camera.start_grabber()
+
+    def release(self):
+        for camera in self.cameras.values():
+            camera.release()
+
+    def reopen(self):
+        for camera in self.cameras.values():
+            camera.reopen()
+
+    def name_of(self, camera):
+        """Name of the given camera object in the rig, None if it isn't part of it."""
+        return next((name for name, rig_camera in self.cameras.items() if rig_camera is camera), None)
+
+    def recent_frames(self, newer_than):
+        frames = {}
+        for name, camera in self.cameras.items():
+            with camera.frame_ready:
+                frames[name] = [(grabbed_at, frame) for grabbed_at, frame in camera.recent_frames if grabbed_at > newer_than]
+        return frames
+
+    def match(self, frames, tolerance):
+        """
+        Bundle of the newest frame of the camera lagging the most, and the closest frame of each other camera.
+        None if some camera has no frame yet or they are further apart than `tolerance`.
+        """
+        if not all(frames.values()):
+            return None
+        reference = min(camera_frames[-1][0] for camera_frames in frames.values())
+        closest = {
+            name: min(camera_frames, key=lambda item: abs(item[0] - reference))
+            for name, camera_frames in frames.items()
+        }
+        bundle = CameraBundle(
+            {name: frame for name, (_, frame) in closest.items()},
+            {name: grabbed_at for name, (grabbed_at, _) in closest.items()},
+        )
+        return bundle if bundle.skew <= tolerance else None
+
+    def capture(self, newer_than=None, tolerance=None):
+        """
+        CameraBundle with one frame of every camera, all grabbed within `tolerance` (default: the rig's)
+        and after `newer_than` (time.monotonic() value, e.g. the end of the last motion).
+        Raises RuntimeError if the cameras don't deliver such frames within `frame_timeout`.
+        """
+        newer_than = newer_than or 0.0
+        tolerance = self.tolerance if tolerance is None else tolerance
+        deadline = time.monotonic() + self.frame_timeout
+        while True:
+            frames = self.recent_frames(newer_than)
+            bundle = self.match(frames, tolerance)
+            if bundle is not None:
+                # consumers draw on the frames, other bundles may share them
+                bundle.frames = {name: frame.copy() for name, frame in bundle.frames.items()}
+                return bundle
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise RuntimeError(
+                    f"No frames of cameras {', '.join(self.cameras)} within {tolerance} s of each other "
+                    f"in {self.frame_timeout} s"
+                )
+            # the newest frames of the lagging camera decide the next match, wait for it
+            lagging = min(frames, key=lambda name: frames[name][-1][0] if frames[name] else 0.0)
+            camera = self.cameras[lagging]
+            last_seen = frames[lagging][-1][0] if frames[lagging] else newer_than
+            with camera.frame_ready:
+                camera.frame_ready.wait_for(
+                    lambda: camera.latest_frame is not None and camera.latest_frame_time > last_seen,
+                    remaining,
+                )
+
+    def stats(self):
+        """Per camera frame rate, frames grabbed, dropped and failed reads (see RobotCamera.stats)."""
+        return {name: camera.stats() for name, camera in self.cameras.items()}
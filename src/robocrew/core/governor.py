@@ -0,0 +1,193 @@
+"""Token budgets per agent and per task, with automatic step-down of thinking, history and image size."""
+
+from collections import deque
+
+from robocrew.core.history import is_image_block
+from robocrew.core.image_budget import ImageBudget
+from robocrew.core.prompt_cache import model_provider
+
+
+def new_totals():
+    return {"steps": 0, "input_tokens": 0, "output_tokens": 0, "reasoning_tokens": 0, "images": 0, "llm_seconds": 0.0}
+
+
+def count_images(messages):
+    return sum(
+        1 for message in messages if isinstance(message.content, list)
+        for block in message.content if is_image_block(block)
+    )
+
+
+class TokenGovernor:
+    """
+    Accumulates input, output and reasoning tokens, images sent and LLM time, for the agent and per task.
+    When the last `window` steps exceed a budget or the latency target, the agent is stepped down
+    by one lever at a time, `window` steps apart so the effect can be seen:
+    1. lower thinking_level (only if the agent was created with one),
+    2. shorter history_len,
+    3. smaller camera images (ImageBudget max_width).
+    When usage stays below half of every limit for `window` steps, the last change is reverted.
+    max_tokens_per_task: input + output tokens for one task; once spent, the agent stays stepped down.
+    max_tokens_per_step / max_reasoning_tokens_per_step: averages over the window.
+    latency_target: average LLM response time in seconds over the window.
+    thinking_levels: levels the model supports, lowest first, e.g. ('low', 'high') for Gemini 3.1 Pro.
+    """
+
+    def __init__(
+            self,
+            max_tokens_per_task: int | None = None,
+            max_tokens_per_step: int | None = None,
+            max_reasoning_tokens_per_step: int | None = None,
+            latency_target: float | None = None,
+            window: int = 3,
+            min_history_len: int = 2,
+            default_history_len: int = 8,
+            image_width: int = 1024,
+            min_image_width: int = 384,
+            image_scale: float = 0.75,
+            thinking_levels: tuple = ("minimal", "low", "medium", "high"),
+        ):
+        self.max_tokens_per_task = max_tokens_per_task
+        self.max_tokens_per_step = max_tokens_per_step
+        self.max_reasoning_tokens_per_step = max_reasoning_tokens_per_step
+        self.latency_target = latency_target
+        self.window = window
+        self.min_history_len = min_history_len
+        self.default_history_len = default_history_len
+        self.image_width = image_width
+        self.min_image_width = min_image_width
+        self.image_scale = image_scale
+        self.thinking_levels = list(thinking_levels)
+        self.agent_totals = new_totals()
+        self.task_totals = {}
+        self.task = None
+        self.recent = deque(maxlen=window)
+        self.steps_since_change = 0
+        self.applied = []  # (description, restore function), newest last
+
+    def totals(self, task=None):
+        """Usage of the whole agent, or of one task."""
+        if task is None:
+            return dict(self.agent_totals)
+        return dict(self.task_totals.get(task) or new_totals())
+
+    def record(self, agent, response, llm_latency=None):
+        """Adds the usage of one LLM response. Returns a description of the adjustment made, or None."""
+        usage_metadata = getattr(response, "usage_metadata", None) or {}
+        step = {
+            "steps": 1,
+            "input_tokens": usage_metadata.get("input_tokens", 0) or 0,
+            "output_tokens": usage_metadata.get("output_tokens", 0) or 0,
+            "reasoning_tokens": (usage_metadata.get("output_token_details") or {}).get("reasoning", 0) or 0,
+            "images": count_images(agent.message_history),
+            "llm_seconds": llm_latency or 0.0,
+        }
+        if agent.task != self.task:
+            self.task = agent.task
+            self.recent.clear()
+        task_totals = self.task_totals.setdefault(self.task, new_totals())
+        for key, value in step.items():
+            self.agent_totals[key] += value
+            task_totals[key] += value
+        self.recent.append(step)
+        self.steps_since_change += 1
+        return self.adjust(agent)
+
+    def load(self):
+        """Highest ratio of recent usage to its limit, 0 if no limit is set."""
+        ratios = [0.0]
+        steps = len(self.recent)
+        if steps == 0:
+            return 0.0
+
+        def average(key):
+            return sum(step[key] for step in self.recent) / steps
+
+        if self.max_tokens_per_step:
+            ratios.append((average("input_tokens") + average("output_tokens")) / self.max_tokens_per_step)
+        if self.max_reasoning_tokens_per_step:
+            ratios.append(average("reasoning_tokens") / self.max_reasoning_tokens_per_step)
+        if self.latency_target:
+            ratios.append(average("llm_seconds") / self.latency_target)
+        if self.max_tokens_per_task and self.task in self.task_totals:
+            task_totals = self.task_totals[self.task]
+            ratios.append((task_totals["input_tokens"] + task_totals["output_tokens"]) / self.max_tokens_per_task)
+        return max(ratios)
+
+    def adjust(self, agent):
+        if len(self.recent) < self.window or self.steps_since_change < self.window:
+            return None
+        load = self.load()
+        if load > 1.0:
+            change = self.step_down(agent)
+        elif load < 0.5 and self.applied:
+            description, restore = self.applied.pop()
+            restore()
+            change = f"restored after {description}"
+        else:
+            return None
+        if change:
+            self.steps_since_change = 0
+        return change
+
+    def step_down(self, agent):
+        for lever in (self.lower_thinking, self.shorten_history, self.shrink_images):
+            change = lever(agent)
+            if change:
+                description, restore = change
+                self.applied.append(change)
+                return description
+        return None
+
+    def lower_thinking(self, agent):
+        level = agent.thinking_level
+        if level is None or level.lower() not in self.thinking_levels[1:]:
+            return None
+        lower = self.thinking_levels[self.thinking_levels.index(level.lower()) - 1]
+        agent.set_thinking_level(lower)
+        return f"thinking level {level} -> {lower}", lambda: agent.set_thinking_level(level)
+
+    def shorten_history(self, agent):
+        history_len = agent.history_len
+        if history_len is None:
+            shorter = self.default_history_len
+        elif history_len - 2 >= self.min_history_len:
+            shorter = history_len - 2
+        else:
+            return None
+
+        def restore():
+            agent.history_len = history_len
+
+        agent.history_len = shorter
+        return f"history length {history_len} -> {shorter}", restore
+
+    def shrink_images(self, agent):
+        budget = agent.current_image_budget()
+        if budget is None:
+            budget = ImageBudget(max_width=self.image_width, provider=model_provider(agent.model))
+            previous_budget = agent.image_budget
+            navigation_mode = agent.navigation_mode
+            if isinstance(agent.image_budget, dict):
+                agent.image_budget[navigation_mode] = budget
+            else:
+                agent.image_budget = budget
+
+            def restore():
+                if isinstance(previous_budget, dict):
+                    previous_budget.pop(navigation_mode, None)
+                agent.image_budget = previous_budget
+
+            return f"image width limited to {budget.max_width}", restore
+
+        width = budget.max_width or (budget.last_stats or {}).get("width") or self.image_width
+        smaller = max(self.min_image_width, int(width * self.image_scale))
+        if smaller >= width:
+            return None
+        previous_width = budget.max_width
+
+        def restore():
+            budget.max_width = previous_width
+
+        budget.max_width = smaller
+        return f"image width {width} -> {smaller}", restore
@@ -0,0 +1,219 @@
+"""Deadline-bounded LLM requests, hedged to a backup model when the primary is slow."""
+
+import asyncio
+import contextvars
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from robocrew.core import tracing
+
+
+class LLMDeadlineExceeded(TimeoutError):
+    """No model answered within the step deadline."""
+
+
+class HedgedInvoker:
+    """
+    Sends the request to the primary model. If it hasn't answered after `hedge_percentile` of its
+    recent latencies (`hedge_delay` seconds until `min_samples` latencies are known), the same request
+    is sent to the backup model. The first successful response wins, the other request is cancelled
+    (async) or its result discarded (sync, a running HTTP call can't be interrupted).
+    If every path fails, the request is retried with exponential backoff, up to `max_retries` times.
+    deadline: seconds for the whole request including retries, LLMDeadlineExceeded is raised after it.
+    max_in_flight: sync requests running at once, discarded ones included (a running HTTP call keeps its worker
+    until it returns). The backup is only sent while a worker stays free for the next primary.
+    """
+
+    def __init__(
+            self,
+            backup_llm=None,
+            deadline: float | None = None,
+            hedge_percentile: float = 90,
+            hedge_delay: float = 10.0,
+            min_samples: int = 5,
+            window: int = 50,
+            max_retries: int = 2,
+            backoff: float = 0.5,
+            backoff_factor: float = 2.0,
+            max_in_flight: int = 16,
+        ):
+        self.backup_llm = backup_llm
+        self.deadline = deadline
+        self.hedge_percentile = hedge_percentile
+        self.hedge_delay = hedge_delay
+        self.min_samples = min_samples
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.backoff_factor = backoff_factor
+        # primary model latencies, an abandoned request counts with the time it ran until then
+        self.latencies = deque(maxlen=window)
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.lock = threading.Lock()
+        self.pool = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="llm-hedge")
+        self.last_stats = None
+
+    def hedge_after(self):
+        """Seconds to wait for the primary model before sending the request to the backup."""
+        if len(self.latencies) < self.min_samples:
+            return self.hedge_delay
+        latencies = sorted(self.latencies)
+        index = min(len(latencies) - 1, math.ceil(self.hedge_percentile / 100 * len(latencies)) - 1)
+        return latencies[max(0, index)]
+
+    def invoke(self, llm, messages):
+        start = time.monotonic()
+        deadline_at = start + self.deadline if self.deadline else None
+        backoff = self.backoff
+        for attempt in range(self.max_retries + 1):
+            try:
+                response, path, hedged = self._race(llm, messages, deadline_at)
+                return self._finish(response, path, hedged, attempt, start)
+            except LLMDeadlineExceeded:
+                raise
+            except Exception as exc:
+                self._check_retry(exc, attempt, backoff, deadline_at)
+                time.sleep(backoff)
+                backoff *= self.backoff_factor
+
+    async def ainvoke(self, llm, messages):
+        start = time.monotonic()
+        deadline_at = start + self.deadline if self.deadline else None
+        backoff = self.backoff
+        for attempt in range(self.max_retries + 1):
+            try:
+                response, path, hedged = await self._arace(llm, messages, deadline_at)
+                return self._finish(response, path, hedged, attempt, start)
+            except LLMDeadlineExceeded:
+                raise
+            except Exception as exc:
+                self._check_retry(exc, attempt, backoff, deadline_at)
+                await asyncio.sleep(backoff)
+                backoff *= self.backoff_factor
+
+    def _check_retry(self, exc, attempt, backoff, deadline_at):
+        """Raises if no retry is left before the deadline."""
+        if attempt == self.max_retries:
+            raise exc
+        if deadline_at is not None and time.monotonic() + backoff >= deadline_at:
+            raise LLMDeadlineExceeded(f"LLM request failed and no time is left to retry: {exc}") from exc
+        print(f"[llm: attempt {attempt + 1} failed ({exc}), retrying in {backoff:.1f} s]")
+
+    def _finish(self, response, path, hedged, attempt, start):
+        latency = time.monotonic() - start
+        self.last_stats = {"path": path, "hedged": hedged, "attempts": attempt + 1, "latency": latency}
+        tracing.record(f"llm_{path}", latency, hedged=hedged, attempts=attempt + 1)
+        return response
+
+    def _record_primary(self, started):
+        """
+        Records the primary's latency once: when it answers, or when it is abandoned with the time it ran until then
+        (call the returned function with None), so slow requests that lose the race still raise the percentile.
+        """
+        recorded = threading.Event()
+
+        def record(future):
+            if future is not None and not future.cancelled() and future.exception() is not None:
+                return
+            with self.lock:
+                if recorded.is_set():
+                    return
+                recorded.set()
+                self.latencies.append(time.monotonic() - started)
+        return record
+
+    def _submit(self, invoke, messages):
+        with self.lock:
+            self.in_flight += 1
+        future = self.pool.submit(contextvars.copy_context().run, invoke, messages)
+        future.add_done_callback(self._request_done)
+        return future
+
+    def _request_done(self, future):
+        with self.lock:
+            self.in_flight -= 1
+
+    def _worker_free_for_hedge(self):
+        with self.lock:
+            return self.in_flight + 1 < self.max_in_flight
+
+    def _race(self, llm, messages, deadline_at):
+        started = time.monotonic()
+        record_primary = self._record_primary(started)
+        primary = self._submit(llm.invoke, messages)
+        primary.add_done_callback(record_primary)
+        running = {primary: "primary"}
+        hedge_at = started + self.hedge_after() if self.backup_llm is not None else None
+        error = None
+        hedged = False
+        try:
+            while True:
+                if hedge_at is not None and (time.monotonic() >= hedge_at or not running):
+                    hedge_at = None
+                    if self._worker_free_for_hedge():
+                        hedged = True
+                        running[self._submit(self.backup_llm.invoke, messages)] = "backup"
+                    else:
+                        print(f"[llm: not hedging, {self.in_flight} requests still running]")
+                if not running:
+                    raise error
+                timeouts = [moment - time.monotonic() for moment in (hedge_at, deadline_at) if moment is not None]
+                done, _ = wait(running, timeout=max(0.0, min(timeouts)) if timeouts else None,
+                               return_when=FIRST_COMPLETED)
+                for future in done:
+                    path = running.pop(future)
+                    if future.exception() is not None:
+                        error = future.exception()
+                        continue
+                    return future.result(), path, hedged
+                if deadline_at is not None and time.monotonic() >= deadline_at:
+                    raise LLMDeadlineExceeded(f"No LLM response within {self.deadline:.1f} s")
+        finally:
+            # only queued requests can be cancelled, running ones are discarded when they return
+            for future in running:
+                future.cancel()
+            if primary in running:
+                record_primary(None)
+
+    async def _arace(self, llm, messages, deadline_at):
+        started = time.monotonic()
+        primary = asyncio.ensure_future(llm.ainvoke(messages))
+        primary.add_done_callback(self._record_primary(started))
+        running = {primary: "primary"}
+        hedge_at = started + self.hedge_after() if self.backup_llm is not None else None
+        error = None
+        hedged = False
+        try:
+            while True:
+                if hedge_at is not None and (time.monotonic() >= hedge_at or not running):
+                    hedge_at = None
+                    hedged = True
+                    running[asyncio.ensure_future(self.backup_llm.ainvoke(messages))] = "backup"
+                if not running:
+                    raise error
+                timeouts = [moment - time.monotonic() for moment in (hedge_at, deadline_at) if moment is not None]
+                done, _ = await asyncio.wait(running, timeout=max(0.0, min(timeouts)) if timeouts else None,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    path = running.pop(task)
+                    if task.exception() is not None:
+                        error = task.exception()
+                        continue
+                    return task.result(), path, hedged
+                if deadline_at is not None and time.monotonic() >= deadline_at:
+                    raise LLMDeadlineExceeded(f"No LLM response within {self.deadline:.1f} s")
+        finally:
+            for task in running:
+                task.cancel()
+
+    def describe(self):
+        stats = self.last_stats
+        hedged = ", hedged" if stats["hedged"] else ""
+        retries = f", {stats['attempts']} attempts" if stats["attempts"] > 1 else ""
+        return f"{stats['path']} answered in {stats['latency']:.1f} s{hedged}{retries}"
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
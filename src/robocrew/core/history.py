@@ -0,0 +1,177 @@
+"""Keep the agent message history small: downscale old images and enforce a size budget."""
+
+import base64
+import cv2
+import numpy as np
+
+
+IMAGE_PLACEHOLDER = "[Older image removed to save context.]"
+IMAGE_TOKENS_ESTIMATE = 258  # Gemini cost of one image tile, close enough for other providers
+CHARS_PER_TOKEN = 4
+
+
+def is_image_block(block):
+    return isinstance(block, dict) and block.get("type") == "image_url"
+
+
+def image_block_url(block):
+    image_url = block["image_url"]
+    return image_url["url"] if isinstance(image_url, dict) else image_url
+
+
+def image_url_block(url):
+    return {"type": "image_url", "image_url": {"url": url}}
+
+
+def estimate_message_size(message):
+    """Returns (payload bytes, estimated tokens) of a message."""
+    content = message.content
+    blocks = [content] if isinstance(content, str) else content
+    size = 0
+    tokens = 0
+    for block in blocks:
+        if isinstance(block, str):
+            text = block
+        elif is_image_block(block):
+            size += len(image_block_url(block))
+            tokens += IMAGE_TOKENS_ESTIMATE
+            continue
+        else:
+            text = block.get("text") or ""
+        size += len(text)
+        tokens += len(text) // CHARS_PER_TOKEN
+    if message.type == "ai":
+        tool_calls_size = len(str(message.tool_calls))
+        size += tool_calls_size
+        tokens += tool_calls_size // CHARS_PER_TOKEN
+    return size, tokens
+
+
+def safe_cut_indices(messages):
+    """
+    Indices of human messages the history can start from without separating
+    a tool call from its tool result.
+    """
+    call_origin = {}
+    forbidden = set()
+    for i, message in enumerate(messages):
+        if message.type == "ai":
+            for tool_call in message.tool_calls:
+                call_origin[tool_call["id"]] = i
+        elif message.type == "tool" and message.tool_call_id in call_origin:
+            forbidden.update(range(call_origin[message.tool_call_id] + 1, i + 1))
+    return [i for i, message in enumerate(messages) if message.type == "human" and i not in forbidden]
+
+
+def make_thumbnail_url(url, width, quality):
+    """Downscales a base64 data URL image. Returns None if the image can't be decoded."""
+    header, _, data = url.partition(",")
+    if not header.startswith("data:image") or not data:
+        return None
+    image = cv2.imdecode(np.frombuffer(base64.b64decode(data), np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        return None
+    height = max(1, int(image.shape[0] * width / image.shape[1]))
+    thumbnail = cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA)
+    _, buffer = cv2.imencode(".jpg", thumbnail, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return "data:image/jpeg;base64," + base64.b64encode(buffer).decode("utf-8")
+
+
+class HistoryCompactor:
+    """
+    Compacts the message history before each LLM request:
+    - images from the newest `full_image_steps` steps are kept untouched,
+    - images from the next `thumbnail_steps` steps are replaced by small thumbnails,
+    - older images are replaced by a short text placeholder,
+    - if the history is still bigger than `max_bytes`, oldest steps are dropped.
+    A step is one LLM response; an image's age is the number of responses after it.
+    """
+
+    def __init__(
+            self,
+            full_image_steps: int = 2,
+            thumbnail_steps: int = 4,
+            thumbnail_width: int = 320,
+            thumbnail_quality: int = 60,
+            max_bytes: int | None = None,
+        ):
+        self.full_image_steps = full_image_steps
+        self.thumbnail_steps = thumbnail_steps
+        self.thumbnail_width = thumbnail_width
+        self.thumbnail_quality = thumbnail_quality
+        self.max_bytes = max_bytes
+        self.thumbnails = {}  # original url -> thumbnail url
+        self.last_stats = {}
+
+    def compact(self, messages):
+        """Returns a compacted copy of the messages list. The first (system) message is always kept."""
+        ages = self._message_ages(messages)
+        compacted = [
+            self._compact_images(message, age) if message.type == "human" else message
+            for message, age in zip(messages, ages)
+        ]
+        sizes = [estimate_message_size(message) for message in compacted]
+
+        if self.max_bytes is not None:
+            total = sum(size for size, _ in sizes)
+            cut = 1
+            for index in safe_cut_indices(compacted):
+                if total <= self.max_bytes:
+                    break
+                if index <= 1:
+                    continue
+                total -= sum(size for size, _ in sizes[cut:index])
+                cut = index
+            compacted = compacted[:1] + compacted[cut:]
+            sizes = sizes[:1] + sizes[cut:]
+
+        # forget thumbnails of images which left the history
+        urls = {image_block_url(block) for message in compacted if isinstance(message.content, list)
+                for block in message.content if is_image_block(block)}
+        self.thumbnails = {url: thumb for url, thumb in self.thumbnails.items() if thumb in urls}
+        self.last_stats = {
+            "messages": len(compacted),
+            "bytes": sum(size for size, _ in sizes),
+            "estimated_tokens": sum(tokens for _, tokens in sizes),
+        }
+        return compacted
+
+    def _message_ages(self, messages):
+        ages = []
+        age = 0
+        for message in reversed(messages):
+            ages.append(age)
+            if message.type == "ai":
+                age += 1
+        return ages[::-1]
+
+    def _compact_images(self, message, age):
+        if age < self.full_image_steps or not isinstance(message.content, list):
+            return message
+        keep_thumbnail = age < self.full_image_steps + self.thumbnail_steps
+        new_content = []
+        changed = False
+        for block in message.content:
+            if not is_image_block(block):
+                new_content.append(block)
+                continue
+            url = image_block_url(block)
+            thumbnail = self._thumbnail(url) if keep_thumbnail else None
+            if thumbnail == url:
+                new_content.append(block)
+                continue
+            changed = True
+            if thumbnail:
+                new_content.append(image_url_block(thumbnail))
+            else:
+                new_content.append({"type": "text", "text": IMAGE_PLACEHOLDER})
+        if not changed:
+            return message
+        return message.model_copy(update={"content": new_content})
+
+    def _thumbnail(self, url):
+        if url in self.thumbnails.values():
+            return url  # already a thumbnail
+        if url not in self.thumbnails:
+            self.thumbnails[url] = make_thumbnail_url(url, self.thumbnail_width, self.thumbnail_quality)
+        return self.thumbnails[url]
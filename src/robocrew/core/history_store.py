@@ -0,0 +1,155 @@
+"""Cap the RAM used by the message history by spilling older images and steps to disk."""
+
+import hashlib
+import json
+import os
+import threading
+
+from langchain_core.messages import message_to_dict, messages_from_dict
+
+from robocrew.core.history import (
+    IMAGE_PLACEHOLDER,
+    estimate_message_size,
+    image_block_url,
+    image_url_block,
+    is_image_block,
+    safe_cut_indices,
+)
+
+
+class BlobStore:
+    """Content-addressed files: each blob is named by the sha256 of its bytes, so equal payloads are stored once."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, digest):
+        return os.path.join(self.directory, digest[:2], digest[2:])
+
+    def put(self, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return digest
+
+    def get(self, digest) -> bytes:
+        with open(self.path(digest), "rb") as f:
+            return f.read()
+
+    def __contains__(self, digest):
+        return os.path.exists(self.path(digest))
+
+
+class MessageArchive:
+    """
+    Keeps the in-RAM message history under `max_bytes` (image payloads and text):
+    - images of older messages are moved to a BlobStore and replaced by a text placeholder,
+      their digests are kept in the message response_metadata (never sent to the provider),
+    - if the history is still too big, the oldest steps are appended to `messages.jsonl`.
+    The newest `keep_steps` human messages (none if 0) and everything after them stay untouched.
+    Spilled images and archived messages are read back only on request, e.g. by the UI or a replay.
+    directory: where blobs and archived messages are written. Use persistent storage,
+        on a Raspberry Pi /tmp may itself live in RAM.
+    """
+
+    def __init__(self, directory, max_bytes: int = 4 * 1024 * 1024, keep_steps: int = 2):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.keep_steps = keep_steps
+        self.blobs = BlobStore(os.path.join(directory, "blobs"))
+        self.messages_path = os.path.join(directory, "messages.jsonl")
+        self.archived_count = 0
+        self.last_stats = {}
+
+    def spill(self, messages):
+        """Returns the messages to keep in RAM. The first (system) message is always kept."""
+        sizes = [estimate_message_size(message)[0] for message in messages]
+        total = sum(sizes)
+        human_indices = [i for i, message in enumerate(messages) if message.type == "human"]
+        if self.keep_steps == 0:
+            protected = len(messages)  # nothing protected, human_indices[-0] would protect everything
+        elif len(human_indices) >= self.keep_steps:
+            protected = human_indices[-self.keep_steps]
+        else:
+            protected = 1
+        messages = list(messages)
+        spilled_images = 0
+
+        for i in range(1, protected):
+            if total <= self.max_bytes:
+                break
+            message, count = self._spill_images(messages[i])
+            if count:
+                messages[i] = message
+                new_size = estimate_message_size(message)[0]
+                total -= sizes[i] - new_size
+                sizes[i] = new_size
+                spilled_images += count
+
+        cut = 1
+        if total > self.max_bytes:
+            for index in safe_cut_indices(messages):
+                if total <= self.max_bytes or index > protected:
+                    break
+                if index <= 1:
+                    continue
+                total -= sum(sizes[cut:index])
+                cut = index
+        if cut > 1:
+            self._archive(messages[1:cut])
+            messages = messages[:1] + messages[cut:]
+
+        self.last_stats = {
+            "bytes": total,
+            "spilled_images": spilled_images,
+            "archived_messages": cut - 1,
+        }
+        return messages
+
+    def _spill_images(self, message):
+        if not isinstance(message.content, list):
+            return message, 0
+        content = []
+        digests = {}
+        for index, block in enumerate(message.content):
+            if is_image_block(block):
+                digests[str(index)] = self.blobs.put(image_block_url(block).encode("utf-8"))
+                content.append({"type": "text", "text": IMAGE_PLACEHOLDER})
+            else:
+                content.append(block)
+        if not digests:
+            return message, 0
+        metadata = {**message.response_metadata, "spilled_images": digests}
+        return message.model_copy(update={"content": content, "response_metadata": metadata}), len(digests)
+
+    def _archive(self, messages):
+        with open(self.messages_path, "a", encoding="utf-8") as f:
+            for message in messages:
+                f.write(json.dumps(message_to_dict(message)) + "\n")
+        self.archived_count += len(messages)
+
+    def restore(self, message):
+        """Copy of the message with its spilled images loaded back from disk."""
+        digests = message.response_metadata.get("spilled_images")
+        if not digests:
+            return message
+        content = list(message.content)
+        for index, digest in digests.items():
+            content[int(index)] = image_url_block(self.blobs.get(digest).decode("utf-8"))
+        metadata = {key: value for key, value in message.response_metadata.items() if key != "spilled_images"}
+        return message.model_copy(update={"content": content, "response_metadata": metadata})
+
+    def archived_messages(self, restore_images=False):
+        """Yields messages moved out of RAM, oldest first, read lazily from disk."""
+        if not os.path.exists(self.messages_path):
+            return
+        with open(self.messages_path, encoding="utf-8") as f:
+            for line in f:
+                message = messages_from_dict([json.loads(line)])[0]
+                yield self.restore(message) if restore_images else message
@@ -0,0 +1,125 @@
+"""Camera frame size, JPEG quality and crop for upload, sized to the provider's image tiling."""
+
+import math
+
+import cv2
+
+# Side of one billed image tile. Anthropic bills by pixel area, so no tiling there.
+TILE_SIZES = {
+    "openai": 512,
+    "google_genai": 768,
+}
+
+
+def estimate_image_tokens(width, height, provider=None):
+    """Approximate input tokens the provider bills for one image of the given size."""
+    if provider == "anthropic":
+        scale = min(1.0, 1568 / max(width, height))
+        return math.ceil(width * scale * height * scale / 750)
+    if provider == "google_genai":
+        if width <= 384 and height <= 384:
+            return 258
+        return math.ceil(width / 768) * math.ceil(height / 768) * 258
+    # OpenAI high detail: fit into 2048x2048, shortest side down to 768, then 512 px tiles
+    scale = min(1.0, 2048 / max(width, height))
+    shortest_side = min(width, height) * scale
+    if shortest_side > 768:
+        scale *= 768 / shortest_side
+    tiles = math.ceil(width * scale / 512) * math.ceil(height * scale / 512)
+    return 85 + 170 * tiles
+
+
+def align_to_tiles(width, height, tile, slack=0.2):
+    """
+    Shrinks the size (keeping aspect ratio) to a tile boundary when that removes a row
+    or column of tiles at the cost of at most `slack` of the resolution.
+    """
+    scales = {1.0}
+    for side in (width, height):
+        for boundary in range(tile, side, tile):
+            if boundary >= side * (1 - slack):
+                scales.add(boundary / side)
+
+    def tiles(scale):
+        return math.ceil(int(width * scale) / tile) * math.ceil(int(height * scale) / tile)
+
+    scale = min(scales, key=lambda scale: (tiles(scale), -scale))
+    return int(width * scale), int(height * scale)
+
+
+class ImageBudget:
+    """
+    Prepares camera frames before they are sent to the LLM:
+    - roi: optional (x0, y0, x1, y1) crop in fractions of the augmented frame, e.g. (0, 0.2, 1, 1),
+    - max_width / max_height: frames are downscaled to fit (never upscaled), then aligned to the
+      provider's tile boundaries when that saves tiles,
+    - grayscale: send a single-channel image (smaller JPEG, same token cost),
+    - quality: JPEG quality.
+    provider: 'openai', 'google_genai' or 'anthropic'. LLMAgent fills it from the model name if not set.
+    """
+
+    def __init__(
+            self,
+            max_width: int | None = None,
+            max_height: int | None = None,
+            quality: int = 85,
+            grayscale: bool = False,
+            roi: tuple | None = None,
+            provider: str | None = None,
+            tile_slack: float = 0.2,
+        ):
+        self.max_width = max_width
+        self.max_height = max_height
+        self.quality = quality
+        self.grayscale = grayscale
+        self.roi = roi
+        self.provider = provider
+        self.tile_slack = tile_slack
+        self.last_stats = None
+
+    def target_size(self, width, height):
+        scale = 1.0
+        if self.max_width:
+            scale = min(scale, self.max_width / width)
+        if self.max_height:
+            scale = min(scale, self.max_height / height)
+        width, height = max(1, int(width * scale)), max(1, int(height * scale))
+        tile = TILE_SIZES.get(self.provider)
+        if tile:
+            width, height = align_to_tiles(width, height, tile, self.tile_slack)
+        return width, height
+
+    def prepare(self, frame):
+        if self.roi:
+            x0, y0, x1, y1 = self.roi
+            frame_height, frame_width = frame.shape[:2]
+            frame = frame[int(y0 * frame_height):int(y1 * frame_height), int(x0 * frame_width):int(x1 * frame_width)]
+        height, width = frame.shape[:2]
+        size = self.target_size(width, height)
+        if size != (width, height):
+            frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        if self.grayscale and frame.ndim == 3:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return frame
+
+    def encode(self, frame):
+        """JPEG bytes of the prepared frame. Size and token estimate are kept in `last_stats`."""
+        native_height, native_width = frame.shape[:2]
+        prepared = self.prepare(frame)
+        _, buffer = cv2.imencode(".jpg", prepared, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        height, width = prepared.shape[:2]
+        self.last_stats = {
+            "width": width,
+            "height": height,
+            "bytes": len(buffer),
+            "tokens": estimate_image_tokens(width, height, self.provider),
+            "native_tokens": estimate_image_tokens(native_width, native_height, self.provider),
+        }
+        return buffer.tobytes()
+
+    def describe(self):
+        stats = self.last_stats
+        return (
+            f"{stats['width']}x{stats['height']} q{self.quality}, {stats['bytes'] / 1024:.0f} KB, "
+            f"~{stats['tokens']} tokens (native ~{stats['native_tokens']})"
+        )
@@ -0,0 +1,90 @@
+"""
+Camera images passed by reference between the agent, UI, history and step recorder,
+so each frame is decoded, JPEG encoded and base64 encoded at most once.
+
+    image = ImagePayload(frame=augmented_frame, budget=image_budget)
+    image.data_url      # encodes the JPEG and base64 on first use
+    image.frame         # no decode, it is the frame it was created from
+"""
+
+import base64
+import threading
+from functools import cached_property
+
+import cv2
+import numpy as np
+
+
+class ImagePayload:
+    """
+    One camera image, created from whichever form is at hand: decoded BGR frame, JPEG bytes or base64.
+    The other forms are derived on first use and kept; forms given to the constructor are never recomputed.
+    budget: optional robocrew.core.image_budget.ImageBudget used when the JPEG is encoded from the frame.
+    """
+
+    def __init__(self, frame=None, jpeg: bytes | None = None, base64_data: str | None = None, budget=None):
+        if frame is None and jpeg is None and base64_data is None:
+            raise ValueError("ImagePayload needs a frame, JPEG bytes or base64 data")
+        if frame is not None:
+            self.frame = frame
+        if jpeg is not None:
+            self.jpeg = jpeg
+        if base64_data is not None:
+            self.base64 = base64_data
+        self.budget = budget
+        self.thumbnails = {}
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_base64(cls, base64_data):
+        return cls(base64_data=base64_data)
+
+    @property
+    def has_frame(self):
+        """True if the decoded frame is available without decoding the JPEG."""
+        return "frame" in self.__dict__
+
+    @cached_property
+    def frame(self):
+        return cv2.imdecode(np.frombuffer(self.jpeg, np.uint8), cv2.IMREAD_COLOR)
+
+    @cached_property
+    def jpeg(self):
+        if "base64" in self.__dict__:
+            return base64.b64decode(self.base64)
+        if self.budget is not None:
+            return self.budget.encode(self.frame)
+        return cv2.imencode(".jpg", self.frame)[1].tobytes()
+
+    @cached_property
+    def base64(self):
+        return base64.b64encode(self.jpeg).decode("utf-8")
+
+    @cached_property
+    def data_url(self):
+        return f"data:image/jpeg;base64,{self.base64}"
+
+    def thumbnail(self, max_width: int = 320):
+        """Smaller copy for previews, made once per width."""
+        with self.lock:
+            if max_width not in self.thumbnails:
+                height, width = self.frame.shape[:2]
+                if width <= max_width:
+                    self.thumbnails[max_width] = self
+                else:
+                    size = (max_width, round(height * max_width / width))
+                    self.thumbnails[max_width] = ImagePayload(frame=cv2.resize(self.frame, size, interpolation=cv2.INTER_AREA))
+            return self.thumbnails[max_width]
+
+
+def as_image_payload(image):
+    """ImagePayload for an ImagePayload or a base64 JPEG string."""
+    return image if isinstance(image, ImagePayload) else ImagePayload.from_base64(image)
+
+
+def image_base64(image):
+    return image.base64 if isinstance(image, ImagePayload) else image
+
+
+def image_data_url(image):
+    return image.data_url if isinstance(image, ImagePayload) else f"data:image/jpeg;base64,{image}"
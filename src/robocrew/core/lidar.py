@@ -3,6 +3,7 @@ import numpy as np
 import time
 from rplidar import RPLidar
 import io
+from robocrew.core.sim import SimLidar, is_sim_port
 
 BAUD_RATE = 115200
 ROBOT_WIDTH = 440 # mm
@@ -20,8 +21,11 @@ UI_STYLE = {
 }
 
 def init_lidar(port, max_range_m=3):
-    lidar = RPLidar(port, baudrate=BAUD_RATE, timeout=3)
-    time.sleep(1.5)
+    if is_sim_port(port):
+        lidar = SimLidar(port)
+    else:
+        lidar = RPLidar(port, baudrate=BAUD_RATE, timeout=3)
+        time.sleep(1.5)
     bg_img, scale = generate_plot_background(max_range_m)
     return lidar, bg_img, scale
     
@@ -0,0 +1,160 @@
+"""
+Process-wide gate in front of LLM provider calls, shared by every LLMAgent (planners, executors,
+several robots driven from one host), so bursts don't run into provider rate limits.
+
+The shared `default_scheduler` has no limits until configured; it only records queueing delays.
+Set the limits of your provider tier to opt in, for all agents at once:
+
+    from robocrew.core.llm_scheduler import default_scheduler
+    default_scheduler.configure("google_genai", concurrency=4, tokens_per_minute=1_000_000)
+"""
+
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import asynccontextmanager, contextmanager
+
+from robocrew.core import tracing
+
+# lower runs first: executor steps move the robot, planners can wait
+PRIORITIES = {"executor": 0, "planner": 1}
+TOKEN_WINDOW = 60.0
+
+
+class Ticket:
+    """One granted request. Set `tokens` to the real usage once the response is known."""
+
+    def __init__(self, provider, tokens):
+        self.provider = provider
+        self.tokens = tokens
+        self.queue_delay = 0.0
+        self._window_entry = None
+
+
+class LLMScheduler:
+    """
+    Grants LLM requests per provider, at most `concurrency` at a time and `tokens_per_minute`
+    over the last minute (None for no limit). Waiting requests are granted by priority, then in arrival order.
+    A request bigger than the whole per-minute budget is granted once the window is empty.
+    """
+
+    def __init__(self, default_concurrency: int | None = 4, default_tokens_per_minute: int | None = None):
+        self.default_limits = {"concurrency": default_concurrency, "tokens_per_minute": default_tokens_per_minute}
+        self.limits = {}
+        self.condition = threading.Condition()
+        self.running = defaultdict(int)
+        self.token_windows = defaultdict(deque)  # provider -> [[grant time, tokens], ...]
+        self.waiting = defaultdict(list)  # provider -> heap of (priority, arrival number)
+        self.arrivals = itertools.count()
+        self.queue_delays = defaultdict(lambda: deque(maxlen=500))  # (provider, priority) -> seconds
+
+    def configure(self, provider, concurrency: int | None = None, tokens_per_minute: int | None = None):
+        limits = self.limits.setdefault(provider, dict(self.default_limits))
+        if concurrency is not None:
+            limits["concurrency"] = concurrency
+        if tokens_per_minute is not None:
+            limits["tokens_per_minute"] = tokens_per_minute
+
+    def provider_limits(self, provider):
+        return self.limits.get(provider, self.default_limits)
+
+    def acquire(self, provider, priority=0, tokens=0):
+        """Blocks until the request may be sent. Returns its Ticket."""
+        provider = provider or "default"
+        priority = PRIORITIES.get(priority, priority)
+        ticket = Ticket(provider, tokens)
+        start = time.monotonic()
+        with self.condition:
+            entry = (priority, next(self.arrivals))
+            heapq.heappush(self.waiting[provider], entry)
+            try:
+                while True:
+                    wait_for = self._blocked_for(provider, entry, tokens)
+                    if wait_for == 0:
+                        break
+                    self.condition.wait(wait_for)
+            finally:
+                self.waiting[provider].remove(entry)
+                heapq.heapify(self.waiting[provider])
+            self.running[provider] += 1
+            ticket._window_entry = [time.monotonic(), tokens]
+            self.token_windows[provider].append(ticket._window_entry)
+            self.condition.notify_all()
+        ticket.queue_delay = time.monotonic() - start
+        self.queue_delays[(provider, priority)].append(ticket.queue_delay)
+        tracing.record("llm_queue", ticket.queue_delay, provider=provider, priority=priority)
+        return ticket
+
+    def _blocked_for(self, provider, entry, tokens):
+        """0 if the request can go now, else seconds to wait (None until another request finishes)."""
+        if self.waiting[provider][0] != entry:
+            return None
+        limits = self.provider_limits(provider)
+        if limits["concurrency"] and self.running[provider] >= limits["concurrency"]:
+            return None
+        tokens_per_minute = limits["tokens_per_minute"]
+        if not tokens_per_minute:
+            return 0
+        window = self.token_windows[provider]
+        now = time.monotonic()
+        while window and window[0][0] <= now - TOKEN_WINDOW:
+            window.popleft()
+        used = sum(tokens for _, tokens in window)
+        if not window or used + tokens <= tokens_per_minute:
+            return 0
+        return max(0.001, window[0][0] + TOKEN_WINDOW - now)
+
+    def release(self, ticket):
+        with self.condition:
+            self.running[ticket.provider] -= 1
+            ticket._window_entry[1] = ticket.tokens
+            self.condition.notify_all()
+
+    @contextmanager
+    def slot(self, provider, priority=0, tokens=0):
+        ticket = self.acquire(provider, priority, tokens)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    @asynccontextmanager
+    async def aslot(self, provider, priority=0, tokens=0):
+        """Like `slot`, waiting in a worker thread so the event loop keeps running."""
+        future = asyncio.get_running_loop().run_in_executor(None, self.acquire, provider, priority, tokens)
+        try:
+            ticket = await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # the worker may still get the slot; give it back right away
+            future.add_done_callback(lambda done: done.exception() is None and self.release(done.result()))
+            raise
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def stats(self):
+        """Queueing delay per (provider, priority) and current load per provider."""
+        with self.condition:
+            delays = {key: list(values) for key, values in self.queue_delays.items()}
+            load = {
+                provider: {"running": self.running[provider], "waiting": len(self.waiting[provider])}
+                for provider in set(self.running) | set(self.waiting)
+            }
+        queue = {}
+        for (provider, priority), values in delays.items():
+            values.sort()
+            queue[f"{provider}/{priority}"] = {
+                "count": len(values),
+                "mean_s": sum(values) / len(values),
+                "p95_s": values[min(len(values) - 1, int(len(values) * 0.95))],
+                "max_s": values[-1],
+            }
+        return {"queue_delay": queue, "load": load}
+
+
+# uncapped unless configured, so agents don't silently share a concurrency limit
+default_scheduler = LLMScheduler(default_concurrency=None)
@@ -0,0 +1,155 @@
+"""
+Pipelined planning: while the executor works on a subtask, the planner already plans its next step.
+
+    lookahead = SubtaskLookahead()
+    execute_subtask = create_execute_subtask(executor, lookahead=lookahead)
+    planner = LLMAgent(..., tools=[execute_subtask, finish_task], lookahead=lookahead)
+"""
+
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.messages import HumanMessage, ToolMessage
+
+from robocrew.core.history import estimate_message_size
+from robocrew.core.tracing import span
+
+FAILURE_WORDS = ("fail", "unable", "cannot", "can't", "could not", "couldn't", "not found", "stuck", "impossible")
+
+
+def report_as_expected(subtask, report):
+    """True if the executor finished the subtask and its report doesn't sound like a failure."""
+    return report is not None and not any(word in str(report).lower() for word in FAILURE_WORDS)
+
+
+class PlannedStep:
+    """
+    A planner step prepared during a subtask: the observation it was planned on, the message showing it,
+    the request sent and, once `future` is done, the response and how long the LLM took.
+    """
+
+    def __init__(self, task, tool_call_id, subtask, observation, message, request):
+        self.task = task
+        self.tool_call_id = tool_call_id
+        self.subtask = subtask
+        self.observation = observation
+        self.message = message
+        self.request = request
+        self.future = None
+        self.response = None
+        self.latency = None
+
+
+class SubtaskLookahead:
+    """
+    Once the executor has made `start_after_steps` steps on a subtask, the planner is asked in the background
+    for its next step, assuming the subtask succeeds and showing it the executor's latest observation.
+    If the executor's report passes `report_check(subtask, report)`, the planner's next step uses that
+    tentative response instead of a new LLM call; otherwise it is dropped and the planner replans as usual.
+    Works with the blocking LLMAgent planner and execute_subtask tool, AsyncLLMAgent doesn't accept it.
+    A dropped request that already reached the LLM can't be stopped: it runs to the end and keeps its
+    LLM scheduler slot and the lookahead worker meanwhile, so the next lookahead starts after it.
+    """
+
+    def __init__(self, start_after_steps: int = 1, report_check=report_as_expected):
+        self.start_after_steps = start_after_steps
+        self.report_check = report_check
+        self.planner = None
+        self.worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="lookahead")
+        self.running = None
+        self.ready = None
+        self.stats = {"accepted": 0, "rejected": 0, "failed": 0}
+
+    def attach(self, planner):
+        self.planner = planner
+
+    def run_subtask(self, executor, subtask):
+        """Runs the subtask on the executor like execute_subtask, planning ahead meanwhile. Returns the report."""
+        self.ready = None
+        executor.task = subtask
+        report = None
+        steps = 0
+        while executor.task:
+            report = executor.main_loop_content()
+            steps += 1
+            if self.running is None and executor.task and steps >= self.start_after_steps:
+                self.running = self.start(executor, subtask)
+        planned, self.running = self.running, None
+        if planned is None:
+            return report
+        if self.report_check(subtask, report):
+            self.ready = planned
+        else:
+            planned.future.cancel()  # only stops it if it hasn't started yet
+            self.stats["rejected"] += 1
+            print(f"[lookahead: dropped, report not as expected: {report}]")
+        return report
+
+    def start(self, executor, subtask):
+        """Starts planning the planner's next step; None if the planner isn't waiting on a single subtask."""
+        planner = self.planner
+        observation = getattr(executor, "last_observation", None)
+        if planner is None or observation is None:
+            return None
+        history = list(planner.message_history)
+        tool_calls = history[-1].tool_calls if history[-1].type == "ai" else []
+        if len(tool_calls) != 1:
+            return None
+        content = planner.observation_content(observation)
+        content.append({"type": "text", "text": (
+            f"\n\nThis is the executor's latest view while '{subtask}' is still running. "
+            "Plan your next step assuming that subtask succeeds."
+        )})
+        message = HumanMessage(content)
+        messages = history + [
+            ToolMessage(f"Subtask '{subtask}' finished as expected.", tool_call_id=tool_calls[0]["id"]),
+            message,
+        ]
+        planned = PlannedStep(planner.task, tool_calls[0]["id"], subtask, observation, message, messages)
+        planned.future = self.worker.submit(contextvars.copy_context().run, self.plan, planner, planned)
+        return planned
+
+    def plan(self, planner, planned):
+        with span("lookahead"):
+            tokens = sum(estimate_message_size(message)[1] for message in planned.request)
+            with planner.llm_scheduler.slot(planner.provider, planner.llm_priority, tokens) as ticket:
+                start = time.perf_counter()
+                response = planner.llm.invoke(planned.request)
+                planned.latency = time.perf_counter() - start
+                ticket.tokens = (getattr(response, "usage_metadata", None) or {}).get("total_tokens", ticket.tokens)
+        return response
+
+    def accepted_message(self, planned):
+        """The planned observation message as it goes into the history, no longer saying the subtask is running."""
+        content = list(planned.message.content)
+        content[-1] = {"type": "text", "text": (
+            f"\n\nThis is the executor's view shortly before '{planned.subtask}' finished."
+        )}
+        return HumanMessage(content)
+
+    def take(self, planner):
+        """
+        Returns the PlannedStep (with its response) planned for the planner's current step,
+        or None if there is none, or the planner's history moved on since it was planned.
+        """
+        planned, self.ready = self.ready, None
+        if planned is None:
+            return None
+        last_message = planner.message_history[-1]
+        if planner.task != planned.task or getattr(last_message, "tool_call_id", None) != planned.tool_call_id:
+            planned.future.cancel()  # only stops it if it hasn't started yet
+            return None
+        try:
+            planned.response = planned.future.result()
+        except Exception as exc:
+            self.stats["failed"] += 1
+            print(f"[lookahead: planning failed, replanning: {exc}]")
+            return None
+        planned.message = self.accepted_message(planned)
+        self.stats["accepted"] += 1
+        print(f"[lookahead: using the step planned during '{planned.subtask}']")
+        return planned
+
+    def shutdown(self):
+        self.worker.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,105 @@
+"""
+Camera frames taken at several head yaw angles, stitched into one panoramic strip with a continuous angle grid.
+
+    stitcher = PanoramaStitcher(width=1280, camera_fov=120, center_angles=(-120, -40, 40, 120))
+    for angle in (-120, -40, 40, 120):
+        stitcher.add(frame_at(angle), angle)   # each view is warped right away
+    strip = stitcher.result()                  # angle grid from -160 to +160 drawn by basic_augmentation
+"""
+
+import functools
+import math
+import threading
+
+import cv2
+import numpy as np
+
+from robocrew.core.utils import basic_augmentation
+
+PANORAMA_FOV = 320
+PANORAMA_CACHE_SIZE = 8
+
+
+@functools.lru_cache(maxsize=PANORAMA_CACHE_SIZE)
+def panorama_maps(frame_width, frame_height, camera_fov, center_angles, width, panorama_fov):
+    """
+    Cylindrical warp of each view into a strip of `width` columns spanning `panorama_fov` degrees,
+    the column angle growing linearly like the angle grid. The strip keeps the rows seen in every column.
+    Returns the strip height and one (columns, map_x, map_y, weights) per view (None if it isn't in the strip),
+    weights blending overlapping views.
+    """
+    half_fov = math.radians(camera_fov) / 2
+    focal = frame_width / 2 / math.tan(half_fov)
+    pixels_per_radian = width / math.radians(panorama_fov)
+    full_height = round(frame_height * pixels_per_radian / focal)
+    angles = np.radians((np.arange(width) + 0.5) / width * panorama_fov - panorama_fov / 2)
+    heights = (np.arange(full_height) + 0.5 - full_height / 2) / pixels_per_radian
+
+    offsets = [angles - math.radians(center_angle) for center_angle in center_angles]
+    map_ys = [frame_height / 2 + focal * heights[:, None] / np.cos(offset)[None, :] - 0.5 for offset in offsets]
+    weights = np.array([
+        # views fade out towards their edges, so seams don't show
+        np.clip(1 - np.abs(offset) / half_fov, 0, None)[None, :] * ((map_y >= 0) & (map_y <= frame_height - 1))
+        for offset, map_y in zip(offsets, map_ys)
+    ])
+    totals = weights.sum(axis=0)
+    seen = np.flatnonzero((totals > 0).all(axis=1))
+    rows = slice(seen[0], seen[-1] + 1) if len(seen) else slice(0, full_height)
+    totals = totals[rows]
+    weights = np.divide(weights[:, rows], totals, out=np.zeros_like(weights[:, rows]), where=totals > 0)
+
+    views = []
+    for offset, map_y, view_weights in zip(offsets, map_ys, weights):
+        covered = np.flatnonzero(view_weights.any(axis=0))
+        if len(covered) == 0:
+            views.append(None)
+            continue
+        columns = slice(covered[0], covered[-1] + 1)
+        map_x = frame_width / 2 + focal * np.tan(offset[columns]) - 0.5
+        views.append((
+            columns,
+            np.ascontiguousarray(np.broadcast_to(map_x, view_weights[:, columns].shape), np.float32),
+            np.ascontiguousarray(map_y[rows, columns], np.float32),
+            view_weights[:, columns, None].astype(np.float32),
+        ))
+    return rows.stop - rows.start, views
+
+
+class PanoramaStitcher:
+    """
+    Accumulates views taken at `center_angles` (degrees, negative to the left) into a strip of `width` pixels
+    covering -panorama_fov/2..+panorama_fov/2. `add` may be called from a worker thread while the head moves
+    to the next angle. Warp maps are cached per frame size and settings.
+    """
+
+    def __init__(self, width: int = 1280, camera_fov: float = 120, center_angles=(-120, -40, 40, 120),
+                 panorama_fov: float = PANORAMA_FOV):
+        self.width = width
+        self.camera_fov = camera_fov
+        self.center_angles = tuple(center_angles)
+        self.panorama_fov = panorama_fov
+        self.strip = None
+        self.lock = threading.Lock()
+
+    def add(self, frame, center_angle):
+        frame_height, frame_width = frame.shape[:2]
+        height, views = panorama_maps(
+            frame_width, frame_height, self.camera_fov, self.center_angles, self.width, self.panorama_fov,
+        )
+        view = views[self.center_angles.index(center_angle)]
+        if view is None:
+            return
+        columns, map_x, map_y, weights = view
+        warped = cv2.remap(frame, map_x, map_y, cv2.INTER_LINEAR, borderMode=cv2.BORDER_CONSTANT)
+        with self.lock:
+            if self.strip is None:
+                self.strip = np.zeros((height, self.width, 3), np.float32)
+            self.strip[:, columns] += warped * weights
+
+    def result(self, navigation_mode="normal"):
+        """The stitched BGR strip with the angle grid; None if no view was added."""
+        with self.lock:
+            if self.strip is None:
+                return None
+            strip = np.clip(self.strip + 0.5, 0, 255).astype(np.uint8)
+        return basic_augmentation(strip, h_fov=self.panorama_fov, center_angle=0, navigation_mode=navigation_mode)
@@ -0,0 +1,86 @@
+"""Detect when the agent makes no progress, so the step can be escalated to a stronger model."""
+
+import json
+from collections import deque
+
+import cv2
+import numpy as np
+
+from robocrew.core.image_payload import ImagePayload, as_image_payload
+
+
+def frame_hash(image):
+    """64-bit difference hash of a camera image (ImagePayload or base64 JPEG), robust to noise and compression."""
+    if isinstance(image, ImagePayload) and image.has_frame:
+        gray = cv2.cvtColor(image.frame, cv2.COLOR_BGR2GRAY)
+    else:
+        data = np.frombuffer(as_image_payload(image).jpeg, np.uint8)
+        gray = cv2.imdecode(data, cv2.IMREAD_REDUCED_GRAYSCALE_8)
+    if gray is None:
+        return None
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int(np.packbits(bits).view(">u8")[0])
+
+
+def hamming_distance(hash_a, hash_b):
+    return bin(hash_a ^ hash_b).count("1")
+
+
+def tool_calls_signature(tool_calls):
+    return tuple((tool_call["name"], json.dumps(tool_call["args"], sort_keys=True)) for tool_call in tool_calls)
+
+
+class ProgressMonitor:
+    """
+    Tracks recent steps and reports lack of progress:
+    - the same tool calls (name and args) requested `repeat_limit` steps in a row,
+    - the robot moved during the last `window` steps, but camera frames stayed near-identical
+      (dHash distance <= `frame_hash_threshold`) and, if a lidar is used, the front distance
+      changed by less than `lidar_tolerance_cm`.
+    """
+
+    def __init__(self, repeat_limit=3, window=3, frame_hash_threshold=4, lidar_tolerance_cm=2.0):
+        self.repeat_limit = repeat_limit
+        self.window = window
+        self.frame_hash_threshold = frame_hash_threshold
+        self.lidar_tolerance_cm = lidar_tolerance_cm
+        self.reset()
+
+    def reset(self):
+        self.frame_hashes = deque(maxlen=self.window)
+        self.front_distances = deque(maxlen=self.window)
+        self.signatures = deque(maxlen=self.repeat_limit)
+        self.moves = deque(maxlen=self.window - 1)
+
+    def observe(self, observation):
+        """Adds the observation captured for the current step."""
+        camera_images = observation.get("camera_images")
+        self.frame_hashes.append(frame_hash(camera_images[0]) if camera_images else None)
+        lidar_scan = observation.get("lidar_scan")
+        self.front_distances.append(lidar_scan[1] if lidar_scan else None)
+
+    def record_step(self, tool_calls, moved):
+        """Adds the tool calls executed in the step and whether any of them moved the robot."""
+        self.signatures.append(tool_calls_signature(tool_calls))
+        self.moves.append(moved)
+
+    def stuck_reason(self):
+        """Returns why the agent seems stuck, or None."""
+        if (len(self.signatures) == self.repeat_limit and self.signatures[0]
+                and all(signature == self.signatures[0] for signature in self.signatures)):
+            return f"the same tool calls were repeated {self.repeat_limit} times"
+
+        if len(self.moves) < self.window - 1 or not all(self.moves) or len(self.frame_hashes) < self.window:
+            return None
+        hashes = list(self.frame_hashes)
+        if None in hashes:
+            return None
+        if any(hamming_distance(hashes[0], frame) > self.frame_hash_threshold for frame in hashes[1:]):
+            return None
+        distances = list(self.front_distances)
+        if None not in distances:
+            if max(distances) - min(distances) > self.lidar_tolerance_cm:
+                return None
+            return "the robot moved, but camera view and lidar distance did not change"
+        return "the robot moved, but camera view did not change"
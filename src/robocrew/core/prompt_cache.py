@@ -0,0 +1,121 @@
+"""
+Provider-side caching of the stable prompt prefix (tool schemas + system prompt).
+
+Only Anthropic gets explicit cache markers, and OpenAI a `prompt_cache_key`. Gemini is measured only:
+no cached content is created, the hits in CacheStats come from its implicit caching of repeated prefixes.
+"""
+
+from langchain_core.messages import SystemMessage
+from langchain_core.runnables import RunnableLambda
+
+# model name prefixes init_chat_model infers the provider from
+MODEL_NAME_PROVIDERS = (
+    (("gpt-", "o1", "o3", "o4", "chatgpt"), "openai"),
+    (("claude",), "anthropic"),
+    (("command",), "cohere"),
+    (("accounts/fireworks",), "fireworks"),
+    (("gemini",), "google_vertexai"),
+    (("amazon.",), "bedrock"),
+    (("mistral",), "mistralai"),
+    (("deepseek",), "deepseek"),
+    (("grok",), "xai"),
+    (("sonar",), "perplexity"),
+)
+# providers caching only up to explicitly marked blocks
+CACHE_MARKER_PROVIDERS = {"anthropic"}
+
+
+def model_provider(model):
+    """
+    Provider of a model (e.g. 'google_genai'): the prefix of a 'provider:model' string, else inferred
+    from the model name like init_chat_model does, or from the package of a chat model instance.
+    None if unknown.
+    """
+    if isinstance(model, str):
+        if ":" in model:
+            return model.split(":", 1)[0]
+        for prefixes, provider in MODEL_NAME_PROVIDERS:
+            if model.startswith(prefixes):
+                return provider
+        return None
+    if type(model).__name__ == "AzureChatOpenAI":
+        return "azure_openai"
+    package = type(model).__module__.split(".")[0]
+    if package.startswith("langchain_"):
+        return package[len("langchain_"):]
+    return None
+
+
+def cacheable_system_message(system_prompt, provider):
+    """
+    System message marked for caching where the provider needs explicit markers.
+    Anthropic caches everything up to the marked block, which includes tool schemas.
+    Gemini and OpenAI cache stable prefixes implicitly, so their message is left plain.
+    """
+    if provider in CACHE_MARKER_PROVIDERS:
+        return SystemMessage(content=[
+            {"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}},
+        ])
+    return SystemMessage(content=system_prompt)
+
+
+def with_cache_markers(llm, provider):
+    """
+    The bound model, sending a plain leading system message marked for caching the way `provider` needs,
+    so agents with models of different providers keep one plain system message in their history.
+    """
+    if provider not in CACHE_MARKER_PROVIDERS:
+        return llm
+
+    def mark_system_message(messages):
+        if messages and isinstance(messages[0], SystemMessage) and isinstance(messages[0].content, str):
+            return [cacheable_system_message(messages[0].content, provider), *messages[1:]]
+        return messages
+
+    return RunnableLambda(mark_system_message) | llm
+
+
+def cache_bind_kwargs(provider, cache_key):
+    """Extra request arguments improving cache hit rate."""
+    if provider == "openai":
+        # routes requests with the same prefix to the same cache
+        return {"prompt_cache_key": cache_key}
+    return {}
+
+
+class CacheStats:
+    """Accumulates prompt cache hits and cached tokens from response usage_metadata."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.input_tokens = 0
+        self.cached_tokens = 0
+        self.last_step = None
+
+    def record(self, usage_metadata):
+        usage_metadata = usage_metadata or {}
+        details = usage_metadata.get("input_token_details") or {}
+        step = {
+            "input_tokens": usage_metadata.get("input_tokens", 0) or 0,
+            "cached_tokens": details.get("cache_read", 0) or 0,
+            "cache_creation_tokens": details.get("cache_creation", 0) or 0,
+        }
+        step["hit"] = step["cached_tokens"] > 0
+        if step["hit"]:
+            self.hits += 1
+        else:
+            self.misses += 1
+        self.input_tokens += step["input_tokens"]
+        self.cached_tokens += step["cached_tokens"]
+        self.last_step = step
+        return step
+
+    def summary(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "input_tokens": self.input_tokens,
+            "cached_tokens": self.cached_tokens,
+            "cached_ratio": self.cached_tokens / self.input_tokens if self.input_tokens else 0.0,
+        }
@@ -0,0 +1,316 @@
+"""
+Record agent steps to a compact trace file and replay them offline, without robot, GPU or network.
+
+Recording:
+    agent = XLeRobotAgent(..., step_recorder=StepRecorder("run.jsonl.gz"))
+
+Replay (recorded LLM responses, camera frames, LiDAR scans and tool results):
+    stats = run_replay("run.jsonl.gz", history_len=10)
+"""
+
+import base64
+import gzip
+import io
+import itertools
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import redirect_stdout
+
+import cv2
+import numpy as np
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.tools import BaseTool
+from pydantic import PrivateAttr
+
+from robocrew.core.LLMAgent import LLMAgent
+from robocrew.core.history import estimate_message_size
+from robocrew.core.image_payload import ImagePayload, image_base64
+from robocrew.core.tracing import span
+from robocrew.core.utils import basic_augmentation
+
+
+class StepRecorder:
+    """Appends one JSON line per agent step to a gzip file."""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = gzip.open(path, "at", encoding="utf-8")
+        self.lock = threading.Lock()
+
+    def record(self, agent, observation, request, response, tool_calls, tool_results, timings):
+        step = {
+            "step": agent.step_count,
+            "agent": agent.name,
+            "task": agent.task,
+            "navigation_mode": agent.navigation_mode,
+            "observation": {
+                key: [image_base64(image) for image in value] if key == "camera_images" else value
+                for key, value in observation.items() if key != "captured_at"
+            },
+            "request": {
+                "messages": len(request),
+                "bytes": sum(estimate_message_size(message)[0] for message in request),
+            },
+            "response": message_to_dict(response),
+            "tool_results": [
+                {
+                    "id": tool_call["id"],
+                    "name": tool_call["name"],
+                    "content": tool_message.content,
+                    "additional": additional.content if additional is not None else None,
+                    "artifact": tool_message.artifact,
+                }
+                for tool_call, (tool_message, additional) in zip(tool_calls, tool_results)
+            ],
+            "timings": timings,
+        }
+        line = json.dumps(step)
+        with self.lock:
+            self.file.write(line + "\n")
+
+    def close(self):
+        with self.lock:
+            if not self.file.closed:
+                self.file.close()
+
+
+def load_trace(path):
+    """Returns the list of recorded steps."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def step_response(step):
+    return messages_from_dict([step["response"]])[0]
+
+
+class ReplayChatModel(BaseChatModel):
+    """Chat model answering with recorded responses in order. Sleeps recorded LLM time * latency_scale."""
+
+    responses: list
+    latencies: list
+    latency_scale: float = 0.0
+    _index: int = PrivateAttr(default=0)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    @classmethod
+    def from_steps(cls, steps, latency_scale=0.0):
+        return cls(
+            responses=[step_response(step) for step in steps],
+            latencies=[step["timings"]["llm"] for step in steps],
+            latency_scale=latency_scale,
+        )
+
+    @property
+    def _llm_type(self):
+        return "robocrew-replay"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _next_response(self):
+        with self._lock:
+            if self._index >= len(self.responses):
+                raise RuntimeError("Replay trace has no more recorded responses.")
+            index = self._index
+            self._index += 1
+        if self.latency_scale:
+            time.sleep(self.latencies[index] * self.latency_scale)
+        return self.responses[index]
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        return ChatResult(generations=[ChatGeneration(message=self._next_response())])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        response = self._next_response()
+        if response.content:
+            yield ChatGenerationChunk(message=AIMessageChunk(content=response.content))
+        for index, tool_call in enumerate(response.tool_calls):
+            yield ChatGenerationChunk(message=AIMessageChunk(content="", tool_call_chunks=[{
+                "index": index,
+                "name": tool_call["name"],
+                "args": json.dumps(tool_call["args"]),
+                "id": tool_call["id"],
+                "type": "tool_call_chunk",
+            }]))
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=response.usage_metadata))
+
+
+class ReplayTool(BaseTool):
+    """Stub of a recorded tool: returns its recorded results in order."""
+
+    description: str = "Replays recorded results."
+    results: deque
+    delay: float = 0.0
+
+    def _run(self, *args, **kwargs):
+        if self.delay:
+            time.sleep(self.delay)
+        if not self.results:
+            return ""
+        content, additional = self.results.popleft()
+        return (content, additional) if additional is not None else content
+
+
+def replay_tools(steps, latency_scale=0.0):
+    """Stub tools for every tool name in the trace."""
+    results = defaultdict(deque)
+    durations = defaultdict(list)
+    for step in steps:
+        tool_results = step["tool_results"]
+        for tool_result in tool_results:
+            results[tool_result["name"]].append((tool_result["content"], tool_result["additional"]))
+            durations[tool_result["name"]].append(step["timings"]["tools"] / len(tool_results))
+    return [
+        ReplayTool(name=name, results=results[name], delay=latency_scale * sum(durations[name]) / len(durations[name]))
+        for name in results
+    ]
+
+
+class ReplayCamera:
+    """
+    Serves recorded main camera frames in order (wrapping around). With augment=True frames go
+    through the same augmentation and JPEG encoding as RobotCamera, so their cost is measured too.
+    """
+
+    def __init__(self, steps, augment=True):
+        self.augment = augment
+        self.images = [base64.b64decode(step["observation"]["camera_images"][0]) for step in steps]
+        self.frames = [cv2.imdecode(np.frombuffer(image, np.uint8), cv2.IMREAD_COLOR) for image in self.images]
+        self.index = itertools.cycle(range(len(self.images)))
+        self.lock = threading.Lock()
+
+    def release(self):
+        pass
+
+    def reopen(self):
+        pass
+
+    def capture_payload(self, camera_fov=120, center_angle=0, navigation_mode="normal", budget=None, newer_than=None):
+        with span("capture"), self.lock:
+            index = next(self.index)
+        if not self.augment:
+            return ImagePayload(jpeg=self.images[index])
+        with span("augmentation"):
+            frame = basic_augmentation(self.frames[index].copy(), h_fov=camera_fov, center_angle=center_angle, navigation_mode=navigation_mode)
+        image = ImagePayload(frame=frame, budget=budget)
+        with span("encode"):
+            image.jpeg
+        return image
+
+    def capture_image(self, camera_fov=120, center_angle=0, navigation_mode="normal", budget=None, newer_than=None):
+        return self.capture_payload(camera_fov, center_angle, navigation_mode, budget, newer_than).jpeg
+
+
+class ReplayAgent(LLMAgent):
+    """LLMAgent running on a recorded trace instead of an LLM provider and robot hardware."""
+
+    def __init__(self, steps, latency_scale=0.0, augment=True, **kwargs):
+        """
+        steps: steps returned by load_trace.
+        latency_scale: fraction of recorded LLM and tool time to simulate (0 measures the loop alone).
+        augment: set to False to skip re-augmenting recorded camera frames.
+        Other keyword arguments (e.g. history_len, history_compactor) are passed to LLMAgent.
+        """
+        super().__init__(
+            model=ReplayChatModel.from_steps(steps, latency_scale),
+            tools=replay_tools(steps, latency_scale),
+            main_camera=ReplayCamera(steps, augment),
+            **kwargs,
+        )
+        lidar_scans = [step["observation"].get("lidar_scan") for step in steps]
+        lidar_scans = [tuple(scan) for scan in lidar_scans if scan]
+        if lidar_scans:
+            self.lidar = itertools.cycle(lidar_scans)
+
+    def fetch_lidar_scan(self):
+        with span("lidar_scan"):
+            lidar_scan = next(self.lidar)
+        self.latest_lidar_b64 = lidar_scan[0]
+        return lidar_scan
+
+
+def percentiles_ms(values):
+    values = sorted(values)
+    if not values:
+        return {}
+    return {
+        "mean": sum(values) / len(values) * 1000,
+        "p50": values[len(values) // 2] * 1000,
+        "p95": values[min(len(values) - 1, int(len(values) * 0.95))] * 1000,
+        "max": values[-1] * 1000,
+    }
+
+
+def run_replay(trace, latency_scale=0.0, augment=True, quiet=True, **agent_kwargs):
+    """
+    Replays a trace (path or list of steps) through ReplayAgent and returns throughput and latency stats.
+    loop_overhead_ms is step time not spent in simulated LLM or tool latency.
+    """
+    steps = load_trace(trace) if isinstance(trace, (str, os.PathLike)) else trace
+    agent = ReplayAgent(steps, latency_scale=latency_scale, augment=augment, **agent_kwargs)
+    step_times = []
+    output = io.StringIO() if quiet else None
+    start = time.perf_counter()
+    try:
+        for step in steps:
+            agent.task = step["task"]
+            agent.navigation_mode = step["navigation_mode"]
+            step_start = time.perf_counter()
+            if output is not None:
+                with redirect_stdout(output):
+                    agent.main_loop_content()
+                output.seek(0)
+                output.truncate()
+            else:
+                agent.main_loop_content()
+            step_times.append(time.perf_counter() - step_start)
+    finally:
+        agent.cleanup()
+    total = time.perf_counter() - start
+    simulated = latency_scale * sum(step["timings"]["llm"] + step["timings"]["tools"] for step in steps)
+    return {
+        "steps": len(steps),
+        "total_s": total,
+        "steps_per_s": len(steps) / total if total else 0.0,
+        "step_ms": percentiles_ms(step_times),
+        "loop_overhead_ms": (total - simulated) / len(steps) * 1000 if steps else 0.0,
+        "final_history_messages": len(agent.message_history),
+    }
+
+
+def make_synthetic_trace(nr_of_steps=30, width=1280, height=720, seed=0):
+    """Trace of a made-up run (noise frames, move/turn calls, finish_task at the end) for benchmarks without a recording."""
+    rng = np.random.default_rng(seed)
+    steps = []
+    for i in range(nr_of_steps):
+        frame = cv2.GaussianBlur(rng.integers(0, 256, (height, width, 3), dtype=np.uint8), (9, 9), 0)
+        image = base64.b64encode(cv2.imencode(".jpg", frame)[1]).decode("utf-8")
+        if i == nr_of_steps - 1:
+            tool_calls = [{"name": "finish_task", "args": {"report": "Reached the target."}, "id": f"call_{i}_0"}]
+        else:
+            tool_calls = [
+                {"name": "turn_left", "args": {"angle": 15}, "id": f"call_{i}_0"},
+                {"name": "move_forward", "args": {"distance_meters": 0.5}, "id": f"call_{i}_1"},
+            ]
+        response = AIMessage(content=f"Step {i}: heading to the target.", tool_calls=tool_calls)
+        steps.append({
+            "step": i + 1,
+            "agent": None,
+            "task": "Go to the kitchen.",
+            "navigation_mode": "normal",
+            "observation": {"camera_images": [image], "lidar_scan": None},
+            "request": {"messages": None, "bytes": None},
+            "response": message_to_dict(response),
+            "tool_results": [
+                {"id": call["id"], "name": call["name"], "content": f"{call['name']} done.", "additional": None}
+                for call in tool_calls
+            ],
+            "timings": {"observation": 0.05, "llm": 3.0, "tools": 1.0, "step": 4.05},
+        })
+    return steps
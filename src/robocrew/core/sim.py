@@ -0,0 +1,394 @@
+"""
+Simulated hardware for running the control stack without a robot.
+Backends are picked by giving a "sim:" port instead of a device path:
+
+    RobotCamera("sim:synthetic?width=640&height=480")      # generated scene
+    RobotCamera("sim:video:/data/run.mp4")                 # recorded video, looped
+    RobotCamera("sim:images:/data/frames")                 # directory of images, looped
+    ServoControler("sim:arm_right?latency=0.002", "sim:arm_left")
+    LLMAgent(..., lidar_usb_port="sim:scene")              # 2D room, ray-cast
+    LLMAgent(..., lidar_usb_port="sim:recording:/data/scans.jsonl")
+
+Port options (after "?") override the constructor defaults.
+"""
+
+import glob
+import itertools
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import parse_qsl
+
+import cv2
+import numpy as np
+
+
+SIM_PREFIX = "sim:"
+
+# lerobot OperatingMode values
+POSITION_MODE = 0
+VELOCITY_MODE = 1
+
+
+def is_sim_port(port):
+    return isinstance(port, str) and port.startswith(SIM_PREFIX)
+
+
+def parse_sim_port(port):
+    """'sim:video:/a.mp4?fps=15' -> ('video', '/a.mp4', {'fps': 15.0})"""
+    body, _, query = port[len(SIM_PREFIX):].partition("?")
+    kind, _, argument = body.partition(":")
+    options = {}
+    for key, value in parse_qsl(query):
+        try:
+            options[key] = float(value)
+        except ValueError:
+            options[key] = value
+    return kind, argument or None, options
+
+
+def open_video_capture(index_or_path):
+    """cv2.VideoCapture, SimVideoCapture for "sim:" sources, or BrokerVideoCapture for "broker:" ones."""
+    if is_sim_port(index_or_path):
+        return SimVideoCapture(index_or_path)
+    from robocrew.core.camera_broker import BrokerVideoCapture, is_broker_port
+    if is_broker_port(index_or_path):
+        return BrokerVideoCapture(index_or_path)
+    return cv2.VideoCapture(index_or_path)
+
+
+# ---------------------------------------------------------------------------
+# camera
+# ---------------------------------------------------------------------------
+
+class SimVideoCapture:
+    """
+    cv2.VideoCapture stand-in. Frames come from a generated scene ("sim:synthetic"),
+    a looped video file ("sim:video:<path>") or a looped image directory ("sim:images:<dir>").
+    read() is paced to `fps` like a real camera (fps=0 returns frames immediately).
+    """
+
+    def __init__(self, source="sim:synthetic", width=1280, height=720, fps=30):
+        self.default_size = (width, height)
+        self.default_fps = fps
+        self.source = None
+        self.opened = False
+        self.open(source)
+
+    def open(self, source=None):
+        self.release()
+        self.source = source or self.source
+        kind, argument, options = parse_sim_port(self.source)
+        self.kind = kind
+        self.width = int(options.get("width", self.default_size[0]))
+        self.height = int(options.get("height", self.default_size[1]))
+        self.fps = options.get("fps", self.default_fps)
+        self.frame_index = 0
+        self.last_frame_time = 0.0
+        self.frame = None
+        self.video = None
+        if kind == "synthetic":
+            self.background = synthetic_background(self.width, self.height)
+        elif kind == "video":
+            self.video = cv2.VideoCapture(argument)
+            if not self.video.isOpened():
+                raise FileNotFoundError(f"Cannot open simulated camera video: {argument}")
+        elif kind == "images":
+            paths = sorted(path for pattern in ("*.jpg", "*.jpeg", "*.png") for path in glob.glob(os.path.join(argument, pattern)))
+            if not paths:
+                raise FileNotFoundError(f"No images found for simulated camera in: {argument}")
+            self.images = [cv2.imread(path) for path in paths]
+        else:
+            raise ValueError(f"Unknown simulated camera source: {self.source}")
+        self.opened = True
+        return True
+
+    def isOpened(self):
+        return self.opened
+
+    def release(self):
+        if getattr(self, "video", None) is not None:
+            self.video.release()
+        self.opened = False
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            self.width = int(value)
+        elif prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            self.height = int(value)
+        elif prop == cv2.CAP_PROP_FPS:
+            self.fps = float(value)
+        else:
+            return False
+        if self.kind == "synthetic":
+            self.background = synthetic_background(self.width, self.height)
+        return True
+
+    def get(self, prop):
+        return {
+            cv2.CAP_PROP_FRAME_WIDTH: self.width,
+            cv2.CAP_PROP_FRAME_HEIGHT: self.height,
+            cv2.CAP_PROP_FPS: self.fps,
+            cv2.CAP_PROP_POS_FRAMES: self.frame_index,
+        }.get(prop, 0.0)
+
+    def grab(self):
+        if not self.opened:
+            return False
+        if self.fps:
+            wait = self.last_frame_time + 1.0 / self.fps - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+        self.last_frame_time = time.monotonic()
+        self.frame = self._next_frame()
+        self.frame_index += 1
+        return True
+
+    def retrieve(self):
+        if self.frame is None:
+            return False, None
+        return True, self.frame.copy()
+
+    def read(self):
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+    def _next_frame(self):
+        if self.kind == "synthetic":
+            return synthetic_frame(self.background, self.frame_index)
+        if self.kind == "video":
+            ok, frame = self.video.read()
+            if not ok:
+                self.video.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                ok, frame = self.video.read()
+        else:
+            frame = self.images[self.frame_index % len(self.images)]
+        if frame.shape[1] != self.width or frame.shape[0] != self.height:
+            frame = cv2.resize(frame, (self.width, self.height))
+        return frame
+
+
+def synthetic_background(width, height):
+    """Wall, floor and a few static objects."""
+    image = np.empty((height, width, 3), np.uint8)
+    horizon = height // 2
+    image[:horizon] = np.linspace(200, 150, horizon, dtype=np.uint8)[:, None, None]
+    image[horizon:] = np.linspace(90, 140, height - horizon, dtype=np.uint8)[:, None, None]
+    image[horizon:, :, 2] = np.clip(image[horizon:, :, 2].astype(int) + 40, 0, 255)
+    cv2.rectangle(image, (width // 10, horizon - height // 5), (width // 4, horizon + height // 10), (40, 90, 160), -1)
+    cv2.rectangle(image, (width * 2 // 3, horizon - height // 3), (width * 5 // 6, horizon + height // 6), (60, 60, 60), -1)
+    return image
+
+
+def synthetic_frame(background, frame_index):
+    """Background with a moving object and a frame counter, so consecutive frames differ."""
+    frame = background.copy()
+    height, width = frame.shape[:2]
+    x = int((math.sin(frame_index / 15) * 0.3 + 0.5) * width)
+    cv2.circle(frame, (x, height * 3 // 5), max(4, height // 12), (0, 140, 255), -1)
+    cv2.putText(frame, f"SIM {frame_index}", (10, height - 10), cv2.FONT_HERSHEY_SIMPLEX, max(0.4, height / 720), (255, 255, 255), 2)
+    return frame
+
+
+# ---------------------------------------------------------------------------
+# Feetech servo bus
+# ---------------------------------------------------------------------------
+
+class SimMotorsBus:
+    """
+    In-memory stand-in for lerobot's FeetechMotorsBus. Positions move towards Goal_Position at
+    `position_speed` units/s; in velocity mode Present_Position integrates Goal_Velocity.
+    Every bus transaction (read, write, sync read/write) takes `latency` seconds and transactions
+    are serialized like on a real serial bus.
+    """
+
+    def __init__(self, port="sim:bus", motors=None, calibration=None, latency=0.0, position_speed=300.0):
+        _, _, options = parse_sim_port(port)
+        self.port = port
+        self.motors = dict(motors or {})
+        self.calibration = calibration
+        self.latency = options.get("latency", latency)
+        self.position_speed = options.get("position_speed", position_speed)
+        self.is_connected = False
+        self.transactions = 0
+        self.lock = threading.Lock()
+        now = time.monotonic()
+        self.state = {
+            motor: {
+                "Operating_Mode": POSITION_MODE,
+                "Torque_Enable": 0,
+                "Goal_Position": 0.0,
+                "Present_Position": 0.0,
+                "Goal_Velocity": 0.0,
+                "Present_Velocity": 0.0,
+                "Moving": 0,
+                "updated": now,
+            }
+            for motor in self.motors
+        }
+
+    def connect(self, handshake=True):
+        self.is_connected = True
+
+    def disconnect(self, disable_torque=True):
+        if disable_torque:
+            self.disable_torque()
+        self.is_connected = False
+
+    def enable_torque(self, motors=None, num_retry=0):
+        self.sync_write("Torque_Enable", {motor: 1 for motor in self._motors(motors)})
+
+    def disable_torque(self, motors=None, num_retry=0):
+        self.sync_write("Torque_Enable", {motor: 0 for motor in self._motors(motors)})
+
+    def write(self, data_name, motor, value, normalize=True, num_retry=0):
+        self.sync_write(data_name, {motor: value})
+
+    def sync_write(self, data_name, values, normalize=True, num_retry=0):
+        with self._transaction() as now:
+            for motor, value in values.items():
+                state = self._advance(motor, now)
+                state[data_name] = value.value if hasattr(value, "value") else value
+
+    def read(self, data_name, motor, normalize=True, num_retry=0):
+        return self.sync_read(data_name, [motor])[motor]
+
+    def sync_read(self, data_name, motors=None, normalize=True, num_retry=0):
+        with self._transaction() as now:
+            return {motor: self._advance(motor, now)[data_name] for motor in self._motors(motors)}
+
+    def _motors(self, motors):
+        if motors is None:
+            return list(self.motors)
+        if isinstance(motors, (str, int)):
+            return [motors]
+        return list(motors)
+
+    @contextmanager
+    def _transaction(self):
+        with self.lock:
+            if self.latency:
+                time.sleep(self.latency)
+            self.transactions += 1
+            yield time.monotonic()
+
+    def _advance(self, motor, now):
+        state = self.state[motor]
+        dt = now - state["updated"]
+        state["updated"] = now
+        if not state["Torque_Enable"]:
+            state["Present_Velocity"] = 0.0
+            state["Moving"] = 0
+            return state
+        if state["Operating_Mode"] == VELOCITY_MODE:
+            state["Present_Velocity"] = float(state["Goal_Velocity"])
+            state["Present_Position"] += state["Present_Velocity"] * dt
+            state["Moving"] = int(state["Present_Velocity"] != 0)
+            return state
+        error = float(state["Goal_Position"]) - state["Present_Position"]
+        step = self.position_speed * dt
+        if abs(error) <= step:
+            state["Present_Position"] = float(state["Goal_Position"])
+            state["Present_Velocity"] = 0.0
+            state["Moving"] = 0
+        else:
+            direction = 1 if error > 0 else -1
+            state["Present_Position"] += direction * step
+            state["Present_Velocity"] = direction * self.position_speed
+            state["Moving"] = 1
+        return state
+
+
+# ---------------------------------------------------------------------------
+# lidar
+# ---------------------------------------------------------------------------
+
+def box_segments(x_min, y_min, x_max, y_max):
+    corners = [(x_min, y_min), (x_max, y_min), (x_max, y_max), (x_min, y_max)]
+    return [(corners[i], corners[(i + 1) % 4]) for i in range(4)]
+
+
+# 5 x 4 m room around the robot (robot at the origin facing +y) with a table and a box, meters
+DEFAULT_SCENE = (
+    box_segments(-2.0, -1.5, 3.0, 2.5)
+    + box_segments(0.6, 1.0, 1.4, 1.6)
+    + box_segments(-1.4, -0.8, -0.9, -0.3)
+)
+
+
+class SimLidar:
+    """
+    RPLidar stand-in. "sim:scene" ray-casts a 2D scene of wall segments (meters) from `pose`
+    (x, y, heading in degrees clockwise from +y); "sim:recording:<path>" replays JSON lines,
+    each holding one rotation as [quality, angle_deg, distance_mm] triples.
+    Each rotation takes `rotation_time` seconds (RPLidar A1 spins at ~5.5 Hz).
+    """
+
+    def __init__(self, port="sim:scene", scene=DEFAULT_SCENE, pose=(0.0, 0.0, 0.0),
+                 rotation_time=0.18, points_per_rotation=360, noise_mm=5.0, max_range_m=12.0, seed=0):
+        kind, argument, options = parse_sim_port(port)
+        self.rotation_time = options.get("rotation_time", rotation_time)
+        self.points_per_rotation = int(options.get("points_per_rotation", points_per_rotation))
+        self.noise_mm = options.get("noise_mm", noise_mm)
+        self.max_range_m = max_range_m
+        self.segments = np.array(scene, dtype=float)
+        self.pose = pose
+        self.rng = np.random.default_rng(seed)
+        if kind == "scene":
+            self.recording = None
+        elif kind == "recording":
+            with open(argument, encoding="utf-8") as f:
+                rotations = [[tuple(point) for point in json.loads(line)] for line in f if line.strip()]
+            if not rotations:
+                raise ValueError(f"No scans in simulated lidar recording: {argument}")
+            self.recording = itertools.cycle(rotations)
+        else:
+            raise ValueError(f"Unknown simulated lidar source: {port}")
+
+    def iter_scans(self, max_buf_meas=3000, min_len=5):
+        while True:
+            start = time.monotonic()
+            scan = next(self.recording) if self.recording is not None else self.scan_scene()
+            wait = start + self.rotation_time - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            yield scan
+
+    def scan_scene(self):
+        """One rotation ray-cast against the scene; misses are reported as distance 0 like RPLidar."""
+        angles_deg = np.linspace(0, 360, self.points_per_rotation, endpoint=False)
+        x, y, heading = self.pose
+        theta = np.radians(angles_deg + heading)
+        directions = np.stack([np.sin(theta), np.cos(theta)], axis=1)  # clockwise from +y
+        starts = self.segments[:, 0]
+        edges = self.segments[:, 1] - starts
+        offsets = starts - np.array([x, y])
+        denominator = directions[:, None, 0] * edges[None, :, 1] - directions[:, None, 1] * edges[None, :, 0]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = (offsets[None, :, 0] * edges[None, :, 1] - offsets[None, :, 1] * edges[None, :, 0]) / denominator
+            u = (offsets[None, :, 0] * directions[:, None, 1] - offsets[None, :, 1] * directions[:, None, 0]) / denominator
+        hits = (denominator != 0) & (t > 0) & (u >= 0) & (u <= 1)
+        distances = np.where(hits, t, np.inf).min(axis=1) * 1000
+        if self.noise_mm:
+            distances = distances + self.rng.normal(0, self.noise_mm, distances.shape)
+        distances = np.where(distances <= self.max_range_m * 1000, distances, 0.0)
+        return [(15, float(angle), float(distance)) for angle, distance in zip(angles_deg, distances)]
+
+    def stop(self):
+        pass
+
+    def stop_motor(self):
+        pass
+
+    def start_motor(self):
+        pass
+
+    def clear_input(self):
+        pass
+
+    def disconnect(self):
+        pass
@@ -0,0 +1,54 @@
+"""Assemble streamed LLM responses and hand out tool calls as soon as they are fully formed."""
+
+import json
+from langchain_core.messages import message_chunk_to_message
+
+
+class ToolCallStream:
+    """
+    Collects AIMessageChunks from llm.stream(). `add` returns tool calls which became complete
+    with the new chunk, in the order the model emitted them. A call is complete when its
+    arguments parse as a JSON object, or (for calls without arguments) when a next call
+    starts or the stream ends.
+    """
+
+    def __init__(self):
+        self.response_chunk = None
+        self.emitted = []
+
+    def add(self, chunk):
+        self.response_chunk = chunk if self.response_chunk is None else self.response_chunk + chunk
+        tool_call_chunks = self.response_chunk.tool_call_chunks
+        new_calls = []
+        for position in range(len(self.emitted), len(tool_call_chunks)):
+            tool_call = self._complete_call(tool_call_chunks[position], is_last=position == len(tool_call_chunks) - 1)
+            if tool_call is None:
+                break  # keep model's order, later calls wait for this one
+            self.emitted.append(tool_call)
+            new_calls.append(tool_call)
+        return new_calls
+
+    def finish(self):
+        """Returns the full response message and tool calls not returned by `add` yet."""
+        if self.response_chunk is None:
+            raise RuntimeError("LLM stream returned no chunks.")
+        response = message_chunk_to_message(self.response_chunk)
+        remaining = [tool_call for tool_call in response.tool_calls if tool_call not in self.emitted]
+        return response, remaining
+
+    def _complete_call(self, tool_call_chunk, is_last):
+        if not tool_call_chunk.get("name"):
+            return None
+        raw_args = tool_call_chunk.get("args") or ""
+        if not raw_args.strip():
+            if is_last:
+                return None  # arguments may still be coming
+            args = {}
+        else:
+            try:
+                args = json.loads(raw_args)
+            except json.JSONDecodeError:
+                return None
+            if not isinstance(args, dict):
+                return None
+        return {"name": tool_call_chunk["name"], "args": args, "id": tool_call_chunk.get("id"), "type": "tool_call"}
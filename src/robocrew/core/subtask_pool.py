@@ -0,0 +1,119 @@
+"""
+Run planner subtasks on several executors at once (e.g. two XLeRobots, or a Tello and a rover).
+
+    pool = SubtaskPool({"left_robot": left_executor, "right_robot": right_executor})
+    planner = LLMAgent(..., tools=[*create_subtask_pool_tools(pool), finish_task])
+"""
+
+import contextvars
+import itertools
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+class SubtaskJob:
+    def __init__(self, job_id, executor_name, subtask):
+        self.id = job_id
+        self.executor_name = executor_name
+        self.subtask = subtask
+        self.future = None
+        self.cancelled = False
+        self.reported = False
+
+    def status(self):
+        if self.cancelled:
+            return "cancelled"
+        if not self.future.done():
+            return "running"
+        return "failed" if self.future.exception() is not None else "finished"
+
+    def describe(self):
+        status = self.status()
+        text = f"{self.id} ({self.executor_name}: '{self.subtask}'): {status}"
+        if status == "finished":
+            text += f" - {self.future.result()}"
+        elif status == "failed":
+            text += f" - {self.future.exception()}"
+        return text
+
+
+class SubtaskPool:
+    """
+    Named executor agents, each running its subtasks one after another in its own worker thread.
+    Subtasks given to different executors run in parallel; `submit` returns a job id immediately.
+    """
+
+    def __init__(self, executors):
+        if not isinstance(executors, dict):
+            executors = {executor.name or f"executor_{i}": executor for i, executor in enumerate(executors)}
+        self.executors = executors
+        self.workers = {name: ThreadPoolExecutor(max_workers=1, thread_name_prefix=name) for name in executors}
+        self.jobs = {}
+        self.job_numbers = itertools.count(1)
+        self.lock = threading.Lock()
+
+    def pending_jobs(self, executor_name):
+        return sum(1 for job in self.jobs.values() if job.executor_name == executor_name and not job.future.done())
+
+    def submit(self, subtask, executor_name=None):
+        """Queues the subtask on the given executor, or on the least busy one. Returns the job id."""
+        with self.lock:
+            if executor_name is None:
+                executor_name = min(self.executors, key=self.pending_jobs)
+            elif executor_name not in self.executors:
+                raise ValueError(f"Unknown executor '{executor_name}'. Available: {', '.join(self.executors)}")
+            job = SubtaskJob(f"job_{next(self.job_numbers)}", executor_name, subtask)
+            job.future = self.workers[executor_name].submit(contextvars.copy_context().run, self._run, job)
+            self.jobs[job.id] = job
+        return job.id
+
+    def _run(self, job):
+        executor = self.executors[job.executor_name]
+        if job.cancelled:
+            return None
+        executor.task = job.subtask
+        result = None
+        while executor.task:
+            result = executor.main_loop_content()
+        return result
+
+    def cancel(self, job_id):
+        """Cancels a queued job, or stops a running one after the executor's current step."""
+        job = self.jobs[job_id]
+        if job.future.done():
+            return
+        job.cancelled = True
+        if not job.future.cancel():
+            self.executors[job.executor_name].cancel_task()
+
+    def _select(self, job_ids):
+        if job_ids:
+            unknown = [job_id for job_id in job_ids if job_id not in self.jobs]
+            if unknown:
+                raise ValueError(f"Unknown job ids: {', '.join(unknown)}")
+            return [self.jobs[job_id] for job_id in job_ids]
+        return [job for job in self.jobs.values() if not job.reported]
+
+    def wait_any(self, job_ids=None, timeout=None):
+        """Blocks until at least one of the jobs (default: all not yet reported) is done. Returns the done jobs."""
+        jobs = self._select(job_ids)
+        wait([job.future for job in jobs], timeout=timeout, return_when=FIRST_COMPLETED)
+        return self._collect(jobs)
+
+    def wait_all(self, job_ids=None, timeout=None):
+        """Blocks until all of the jobs (default: all not yet reported) are done. Returns the done jobs."""
+        jobs = self._select(job_ids)
+        wait([job.future for job in jobs], timeout=timeout)
+        return self._collect(jobs)
+
+    def _collect(self, jobs):
+        done = [job for job in jobs if job.future.done()]
+        for job in done:
+            job.reported = True
+        return done
+
+    def shutdown(self):
+        for job_id in list(self.jobs):
+            self.cancel(job_id)
+        for worker in self.workers.values():
+            worker.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,95 @@
+"""Blocking task queue shared by the agent loop and task sources (voice, UI, MCP, planner)."""
+
+import asyncio
+import threading
+from collections import deque
+
+
+class TaskQueue:
+    """
+    Thread-safe FIFO of tasks. Waiting agents block on a condition instead of polling,
+    so a new task or a cancellation wakes them immediately.
+    Keeps the `put` / `get` / `empty` / `qsize` interface of queue.Queue, so it can be passed
+    to SoundReceiver as a task queue.
+    """
+
+    def __init__(self):
+        self._tasks = deque()
+        self._condition = threading.Condition()
+        self._wakers = set()
+        self._generation = 0  # bumped on every cancel, wakes up blocked `get` calls
+
+    def _notify(self):
+        self._condition.notify_all()
+        for waker in list(self._wakers):
+            waker()
+
+    def put(self, task):
+        with self._condition:
+            self._tasks.append(task)
+            self._notify()
+
+    def cancel(self):
+        """Drops pending tasks and wakes every waiting `get` / `aget`, which then return None."""
+        with self._condition:
+            self._tasks.clear()
+            self._generation += 1
+            self._notify()
+
+    def get_nowait(self):
+        """Returns the next task, or None when the queue is empty."""
+        with self._condition:
+            return self._tasks.popleft() if self._tasks else None
+
+    def notify(self):
+        """Wakes waiting `get` / `aget` calls, so they re-check their `wake_when` condition."""
+        with self._condition:
+            self._notify()
+
+    def get(self, timeout=None, wake_when=None):
+        """
+        Blocks until a task arrives and returns it. Returns None on cancel or timeout,
+        or once `wake_when()` is true (checked when woken by `notify`).
+        """
+        wake_when = wake_when or (lambda: False)
+        with self._condition:
+            generation = self._generation
+            self._condition.wait_for(
+                lambda: self._tasks or self._generation != generation or wake_when(), timeout,
+            )
+            if self._generation != generation or wake_when() or not self._tasks:
+                return None
+            return self._tasks.popleft()
+
+    async def aget(self, wake_when=None):
+        """Awaits the next task without blocking the event loop. Returns None on cancel or once `wake_when()` is true."""
+        wake_when = wake_when or (lambda: False)
+        loop = asyncio.get_running_loop()
+        woken = asyncio.Event()
+
+        def waker():
+            loop.call_soon_threadsafe(woken.set)
+
+        with self._condition:
+            generation = self._generation
+            self._wakers.add(waker)
+        try:
+            while True:
+                with self._condition:
+                    if self._generation != generation or wake_when():
+                        return None
+                    if self._tasks:
+                        return self._tasks.popleft()
+                    woken.clear()
+                await woken.wait()
+        finally:
+            with self._condition:
+                self._wakers.discard(waker)
+
+    def empty(self):
+        with self._condition:
+            return not self._tasks
+
+    def qsize(self):
+        with self._condition:
+            return len(self._tasks)
@@ -0,0 +1,95 @@
+"""Run agent tool calls concurrently when they don't need the same robot hardware."""
+
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+# robot resources a tool can declare
+WHEELS = "wheels"
+HEAD = "head"
+LEFT_ARM = "left_arm"
+RIGHT_ARM = "right_arm"
+MAIN_CAMERA = "main_camera"
+SPEAKER = "speaker"
+MEMORY_DB = "memory_db"
+SUBTASK_POOL = "subtask_pool"
+
+# resources which change what the robot sees after the tool is done
+MOTION_RESOURCES = frozenset({WHEELS, HEAD, LEFT_ARM, RIGHT_ARM})
+
+
+def uses_resources(*resources):
+    """
+    Decorator declaring which robot resources a langchain tool needs. Place it above @tool.
+    Tools declared with no resources run alongside anything; tools without a declaration
+    are treated as exclusive and never run together with other tools.
+    """
+    def decorator(tool):
+        tool.metadata = {**(tool.metadata or {}), "resources": frozenset(resources)}
+        return tool
+    return decorator
+
+
+def get_tool_resources(tool):
+    """Returns the resources declared by uses_resources, or None if the tool declared nothing."""
+    metadata = getattr(tool, "metadata", None)
+    if not isinstance(metadata, dict):
+        return None
+    return metadata.get("resources")
+
+
+def resources_conflict(resources_a, resources_b):
+    if resources_a is None or resources_b is None:
+        return True
+    return bool(resources_a & resources_b)
+
+
+class ToolExecutor:
+    """
+    Executes tool calls on a thread pool. A call waits only for earlier calls that share a resource
+    with it, so independent calls (e.g. `say` + `move_forward`) run at the same time.
+    """
+
+    def __init__(self, invoke_tool, get_resources, max_workers=4):
+        """
+        invoke_tool: function executing a single tool call.
+        get_resources: function returning resources of a tool call (None means exclusive).
+        max_workers: number of tool calls allowed to run at once.
+        """
+        self.invoke_tool = invoke_tool
+        self.get_resources = get_resources
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="robocrew-tool")
+        self.pending = []
+
+    def submit(self, tool_call):
+        """Schedules a tool call after all earlier conflicting calls and returns its future."""
+        resources = self.get_resources(tool_call)
+        dependencies = [future for other, future in self.pending if resources_conflict(resources, other)]
+        # earlier calls are always queued first, so waiting on them can't exhaust the pool
+        # copied context keeps the caller's trace step on the worker thread
+        future = self.pool.submit(contextvars.copy_context().run, self._run_after, dependencies, tool_call)
+        self.pending.append((resources, future))
+        return future
+
+    def collect(self):
+        """Waits for all submitted calls and returns their results in submission order."""
+        pending, self.pending = self.pending, []
+        return [future.result() for _, future in pending]
+
+    def discard(self):
+        """Waits for submitted calls and drops their results (e.g. when the LLM stream broke)."""
+        pending, self.pending = self.pending, []
+        for _, future in pending:
+            future.exception()
+
+    def run(self, tool_calls):
+        for tool_call in tool_calls:
+            self.submit(tool_call)
+        return self.collect()
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    def _run_after(self, dependencies, tool_call):
+        for future in dependencies:
+            future.exception()  # wait for completion, failures are reported by collect()
+        return self.invoke_tool(tool_call)
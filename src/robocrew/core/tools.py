@@ -2,8 +2,10 @@ from langchain_core.tools import tool
 from robocrew.core.memory import Memory
 from robocrew.core.utils import stop_listening_during_tool_execution
 from robocrew.core.voice_synth import speak_and_play
+from robocrew.core.tool_executor import uses_resources, SPEAKER, MEMORY_DB, SUBTASK_POOL
 
 
+@uses_resources()  # needs no hardware
 @tool
 def finish_task(report: str = "Task finished"):
     """Signal that the current task is complete or cannot be completed.
@@ -17,6 +19,7 @@ def finish_task(report: str = "Task finished"):
 
 robot_memory = Memory()
 
+@uses_resources(MEMORY_DB)
 @tool
 def remember_thing(text: str):
     """
@@ -25,6 +28,7 @@ def remember_thing(text: str):
     """
     return robot_memory.add_memory(text)
 
+@uses_resources(MEMORY_DB)
 @tool
 def recall_thing(query: str):
     """
@@ -41,6 +45,7 @@ def create_say(sound_receiver=None):
         sound_receiver: Optional SoundReceiver instance. If provided, listening will be
                        paused during speech to avoid the robot hearing itself.
     """
+    @uses_resources(SPEAKER)
     @tool
     @stop_listening_during_tool_execution(sound_receiver)
     def say(query: str):
@@ -54,11 +59,13 @@ def create_say(sound_receiver=None):
     return say
 
 
-def create_execute_subtask(executor):
+def create_execute_subtask(executor, lookahead=None):
     """
     Factory function to create the 'execute_subtask' tool for the Planner agent.
     Takes a controller LLMAgent instance and returns a tool that delegates
     subtasks to it, blocking until the controller finishes.
+    With a robocrew.core.lookahead.SubtaskLookahead (also given to the planner),
+    the planner plans its next step while the controller works.
     """
     @tool
     def execute_subtask(reasoning: str, subtask: str) -> str:
@@ -68,9 +75,97 @@ def create_execute_subtask(executor):
         reasoning: Think step by step about what you see and why you chose this subtask.
         The executor handles low-level navigation and manipulation.
         Blocks until the controller finishes. Returns a completion report."""
+        if lookahead is not None:
+            return lookahead.run_subtask(executor, subtask)
         executor.task = subtask
         result = None
         while executor.task:
             result = executor.main_loop_content()
         return result
     return execute_subtask
+
+
+def create_async_execute_subtask(executor):
+    """
+    Async version of create_execute_subtask for an AsyncLLMAgent planner and controller.
+    While the controller works, the event loop stays free for other agents.
+    """
+    @tool
+    async def execute_subtask(reasoning: str, subtask: str) -> str:
+        """Delegate a concrete subtask to the robot controller.
+        Write the 'reasoning' parameter first, before writing 'subtask'!
+
+        reasoning: Think step by step about what you see and why you chose this subtask.
+        The executor handles low-level navigation and manipulation.
+        Blocks until the controller finishes. Returns a completion report."""
+        executor.task = subtask
+        result = None
+        while executor.task:
+            result = await executor.amain_loop_content()
+        return result
+    return execute_subtask
+
+
+def create_subtask_pool_tools(pool):
+    """
+    Factory function creating planner tools which run subtasks on a robocrew.core.subtask_pool.SubtaskPool.
+    Unlike execute_subtask, starting a subtask doesn't block, so independent subtasks on different
+    robots run in parallel. Returns [start_subtask, wait_any, wait_all, cancel_subtask].
+    """
+    executors = ", ".join(pool.executors)
+
+    def describe(jobs, timeout):
+        if not jobs:
+            return f"No subtask finished within {timeout} s." if timeout else "No subtasks to wait for."
+        return "\n".join(job.describe() for job in jobs)
+
+    @uses_resources(SUBTASK_POOL)  # executors own the hardware; pool tools run in call order
+    @tool
+    def start_subtask(reasoning: str, subtask: str, executor: str = "") -> str:
+        """Start a concrete subtask on one of the robot executors without waiting for it.
+        Write the 'reasoning' parameter first, before writing 'subtask'!
+
+        reasoning: Think step by step about what you see and why you chose this subtask.
+        executor: name of the executor to use, empty to pick the least busy one.
+        Subtasks on different executors run in parallel. Returns the job id,
+        use wait_any or wait_all to get the completion reports."""
+        try:
+            job_id = pool.submit(subtask, executor or None)
+        except ValueError as exc:
+            return str(exc)
+        return f"Started {job_id} on {pool.jobs[job_id].executor_name}."
+
+    start_subtask.description += f"\nAvailable executors: {executors}."
+
+    @uses_resources(SUBTASK_POOL)
+    @tool
+    def wait_any(job_ids: list[str] | None = None, timeout_s: float = 0) -> str:
+        """Wait until at least one subtask finishes and return the reports of finished subtasks.
+        job_ids: jobs to wait for, empty for all started subtasks not reported yet.
+        timeout_s: maximum wait in seconds, 0 to wait without limit."""
+        try:
+            return describe(pool.wait_any(job_ids or None, timeout_s or None), timeout_s)
+        except ValueError as exc:
+            return str(exc)
+
+    @uses_resources(SUBTASK_POOL)
+    @tool
+    def wait_all(job_ids: list[str] | None = None, timeout_s: float = 0) -> str:
+        """Wait until all subtasks finish and return their reports.
+        job_ids: jobs to wait for, empty for all started subtasks not reported yet.
+        timeout_s: maximum wait in seconds, 0 to wait without limit."""
+        try:
+            return describe(pool.wait_all(job_ids or None, timeout_s or None), timeout_s)
+        except ValueError as exc:
+            return str(exc)
+
+    @uses_resources(SUBTASK_POOL)
+    @tool
+    def cancel_subtask(job_id: str) -> str:
+        """Stop a started subtask. A running subtask stops after the executor's current step."""
+        if job_id not in pool.jobs:
+            return f"Unknown job id: {job_id}"
+        pool.cancel(job_id)
+        return f"Cancelled {job_id}."
+
+    return [start_subtask, wait_any, wait_all, cancel_subtask]
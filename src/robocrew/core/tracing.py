@@ -0,0 +1,231 @@
+"""
+Per-step latency tracing. Code wraps timed sections in `span("name")`; finished spans are
+passed to the sinks added to the tracer. Without sinks `span()` returns a shared no-op object,
+so instrumentation costs one attribute check.
+
+    from robocrew.core import tracing
+    tracing.enable(tracing.JsonlSink("trace.jsonl"), tracing.RingBufferSink())
+"""
+
+import contextvars
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+_current_step = contextvars.ContextVar("robocrew_trace_step", default=(None, None))
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def set(self, **attributes):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    def __init__(self, tracer, name, attributes):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        duration = time.perf_counter() - self.start
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+        self.tracer.emit(self.name, duration, self.attributes)
+        return False
+
+    def set(self, **attributes):
+        """Adds attributes known only inside the span (e.g. image size)."""
+        self.attributes.update(attributes)
+
+
+class Tracer:
+    def __init__(self):
+        self.sinks = []
+
+    def span(self, name, **attributes):
+        if not self.sinks:
+            return _NULL_SPAN
+        return Span(self, name, attributes)
+
+    def record(self, name, duration, **attributes):
+        """Records a duration measured elsewhere (e.g. time to first streamed token)."""
+        if self.sinks:
+            self.emit(name, duration, attributes)
+
+    def emit(self, name, duration, attributes):
+        agent, step = _current_step.get()
+        record = {
+            "name": name,
+            "agent": agent,
+            "step": step,
+            "time": time.time(),
+            "duration_ms": duration * 1000,
+            **attributes,
+        }
+        for sink in self.sinks:
+            sink.write(record)
+
+
+tracer = Tracer()
+
+
+def span(name, **attributes):
+    return tracer.span(name, **attributes)
+
+
+def record(name, duration, **attributes):
+    tracer.record(name, duration, **attributes)
+
+
+def enable(*sinks):
+    tracer.sinks.extend(sinks)
+
+
+def disable():
+    tracer.sinks.clear()
+
+
+def begin_step(agent, step):
+    """Tags spans of the current thread / asyncio task with the agent name and step number."""
+    _current_step.set((agent, step))
+
+
+class JsonlSink:
+    """Appends every span as one JSON line."""
+
+    def __init__(self, path):
+        self.file = open(path, "a", encoding="utf-8")
+        self.lock = threading.Lock()
+
+    def write(self, record):
+        line = json.dumps(record, default=str)
+        with self.lock:
+            self.file.write(line + "\n")
+            self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class RingBufferSink:
+    """Keeps the newest spans in memory, e.g. for showing step timings in the UI."""
+
+    def __init__(self, maxlen=2000):
+        self.records = deque(maxlen=maxlen)
+
+    def write(self, record):
+        self.records.append(record)
+
+    def spans(self, agent=None):
+        return [record for record in list(self.records) if agent is None or record["agent"] == agent]
+
+    def last_step(self, agent=None):
+        """Spans of the newest recorded step."""
+        records = self.spans(agent)
+        if not records:
+            return []
+        agent, step = records[-1]["agent"], records[-1]["step"]
+        return [record for record in records if record["agent"] == agent and record["step"] == step]
+
+    def summary(self, agent=None):
+        """Per span name: count, mean, p50, p95 and max duration in ms."""
+        durations = defaultdict(list)
+        for record in self.spans(agent):
+            durations[record["name"]].append(record["duration_ms"])
+        summary = {}
+        for name, values in durations.items():
+            values.sort()
+            summary[name] = {
+                "count": len(values),
+                "mean_ms": sum(values) / len(values),
+                "p50_ms": values[len(values) // 2],
+                "p95_ms": values[min(len(values) - 1, int(len(values) * 0.95))],
+                "max_ms": values[-1],
+            }
+        return summary
+
+
+class PrometheusSink:
+    """Aggregates spans into a Prometheus histogram, rendered by `render()` or served by `serve()`."""
+
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+    def __init__(self, metric_name="robocrew_span_seconds"):
+        self.metric_name = metric_name
+        self.lock = threading.Lock()
+        self.histograms = {}  # (agent, span name) -> [bucket counts, count, sum]
+        self.server = None
+
+    def write(self, record):
+        key = (record["agent"] or "", record["name"])
+        seconds = record["duration_ms"] / 1000
+        with self.lock:
+            buckets, count, total = self.histograms.get(key) or ([0] * len(self.BUCKETS), 0, 0.0)
+            for i, bound in enumerate(self.BUCKETS):
+                if seconds <= bound:
+                    buckets[i] += 1
+            self.histograms[key] = [buckets, count + 1, total + seconds]
+
+    def render(self):
+        lines = [
+            f"# HELP {self.metric_name} Duration of RoboCrew agent step phases.",
+            f"# TYPE {self.metric_name} histogram",
+        ]
+        with self.lock:
+            histograms = {key: (list(buckets), count, total) for key, (buckets, count, total) in self.histograms.items()}
+        for (agent, name), (buckets, count, total) in sorted(histograms.items()):
+            labels = f'agent="{_escape(agent)}",span="{_escape(name)}"'
+            for bound, bucket_count in zip(self.BUCKETS, buckets):
+                lines.append(f'{self.metric_name}_bucket{{{labels},le="{bound}"}} {bucket_count}')
+            lines.append(f'{self.metric_name}_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"{self.metric_name}_count{{{labels}}} {count}")
+            lines.append(f"{self.metric_name}_sum{{{labels}}} {total}")
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port=9464, host="0.0.0.0"):
+        """Serves `render()` at http://host:port/metrics from a daemon thread."""
+        sink = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = sink.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True, name="robocrew-metrics").start()
+        return self.server
+
+    def close(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server = None
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -1,6 +1,13 @@
 import cv2
 import math
 import functools
+import threading
+import numpy as np
+
+OVERLAY_CACHE_SIZE = 64
+# compositing costs per band and per cropped pixel; above these, drawing with cv2 is faster
+OVERLAY_MAX_BANDS = 4
+OVERLAY_MAX_PIXELS = 50_000
 
 
 def calculate_angle_marks(width, h_fov, center_angle, mark_len_angle=10):
@@ -21,8 +28,75 @@ def calculate_angle_marks(width, h_fov, center_angle, mark_len_angle=10):
     ]
 
 
+class Overlay:
+    """
+    An overlay drawing rendered once for one frame size, as bands of `tile` rows cropped to the drawn columns.
+    Each band keeps the overlay drawn on black (its color times coverage) and how much of the frame
+    shows through (255 where nothing is drawn, 0 under opaque strokes, between on anti-aliased edges),
+    so applying it is a multiply and an add per band. Pixels match direct drawing (anti-aliased edges within 1).
+    Drawings spread over many bands or pixels (long diagonal lines, full-width lines on large frames) are
+    cheaper to draw than to composite; `composite` is False for them and apply_overlay draws them directly.
+    """
+
+    def __init__(self, draw, width, height, *args, tile=64):
+        on_black = draw(np.zeros((height, width, 3), np.uint8), *args)
+        on_white = draw(np.full((height, width, 3), 255, np.uint8), *args)
+        see_through = (on_white.astype(np.int16) - on_black).astype(np.uint8)
+        drawn = (see_through != 255).any(axis=2)
+        self.bands = []
+        for top in range(0, height, tile):
+            rows = np.flatnonzero(drawn[top:top + tile].any(axis=1)) + top
+            if len(rows) == 0:
+                continue
+            band_rows = slice(rows[0], rows[-1] + 1)
+            columns = np.flatnonzero(drawn[band_rows].any(axis=0))
+            # strokes further apart than a tile go to separate crops
+            for run in np.split(columns, np.flatnonzero(np.diff(columns) > tile) + 1):
+                band_columns = slice(run[0], run[-1] + 1)
+                self.bands.append((
+                    band_rows,
+                    band_columns,
+                    np.ascontiguousarray(see_through[band_rows, band_columns]),
+                    np.ascontiguousarray(on_black[band_rows, band_columns]),
+                ))
+        area = sum((rows.stop - rows.start) * (columns.stop - columns.start) for rows, columns, _, _ in self.bands)
+        self.composite = bool(len(self.bands) <= OVERLAY_MAX_BANDS and area <= OVERLAY_MAX_PIXELS)
+
+    def apply(self, image):
+        image = np.ascontiguousarray(image)
+        for rows, columns, see_through, on_black in self.bands:
+            region = image[rows, columns]
+            cv2.add(cv2.multiply(region, see_through, scale=1 / 255), on_black, dst=region)
+        return image
+
+
+@functools.lru_cache(maxsize=OVERLAY_CACHE_SIZE)
+def cached_overlay(draw, width, height, *args):
+    return Overlay(draw, width, height, *args)
+
+
+def apply_overlay(image, draw, *args):
+    """
+    Same as draw(image, *args) for BGR frames, but the drawing is rendered once per (draw, frame size, args)
+    and kept in an LRU cache; later frames only get it composited in. `draw` must only depend on the frame size and args.
+    Overlays too large to composite cheaply are drawn directly.
+    """
+    if image.ndim != 3 or image.shape[2] != 3:
+        return draw(image, *args)
+    height, width = image.shape[:2]
+    overlay = cached_overlay(draw, width, height, *args)
+    if not overlay.composite:
+        return draw(image, *args)
+    return overlay.apply(image)
+
+
 def basic_augmentation(image, h_fov=120, center_angle=0, navigation_mode="normal"):
-    """Draw horizontal angle markers on the bottom of the image."""
+    """Draw horizontal angle markers on the bottom of the image (from the overlay cache when it pays off)."""
+    return apply_overlay(image, draw_angle_grid, h_fov, center_angle, navigation_mode)
+
+
+def draw_angle_grid(image, h_fov=120, center_angle=0, navigation_mode="normal"):
+    """Draws the angle markers of basic_augmentation directly with cv2."""
     height, width = image.shape[:2]
     yellow = (0, 255, 255)
     orange = (0, 100, 255)
@@ -62,18 +136,33 @@ def draw_precision_mode_aug(image, width, height):
     return image
 
 
+_listening_pauses = {}
+_listening_pauses_lock = threading.Lock()
+
+
 def stop_listening_during_tool_execution(sound_receiver):
     """
     Decorator to stop listening before function execution and resume after.
+    When tools run in parallel, listening resumes only after the last of them is done.
     """
     def decorator(func):
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
             if sound_receiver is not None:
-                sound_receiver.stop_listening()
-            result = func(*args, **kwargs)
-            if sound_receiver is not None:
-                sound_receiver.start_listening()
-            return result
+                with _listening_pauses_lock:
+                    pauses = _listening_pauses.get(id(sound_receiver), 0)
+                    if pauses == 0:
+                        sound_receiver.stop_listening()
+                    _listening_pauses[id(sound_receiver)] = pauses + 1
+            try:
+                return func(*args, **kwargs)
+            finally:
+                if sound_receiver is not None:
+                    with _listening_pauses_lock:
+                        pauses = _listening_pauses.pop(id(sound_receiver)) - 1
+                        if pauses:
+                            _listening_pauses[id(sound_receiver)] = pauses
+                        else:
+                            sound_receiver.start_listening()
         return wrapper
     return decorator
@@ -1,9 +1,11 @@
 """Earth Rover specific LLM agent that inherits from base LLMAgent with SDK-based image capture."""
 
 from robocrew.core.LLMAgent import LLMAgent
-from robocrew.core.utils import basic_augmentation
+from robocrew.core.async_agent import AsyncLLMAgent
+from robocrew.core.utils import basic_augmentation, apply_overlay
+from robocrew.core.tracing import span
+from robocrew.core.image_payload import ImagePayload
 from robocrew.robots.EarthRover.utils import calculate_robot_bearing
-from langchain_core.messages import HumanMessage, SystemMessage, ToolMessage
 from concurrent.futures import ThreadPoolExecutor
 from PIL import Image, ImageDraw, ImageFont
 from pathlib import Path
@@ -11,11 +13,28 @@ import requests
 import time
 import cv2
 import base64
-import numpy as np
 import io, math
 import geomag
 
 
+def draw_front_path_markers(image):
+    """Path lines and distance markers of the front camera, drawn directly with cv2."""
+    height, width = image.shape[:2]
+    # path lines
+    cv2.line(image, (int(0.26 * width), height), (int(0.48 * width), int(0.56 * height)), (0, 255, 255), 2)
+    cv2.line(image, (int(0.74 * width), height), (int(0.52 * width), int(0.56 * height)), (0, 255, 255), 2)
+
+    # meters markers
+    cv2.line(image, (int(0.60 * width), int(0.75 * height)), (int(0.64 * width), int(0.75 * height)), (0, 255, 255), 2)
+    cv2.putText(image, "1m", (int(0.65 * width), int(0.74 * height)), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
+    cv2.line(image, (int(0.53 * width), int(0.61 * height)), (int(0.56 * width), int(0.61 * height)), (0, 255, 255), 2)
+    cv2.putText(image, "2m", (int(0.58 * width), int(0.60 * height)), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
+    cv2.line(image, (int(0.51 * width), int(0.56 * height)), (int(0.53 * width), int(0.56 * height)), (0, 255, 255), 2)
+    cv2.putText(image, "3m", (int(0.54 * width), int(0.55 * height)), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
+
+    return image
+
+
 class EarthRoverAgent(LLMAgent):
     """Earth Rover specific LLM agent that inherits from base LLMAgent with SDK-based image capture."""
     
@@ -28,6 +47,7 @@ class EarthRoverAgent(LLMAgent):
         history_len=None,
         use_memory=False,
         use_location_visualizer=False,
+        image_budget=None,
     ):
         prompt_path = Path(__file__).parent.parent.resolve() / "EarthRover/earth_rover.prompt"
         with open(prompt_path, "r") as f:
@@ -46,7 +66,8 @@ class EarthRoverAgent(LLMAgent):
             wakeword=None,  # No wakeword detection
             tts=False,  # No text-to-speech
             history_len=history_len,
-            use_memory=use_memory
+            use_memory=use_memory,
+            image_budget=image_budget,
         )
         
         # Initialize thread pool executor for concurrent operations
@@ -73,42 +94,39 @@ class EarthRoverAgent(LLMAgent):
     def fetch_sensor_inputs(self):
         """Fetch all camera views from Earth Rover SDK in a single request and augment front camera."""
         # Send requests simultaneously
-        start = time.perf_counter()
-        future_data = self.executor.submit(self.requests_session.get, "http://127.0.0.1:8000/data")
-        future_front_img = self.executor.submit(self.requests_session.get, "http://127.0.0.1:8000/v2/front")
-        future_rear_img = self.executor.submit(self.requests_session.get, "http://127.0.0.1:8000/v2/rear")
-        future_map = self.executor.submit(self.requests_session.get, "http://127.0.0.1:8000/screenshot?view_types=map")
-        response_data = future_data.result()
-        response_front_img = future_front_img.result()
-        response_rear_img = future_rear_img.result()
-        response_map = future_map.result()
-        end = time.perf_counter()
-        print(f"Sensor data fetch time: {end - start} seconds.")
+        with span("sensor_fetch"):
+            future_data = self.executor.submit(self.requests_session.get, "http://127.0.0.1:8000/data")
+            future_front_img = self.executor.submit(self.requests_session.get, "http://127.0.0.1:8000/v2/front")
+            future_rear_img = self.executor.submit(self.requests_session.get, "http://127.0.0.1:8000/v2/rear")
+            future_map = self.executor.submit(self.requests_session.get, "http://127.0.0.1:8000/screenshot?view_types=map")
+            response_data = future_data.result()
+            response_front_img = future_front_img.result()
+            response_rear_img = future_rear_img.result()
+            response_map = future_map.result()
 
         latitude = response_data.json()["latitude"]
         longitude = response_data.json()["longitude"]
 
         # Decode base64 image
-        front_image_bytes = base64.b64decode(response_front_img.json()['front_frame'])
-        
-        # Convert bytes to numpy array
-        nparr = np.frombuffer(front_image_bytes, np.uint8)
-        front_image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        front_image = ImagePayload.from_base64(response_front_img.json()['front_frame']).frame
         
         # Apply augmentation with navigation grid
-        augmented_front_image = basic_augmentation(
-            front_image, 
-            h_fov=self.camera_fov, 
-            center_angle=0, 
-        )
-        augmented_front_image = self.earth_rover_front_augmentation(
-            augmented_front_image,
-        )
-        #augmented_front_image = cv2.resize(augmented_front_image, (512, 288))
+        with span("augmentation"):
+            augmented_front_image = basic_augmentation(
+                front_image, 
+                h_fov=self.camera_fov, 
+                center_angle=0, 
+            )
+            augmented_front_image = self.earth_rover_front_augmentation(
+                augmented_front_image,
+            )
         
-        # Convert augmented image back to base64
-        _, buffer = cv2.imencode('.jpg', augmented_front_image)
-        front_image = base64.b64encode(buffer).decode('utf-8')
+        # Convert augmented image back to base64, resized to the image budget if set
+        front_image = self.image_payload(augmented_front_image)
+        with span("encode"):
+            front_image.jpeg
+        with span("base64"):
+            front_image.base64
 
         # Caution: use only when robot stays steady. Function includes Earth acceleration compensation - so avoid artificial accelerations.
         robot_bearing = calculate_robot_bearing(
@@ -125,24 +143,12 @@ class EarthRoverAgent(LLMAgent):
             self.waypoints[0][1],
         )
     
-        return front_image, response_rear_img.json()['rear_frame'], map_augmented, (latitude, longitude)
+        rear_image = ImagePayload.from_base64(response_rear_img.json()['rear_frame'])
+        return front_image, rear_image, ImagePayload.from_base64(map_augmented), (latitude, longitude)
     
 
     def earth_rover_front_augmentation(self, image):
-        height, width = image.shape[:2]
-        # path lines
-        cv2.line(image, (int(0.26 * width), height), (int(0.48 * width), int(0.56 * height)), (0, 255, 255), 2)
-        cv2.line(image, (int(0.74 * width), height), (int(0.52 * width), int(0.56 * height)), (0, 255, 255), 2)
-
-        # meters markers
-        cv2.line(image, (int(0.60 * width), int(0.75 * height)), (int(0.64 * width), int(0.75 * height)), (0, 255, 255), 2)
-        cv2.putText(image, "1m", (int(0.65 * width), int(0.74 * height)), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
-        cv2.line(image, (int(0.53 * width), int(0.61 * height)), (int(0.56 * width), int(0.61 * height)), (0, 255, 255), 2)
-        cv2.putText(image, "2m", (int(0.58 * width), int(0.60 * height)), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
-        cv2.line(image, (int(0.51 * width), int(0.56 * height)), (int(0.53 * width), int(0.56 * height)), (0, 255, 255), 2)
-        cv2.putText(image, "3m", (int(0.54 * width), int(0.55 * height)), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
-        
-        return image
+        return apply_overlay(image, draw_front_path_markers)
 
 
     def map_augmentation(self, b64_img, angle, lat, lon, tlat=None, tlon=None):
@@ -213,53 +219,41 @@ class EarthRoverAgent(LLMAgent):
                 print("All waypoints reached.")
 
     
-    def main_loop_content(self):
+    def capture_observation(self):
         # Fetch all camera views from Earth Rover SDK in one request
+        captured_at = time.monotonic()
         front_frame, rear_frame, map_frame, (latitude, longitude) = self.fetch_sensor_inputs()
+        self.print_image_stats()
         self.check_waypoint_closiness(latitude, longitude)
         if self.use_location_visualizer:
             self.send_location_to_visualizer(latitude, longitude)
+        return {"captured_at": captured_at, "camera_images": [front_frame, rear_frame, map_frame], "lidar_scan": None}
 
+    def observation_content(self, observation):
+        front_frame, rear_frame, map_frame = observation["camera_images"]
         # Create messages for all camera views
-        message = HumanMessage(
-            content=[
-                {"type": "text", "text": "Front camera view:"},
-                {
-                    "type": "image_url",
-                    "image_url": {"url": f"data:image/jpeg;base64,{front_frame}"}
-                },
-                {"type": "text", "text": "Rear camera view:"},
-                {
-                    "type": "image_url",
-                    "image_url": {"url": f"data:image/jpeg;base64,{rear_frame}"}
-                },
-                {"type": "text", "text": "Map view:"},
-                {
-                    "type": "image_url",
-                    "image_url": {"url": f"data:image/jpeg;base64,{map_frame}"}
-                },
-                {"type": "text", "text": f"\n\nYour task is: '{self.task}'"},
-            ]
-        )
+        return [
+            {"type": "text", "text": "Front camera view:"},
+            {
+                "type": "image_url",
+                "image_url": {"url": front_frame.data_url}
+            },
+            {"type": "text", "text": "Rear camera view:"},
+            {
+                "type": "image_url",
+                "image_url": {"url": rear_frame.data_url}
+            },
+            {"type": "text", "text": "Map view:"},
+            {
+                "type": "image_url",
+                "image_url": {"url": map_frame.data_url}
+            },
+            {"type": "text", "text": f"\n\nYour task is: '{self.task}'"},
+        ]
 
-        self.message_history.append(message)
-        start = time.perf_counter()
-        response = self.llm.invoke(self.message_history)
-        llm_time = time.perf_counter() - start
-        print(f"LLM response time: {llm_time} seconds.")
-        print(response.content)
-        print(response.tool_calls)
-        
-        self.message_history.append(response)
-        if self.history_len:
-            self.cut_off_context(self.history_len)
-            
-        # execute tool
-        for tool_call in response.tool_calls:
-            tool_response, additional_response = self.invoke_tool(tool_call)
-            self.message_history.append(tool_response)
-            if additional_response:
-                self.message_history.append(additional_response)
+
+class AsyncEarthRoverAgent(AsyncLLMAgent, EarthRoverAgent):
+    """EarthRoverAgent driven by asyncio, run it with `await agent.ago()`."""
 
 
 if __name__ == "__main__":
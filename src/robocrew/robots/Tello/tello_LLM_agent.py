@@ -1,6 +1,6 @@
 """Tello specific LLM agent."""
 
-import base64
+import asyncio
 import logging
 import time
 from pathlib import Path
@@ -9,10 +9,12 @@ import av
 import cv2
 import numpy as np
 from djitellopy import Tello
-from langchain_core.messages import HumanMessage
 
 from robocrew.core.LLMAgent import LLMAgent
+from robocrew.core.async_agent import AsyncLLMAgent
 from robocrew.core.utils import basic_augmentation
+from robocrew.core.tracing import span
+from robocrew.core.image_payload import image_data_url
 
 av.logging.set_level(av.logging.PANIC)
 Tello.LOGGER.setLevel(logging.WARNING)
@@ -31,7 +33,9 @@ class TelloAgent(LLMAgent):
         system_prompt: str | None = None,
         history_len: int | None = None,
         skills: list | None = None,
+        **kwargs,
     ):
+        """Extra keyword arguments (e.g. prompt_caching) are passed to LLMAgent."""
         super().__init__(
             model=model,
             tools=tools,
@@ -42,6 +46,7 @@ class TelloAgent(LLMAgent):
             skills=skills,
             skills_dir=Path(__file__).with_name("skills"),
             skill_context=tello,
+            **kwargs,
         )
         self.tello = tello
         self.reference_images_base64: list[str] = []
@@ -50,31 +55,42 @@ class TelloAgent(LLMAgent):
         if not self.tello.stream_on:
             self.tello.streamon()
 
-        frame_reader = self.tello.get_frame_read()
-        frame = frame_reader.frame
-        deadline = time.monotonic() + 20.0
-        while time.monotonic() < deadline:
-            if frame is not None and frame.size and np.any(frame):
-                break
-            time.sleep(0.1)
+        with span("capture"):
+            frame_reader = self.tello.get_frame_read()
             frame = frame_reader.frame
-
-        frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
-        image = basic_augmentation(frame, h_fov=self.camera_fov, navigation_mode=self.navigation_mode)
-        return [base64.b64encode(cv2.imencode(".jpg", image)[1]).decode("utf-8")]
-
-    def main_loop_content(self):
-        camera_images = self.fetch_camera_images_base64()
-        height = self.tello.get_distance_tof()
+            deadline = time.monotonic() + 20.0
+            while time.monotonic() < deadline:
+                if frame is not None and frame.size and np.any(frame):
+                    break
+                time.sleep(0.1)
+                frame = frame_reader.frame
+
+        with span("augmentation"):
+            frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
+            frame = basic_augmentation(frame, h_fov=self.camera_fov, navigation_mode=self.navigation_mode)
+        image = self.image_payload(frame)
+        with span("encode"):
+            image.jpeg
+        with span("base64"):
+            image.base64
+        return [image]
+
+    def capture_observation(self):
+        observation = super().capture_observation()
+        observation["height"] = self.tello.get_distance_tof()
+        observation["yaw"] = self.tello.get_yaw()
+        return observation
+
+    def observation_content(self, observation):
         telemetry = (
-            f"Current flight height: {height} cm\n"
-            f"Yaw: {self.tello.get_yaw()} degrees"
+            f"Current flight height: {observation['height']} cm\n"
+            f"Yaw: {observation['yaw']} degrees"
         )
         content = [
             {"type": "text", "text": "Main camera view:"},
             {
                 "type": "image_url",
-                "image_url": {"url": f"data:image/jpeg;base64,{camera_images[0]}"},
+                "image_url": {"url": image_data_url(observation["camera_images"][0])},
             },
         ]
         if self.reference_images_base64:
@@ -86,38 +102,22 @@ class TelloAgent(LLMAgent):
             {"type": "text", "text": f"\n\n{telemetry}"},
             {"type": "text", "text": f"\n\nYour task is: '{self.task}'"},
         ])
+        return content
 
-        self.message_history.append(HumanMessage(content))
-        response = self.llm.invoke(self.message_history)
-        print(response.content)
-
-        usage_meta = getattr(response, "usage_metadata", None) or {}
-        reasoning_tokens = usage_meta.get("output_token_details", {}).get("reasoning", 0)
-        if reasoning_tokens:
-            print(f"[thinking: {reasoning_tokens} tokens]")
-
-        for tool_call in response.tool_calls:
-            if tool_call["name"] != "finish_task":
-                print(f"Calling {tool_call['name']} with {tool_call['args']} args")
-
-        self.message_history.append(response)
-        if self.history_len:
-            self.cut_off_context(self.history_len)
-
-        for tool_call in response.tool_calls:
-            tool_response, additional_response = self.invoke_tool(tool_call)
-            self.message_history.append(tool_response)
-            if additional_response:
-                self.message_history.append(additional_response)
-            if tool_call["name"] == "finish_task":
-                report = tool_call["args"].get("report", "Task finished")
-                self.task = None
-                print(f"Task finished: {report}")
-                return report
-            
     def go(self):
         print(f"Battery: {self.tello.get_battery()}%")
         return super().go()
 
     def cleanup(self):
-        self.tello.end()
+        try:
+            super().cleanup()
+        finally:
+            self.tello.end()
+
+
+class AsyncTelloAgent(AsyncLLMAgent, TelloAgent):
+    """TelloAgent driven by asyncio, run it with `await agent.ago()`."""
+
+    async def ago(self):
+        print(f"Battery: {await asyncio.to_thread(self.tello.get_battery)}%")
+        return await super().ago()
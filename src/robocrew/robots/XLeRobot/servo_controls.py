@@ -12,6 +12,7 @@ from pathlib import Path
 from typing import Dict, Literal, Mapping, Optional
 from lerobot.motors import Motor, MotorCalibration, MotorNormMode
 from lerobot.motors.feetech import FeetechMotorsBus, OperatingMode
+from robocrew.core.sim import SimMotorsBus, is_sim_port
 
 
 DEFAULT_SPEED = 10_000
@@ -45,6 +46,8 @@ POSITION_NORM_MODE = _pick_non_degree_norm_mode()
 HEAD_NORM_MODE = MotorNormMode.DEGREES
 HEAD_YAW_LIMIT_DEG = (-120.0, 120.0)
 HEAD_PITCH_LIMIT_DEG = (0.0, 85.0)
+HEAD_SETTLE_TOLERANCE_DEG = 2.0
+HEAD_SETTLE_TIMEOUT = 1.5
 
 
 def _clamp(value: float, bounds: tuple[float, float]) -> float:
@@ -94,6 +97,13 @@ def _default_calibration(ids: tuple[int, ...]) -> Dict[int, MotorCalibration]:
     }
 
 
+def make_motors_bus(port: str, motors: Mapping, calibration: Optional[Mapping] = None):
+    """FeetechMotorsBus, or SimMotorsBus for "sim:" ports."""
+    if is_sim_port(port):
+        return SimMotorsBus(port=port, motors=motors, calibration=calibration)
+    return FeetechMotorsBus(port=port, motors=motors, calibration=calibration)
+
+
 def _run_lerobot_calibrate(port: str, calibration_id: str, output_path: Path) -> None:
     env = dict(os.environ)
     env["HF_LEROBOT_CALIBRATION"] = str(Path(DEFAULT_ARM_CALIBRATION_DIR).expanduser())
@@ -171,8 +181,13 @@ class ServoControler:
         self._arm_positions_right = {name: 0.0 for name in ARM_SERVO_MAPS["right"].keys()}
         self._arm_positions_left = {name: 0.0 for name in ARM_SERVO_MAPS["left"].keys()}
         self._arm_positions = {name: 0.0 for name in ARM_SERVO_MAPS["right"].keys()}
-        right_arm_calibration = _load_arm_calibration("right_arm.json", self._right_arm_ids, right_arm_wheel_usb)
-        left_arm_calibration = _load_arm_calibration("left_arm.json", self._left_arm_ids, left_arm_head_usb)
+        # simulated buses never run the interactive calibration
+        right_arm_calibration = _load_arm_calibration(
+            "right_arm.json", self._right_arm_ids, None if is_sim_port(right_arm_wheel_usb) else right_arm_wheel_usb
+        )
+        left_arm_calibration = _load_arm_calibration(
+            "left_arm.json", self._left_arm_ids, None if is_sim_port(left_arm_head_usb) else left_arm_head_usb
+        )
 
         # Initialize FeetechMotorsBus with the three wheel motors
         if right_arm_wheel_usb:
@@ -180,7 +195,7 @@ class ServoControler:
                 aid: Motor(aid, "sts3215", POSITION_NORM_MODE)
                 for aid in self._right_arm_ids
             }
-            self.wheel_bus = FeetechMotorsBus(
+            self.wheel_bus = make_motors_bus(
                 port=right_arm_wheel_usb,
                 motors={
                     **arm_motors,
@@ -219,7 +234,7 @@ class ServoControler:
                 aid: Motor(aid, "sts3215", POSITION_NORM_MODE)
                 for aid in self._left_arm_ids
             }
-            self.head_bus = FeetechMotorsBus(
+            self.head_bus = make_motors_bus(
                 port=left_arm_head_usb,
                 motors={
                     **left_arm_motors,
@@ -339,6 +354,28 @@ class ServoControler:
         self.head_bus.sync_write("Goal_Position", payload)
         self._head_positions.update(payload)
 
+    def wait_for_head(
+        self,
+        joints: tuple[str, ...] = ("yaw", "pitch"),
+        tolerance: float = HEAD_SETTLE_TOLERANCE_DEG,
+        timeout: float = HEAD_SETTLE_TIMEOUT,
+        poll_interval: float = 0.02,
+    ) -> bool:
+        """Polls the head servos until they stopped within `tolerance` degrees of their goal. False on timeout."""
+        ids = [HEAD_SERVO_MAP[joint] for joint in joints]
+        deadline = time.monotonic() + timeout
+        while True:
+            settled = all(
+                abs(float(self.head_bus.read("Present_Position", sid)) - self._head_positions[sid]) <= tolerance
+                and not self.head_bus.read("Moving", sid)
+                for sid in ids
+            )
+            if settled:
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(poll_interval)
+
     def set_arm_position(self, positions: Mapping[str, float], arm_side: Literal["left", "right", "both"] = "both") -> Dict[str, float]:
         right_map = ARM_SERVO_MAPS["right"]
         left_map = ARM_SERVO_MAPS["left"]
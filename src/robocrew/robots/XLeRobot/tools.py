@@ -1,5 +1,6 @@
-import base64
-
+import contextlib
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import math
@@ -11,16 +12,21 @@ from lerobot.async_inference.configs import RobotClientConfig
 from lerobot.robots.so_follower.config_so_follower import SOFollowerConfig
 from lerobot.cameras.opencv.configuration_opencv import OpenCVCameraConfig
 from lerobot.motors import Motor, MotorNormMode
-from lerobot.motors.feetech import FeetechMotorsBus
 from robocrew.robots.XLeRobot.groot_client import PolicyClient
 
 from robocrew.core.utils import stop_listening_during_tool_execution
-from robocrew.robots.XLeRobot.servo_controls import DEFAULT_ARM_CALIBRATION_DIR
+from robocrew.core.tool_executor import uses_resources, WHEELS, HEAD, LEFT_ARM, RIGHT_ARM, MAIN_CAMERA
+from robocrew.robots.XLeRobot.servo_controls import DEFAULT_ARM_CALIBRATION_DIR, make_motors_bus
+from robocrew.core.camera_broker import broker_opencv_cameras, is_broker_port
+from robocrew.core.camera_rig import CameraRig
+from robocrew.core.image_payload import ImagePayload
+from robocrew.core.panorama import PANORAMA_FOV, PanoramaStitcher
 import time
 import threading
 
 
 def create_move_forward(servo_controller, sound_receiver=None):
+    @uses_resources(WHEELS)
     @tool
     @stop_listening_during_tool_execution(sound_receiver)
     def move_forward(distance_meters: float) -> str:
@@ -36,6 +42,7 @@ def create_move_forward(servo_controller, sound_receiver=None):
     return move_forward
 
 def create_move_backward(servo_controller, sound_receiver=None):
+    @uses_resources(WHEELS)
     @tool
     @stop_listening_during_tool_execution(sound_receiver)
     def move_backward(distance_meters: float) -> str:
@@ -48,6 +55,7 @@ def create_move_backward(servo_controller, sound_receiver=None):
     return move_backward
 
 def create_turn_right(servo_controller, sound_receiver=None):
+    @uses_resources(WHEELS)
     @tool
     @stop_listening_during_tool_execution(sound_receiver)
     def turn_right(angle_degrees: float) -> str:
@@ -60,6 +68,7 @@ def create_turn_right(servo_controller, sound_receiver=None):
     return turn_right
 
 def create_turn_left(servo_controller, sound_receiver=None):
+    @uses_resources(WHEELS)
     @tool
     @stop_listening_during_tool_execution(sound_receiver)
     def turn_left(angle_degrees: float) -> str:
@@ -73,6 +82,7 @@ def create_turn_left(servo_controller, sound_receiver=None):
 
 
 def create_strafe_left(servo_controller, sound_receiver=None):
+    @uses_resources(WHEELS)
     @tool
     @stop_listening_during_tool_execution(sound_receiver)
     def strafe_left(distance_meters: float) -> str:
@@ -84,6 +94,7 @@ def create_strafe_left(servo_controller, sound_receiver=None):
     return strafe_left
 
 def create_strafe_right(servo_controller, sound_receiver=None):
+    @uses_resources(WHEELS)
     @tool
     @stop_listening_during_tool_execution(sound_receiver)
     def strafe_right(distance_meters: float) -> str:
@@ -95,6 +106,7 @@ def create_strafe_right(servo_controller, sound_receiver=None):
     return strafe_right
 
 def create_go_to_precision_mode(servo_controller):
+    @uses_resources(HEAD)
     @tool
     def go_to_precision_mode() -> str:
         """Sets the robot to precision movement mode. Use it when close to obstacles or target."""
@@ -104,6 +116,7 @@ def create_go_to_precision_mode(servo_controller):
     return go_to_precision_mode
 
 def create_go_to_normal_mode(servo_controller):
+    @uses_resources(HEAD)
     @tool
     def go_to_normal_mode() -> str:
         """Sets the robot to normal movement mode for long distance rides."""
@@ -113,41 +126,73 @@ def create_go_to_normal_mode(servo_controller):
     return go_to_normal_mode
 
 
-def create_look_around(servo_controller, main_camera):
+LOOK_AROUND_VIEWS = (("Left", -120), ("Left-Center", -40), ("Right-Center", 40), ("Right", 120))
+# encodes (or stitches) the previous view while the head turns to the next one; shared by every look_around
+# tool, so rebuilding agents doesn't leave pools behind. Its thread starts on first use.
+LOOK_AROUND_ENCODER = ThreadPoolExecutor(max_workers=1, thread_name_prefix="look_around")
+
+
+def create_look_around(servo_controller, main_camera, panorama_width: int | None = None, camera_fov: float = 120):
+    """
+    panorama_width: set to return one panoramic strip of this width, stitched from the four views and carrying
+        a continuous angle grid from -160 to +160 degrees, instead of four separate images.
+    camera_fov: horizontal field of view of the main camera in degrees.
+    """
+    center_angles = tuple(angle for _, angle in LOOK_AROUND_VIEWS)
+
+    def encode_view(frame, angle):
+        return main_camera.payload_from_frame(frame, camera_fov=camera_fov, center_angle=angle).data_url
+
+    @uses_resources(HEAD, MAIN_CAMERA)
     @tool
     def look_around() -> list:
         """Look around yourself to find a thing you looking for or to understand an envinronment."""
-        movement_delay = 0.9  # seconds
         print("Looking around...")
-        servo_controller.turn_head_yaw(-120)
-        time.sleep(movement_delay)
-        image_1 = main_camera.capture_image(center_angle=-120)
-        image_1_64 = base64.b64encode(image_1).decode('utf-8')
-        servo_controller.turn_head_yaw(-40)
-        time.sleep(movement_delay)
-        image_2 = main_camera.capture_image(center_angle=-40)
-        image_2_64 = base64.b64encode(image_2).decode('utf-8')  
-        servo_controller.turn_head_yaw(40)
-        time.sleep(movement_delay)
-        image_3 = main_camera.capture_image(center_angle=40)
-        image_3_64 = base64.b64encode(image_3).decode('utf-8')
-        servo_controller.turn_head_yaw(120)
-        time.sleep(movement_delay)
-        image_4 = main_camera.capture_image(center_angle=120)
-        image_4_64 = base64.b64encode(image_4).decode('utf-8')
+        start = time.monotonic()
+        stitcher = None
+        if panorama_width:
+            stitcher = PanoramaStitcher(panorama_width, camera_fov, center_angles)
+        views = []
+        for label, angle in LOOK_AROUND_VIEWS:
+            moved_at = time.monotonic()
+            servo_controller.turn_head_yaw(angle)
+            settled = servo_controller.wait_for_head(joints=("yaw",))
+            settled_at = time.monotonic()
+            frame = main_camera.read_frame(newer_than=settled_at)
+            captured_at = time.monotonic()
+            process = stitcher.add if stitcher is not None else encode_view
+            future = LOOK_AROUND_ENCODER.submit(contextvars.copy_context().run, process, frame, angle)
+            views.append({
+                "label": label,
+                "settle": round(settled_at - moved_at, 3),
+                "settled": settled,
+                "capture": round(captured_at - settled_at, 3),
+                "future": future,
+            })
         servo_controller.turn_head_yaw(0)  # look forward again
-        time.sleep(movement_delay)
-
-        return "Looked around", [
-            {"type": "text", "text": "Left"},
-            {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{image_1_64}",}},
-            {"type": "text", "text": "Left-Center"},
-            {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{image_2_64}"}},
-            {"type": "text", "text": "Right-Center"},
-            {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{image_3_64}"}},
-            {"type": "text", "text": "Right"},
-            {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{image_4_64}"}},         
-        ]
+        encode_start = time.monotonic()
+        content = []
+        if stitcher is not None:
+            for view in views:
+                view.pop("future").result()
+            panorama = ImagePayload(frame=stitcher.result())
+            content.append({"type": "text", "text": f"Panorama from -{PANORAMA_FOV // 2} (left) to +{PANORAMA_FOV // 2} (right) degrees"})
+            content.append({"type": "image_url", "image_url": {"url": panorama.data_url}})
+        else:
+            for view in views:
+                content.append({"type": "text", "text": view["label"]})
+                content.append({"type": "image_url", "image_url": {"url": view.pop("future").result()}})
+        encode_wait = time.monotonic() - encode_start
+        servo_controller.wait_for_head(joints=("yaw",))
+
+        timings = {
+            "views": views,
+            "encode_wait": round(encode_wait, 3),
+            "total": round(time.monotonic() - start, 3),
+        }
+        print(f"[look_around: {timings['total']:.2f} s, settle {[view['settle'] for view in views]}, "
+              f"encode wait {timings['encode_wait']:.3f} s]")
+        return "Looked around", content, timings
     return look_around
 
 
@@ -234,23 +279,31 @@ def create_vla_single_arm_manipulation(
 
     preloaded_client = None
 
+    # cameras served by the camera broker are shared with the agent instead of taken over
+    policy_cameras = (
+        broker_opencv_cameras
+        if any(is_broker_port(str(settings["index_or_path"])) for settings in camera_config.values())
+        else contextlib.nullcontext
+    )
+
     if load_on_startup:
         print(f" Loading Policy for {tool_name}...")
         # release main camera from agent
-        main_camera_object.release()
-        time.sleep(1) 
+        _release_main_camera(main_camera_object)
 
-        preloaded_client = RobotClient(cfg)
-        preloaded_client.robot.disconnect()
+        with policy_cameras():
+            preloaded_client = RobotClient(cfg)
+            preloaded_client.robot.disconnect()
 
-        # Warm up once at startup so server loads policy weights before first real execution.
-        warmup_client = RobotClient(cfg)
-        warmup_client.robot.disconnect()
+            # Warm up once at startup so server loads policy weights before first real execution.
+            warmup_client = RobotClient(cfg)
+            warmup_client.robot.disconnect()
 
         #assign main camera back to agent
-        time.sleep(0.5)
-        main_camera_object.reopen()
+        _reopen_main_camera(main_camera_object, delay=0.5)
     
+    # arms share servo buses with wheels and head, so manipulation takes the whole robot
+    @uses_resources(WHEELS, HEAD, LEFT_ARM, RIGHT_ARM, MAIN_CAMERA)
     @tool
     def tool_name_to_override() -> str:
         """Tool description to override."""
@@ -260,54 +313,44 @@ def create_vla_single_arm_manipulation(
 
         servo_controler.turn_head_to_vla_position()
         # release main camera from agent, so arm policy can use it
-        main_camera_object.release()
-        time.sleep(1)  # give some time to release camera
+        _release_main_camera(main_camera_object)
 
         client = None
-        try:
-
-            if not load_on_startup:
-                client = RobotClient(cfg)
-            else:
-                client = preloaded_client
-                client.robot.connect()
-
-            # Use a fresh RobotClient per invocation so worker threads can be stopped cleanly.
-            client = RobotClient(cfg)
+        # kept until the client is stopped, so cameras reconnecting during the run read from the broker too
+        with policy_cameras():
+            try:
 
-            if not client.start():
-                return "Failed to connect to robot server."
+                if not load_on_startup:
+                    client = RobotClient(cfg)
+                else:
+                    client = preloaded_client
+                    client.robot.connect()
 
-            threading.Thread(target=client.receive_actions, daemon=True).start()
-            threading.Timer(execution_time, _shutdown_robot_client, args=(client,)).start()
-            try:
-                client.control_loop(task=task_prompt)
-            except Exception:
-                pass
-        
-        finally:
+                # Use a fresh RobotClient per invocation so worker threads can be stopped cleanly.
+                client = RobotClient(cfg)
 
-            #if client and client.robot.is_connected:
-            if not load_on_startup and client:
-                client.stop()
-            # Re-open main camera for agent use. 
-            time.sleep(1)
-            main_camera_object.reopen()
-            # set head back to precize mode
-            servo_controler.turn_head_to_vla_position(50)
+                if not client.start():
+                    return "Failed to connect to robot server."
 
-            if client:
+                threading.Thread(target=client.receive_actions, daemon=True).start()
+                threading.Timer(execution_time, _shutdown_robot_client, args=(client,)).start()
                 try:
-                    client.stop()
+                    client.control_loop(task=task_prompt)
                 except Exception:
                     pass
-            # Re-open main camera for agent use. 
-            time.sleep(1)
-            main_camera_object.reopen()
-            time.sleep(0.3)
-            # set head back to precize mode
-            servo_controler.turn_head_to_vla_position(50)
-            servo_controler.set_saved_position("default", arm_side="both")  # optionally set a default position for both arms after manipulation
+        
+            finally:
+
+                if client:
+                    try:
+                        client.stop()
+                    except Exception:
+                        pass
+                # Re-open main camera for agent use. 
+                _reopen_main_camera(main_camera_object)
+                # set head back to precize mode
+                servo_controler.turn_head_to_vla_position(50)
+                servo_controler.set_saved_position("default", arm_side="both")  # optionally set a default position for both arms after manipulation
 
         
         return "Arm manipulation done"
@@ -318,6 +361,22 @@ def create_vla_single_arm_manipulation(
     return tool_name_to_override
 
 
+def _release_main_camera(main_camera_object, delay: float = 1.0) -> None:
+    """Frees the main camera device for a policy. Cameras served by the camera broker stay open."""
+    if is_broker_port(getattr(main_camera_object, "usb_port", None)):
+        return
+    main_camera_object.release()
+    time.sleep(delay)  # give some time to release camera
+
+
+def _reopen_main_camera(main_camera_object, delay: float = 1.0) -> None:
+    """Takes the main camera device back after a policy, see _release_main_camera."""
+    if is_broker_port(getattr(main_camera_object, "usb_port", None)):
+        return
+    time.sleep(delay)
+    main_camera_object.reopen()
+
+
 def _shutdown_robot_client(client: "RobotClient") -> None:
     """Gracefully stop the control loop before disconnecting the robot.
 
@@ -397,6 +456,7 @@ def create_groot_single_arm_manipulation(
         execution_time: int = 30,
         fps: int = 30,
         timeout_ms: int = 15000,
+        camera_sync_tolerance: float = 0.02,
         calibration_path: str = "/home/pi/.cache/robocrew/calibrations/right_arm.json",
     ):
     """Creates a LangChain tool that runs a GR00T policy for single-arm manipulation.
@@ -418,27 +478,29 @@ def create_groot_single_arm_manipulation(
         execution_time (int): How long in seconds to run the policy.
         fps (int): Control loop frequency.
         timeout_ms (int): PolicyClient request timeout in milliseconds.
+        camera_sync_tolerance (float): Max seconds between the two camera frames of one observation.
         calibration_path (str): Path to a lerobot calibration JSON file. Required for
             normalized (degree-mode) motor reads. Typically found at
             ~/.cache/huggingface/lerobot/calibration/robots/<robot>/<id>.json
     """
 
+    # arms share servo buses with wheels and head, so manipulation takes the whole robot
+    @uses_resources(WHEELS, HEAD, LEFT_ARM, RIGHT_ARM, MAIN_CAMERA)
     @tool
     def tool_name_to_override() -> str:
         """Tool description to override."""
         print(f"GR00T manipulation tool activated: {tool_name}")
 
         servo_controller.turn_head_to_vla_position()
-        main_camera_object.release()
-        time.sleep(1)
-
-        cap1 = cv2.VideoCapture(camera1_index_or_path)
-        cap1.set(cv2.CAP_PROP_FRAME_WIDTH, camera_width)
-        cap1.set(cv2.CAP_PROP_FRAME_HEIGHT, camera_height)
-
-        cap2 = cv2.VideoCapture(camera2_index_or_path)
-        cap2.set(cv2.CAP_PROP_FRAME_WIDTH, camera_width)
-        cap2.set(cv2.CAP_PROP_FRAME_HEIGHT, camera_height)
+        _release_main_camera(main_camera_object)
+
+        # both views grabbed in parallel and paired by time, so the policy sees one moment
+        rig = CameraRig(
+            {"camera1": camera1_index_or_path, "camera2": camera2_index_or_path},
+            tolerance=camera_sync_tolerance,
+            width=camera_width,
+            height=camera_height,
+        )
 
         # Load calibration from lerobot JSON if provided
         calibration = None
@@ -458,7 +520,7 @@ def create_groot_single_arm_manipulation(
                 for entry in raw.values()
             }
 
-        arm_bus = FeetechMotorsBus(
+        arm_bus = make_motors_bus(
             port=arm_port,
             motors={mid: Motor(mid, "sts3215", MotorNormMode.DEGREES) for mid in motor_ids},
             calibration=calibration,
@@ -468,10 +530,8 @@ def create_groot_single_arm_manipulation(
         policy = PolicyClient(host=server_host, port=server_port, timeout_ms=timeout_ms)
         if not policy.ping():
             arm_bus.disconnect()
-            cap1.release()
-            cap2.release()
-            time.sleep(1)
-            main_camera_object.reopen()
+            rig.release()
+            _reopen_main_camera(main_camera_object)
             servo_controller.turn_head_to_vla_position(50)
             return "Failed to connect to GR00T policy server."
 
@@ -479,16 +539,19 @@ def create_groot_single_arm_manipulation(
 
         dt = 1.0 / fps
         start_time = time.time()
+        last_bundle_time = None
 
         try:
             while time.time() - start_time < execution_time:
-                ret1, frame1 = cap1.read()
-                ret2, frame2 = cap2.read()
-                if not ret1 or not ret2:
+                try:
+                    bundle = rig.capture(newer_than=last_bundle_time)
+                except RuntimeError as exc:
+                    print(f"[camera rig: {exc}]")
                     break
+                last_bundle_time = bundle.captured_at
 
-                frame1_rgb = cv2.cvtColor(frame1, cv2.COLOR_BGR2RGB)
-                frame2_rgb = cv2.cvtColor(frame2, cv2.COLOR_BGR2RGB)
+                frame1_rgb = cv2.cvtColor(bundle["camera1"], cv2.COLOR_BGR2RGB)
+                frame2_rgb = cv2.cvtColor(bundle["camera2"], cv2.COLOR_BGR2RGB)
 
                 positions_deg = [arm_bus.read("Present_Position", mid) for mid in motor_ids]
                 state_rad = np.array(
@@ -509,11 +572,10 @@ def create_groot_single_arm_manipulation(
                     time.sleep(dt)
 
         finally:
+            print(f"[camera rig: {rig.stats()}]")
             arm_bus.disconnect()
-            cap1.release()
-            cap2.release()
-            time.sleep(1)
-            main_camera_object.reopen()
+            rig.release()
+            _reopen_main_camera(main_camera_object)
             servo_controller.turn_head_to_vla_position(50)
 
         return "GR00T arm manipulation done."
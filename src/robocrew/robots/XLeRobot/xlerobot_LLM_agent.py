@@ -1,4 +1,5 @@
 from robocrew.core.LLMAgent import LLMAgent
+from robocrew.core.async_agent import AsyncLLMAgent
 from langchain_core.messages import HumanMessage, SystemMessage
 import os
 
@@ -20,7 +21,9 @@ class XLeRobotAgent(LLMAgent):
 		wakeword: str | None = None,
 		tts: bool = False,
 		lidar_usb_port: str | None = None,
+		**kwargs,
 	):
+		"""Extra keyword arguments (e.g. prefetch_observations) are passed to LLMAgent."""
 
 		super().__init__(
 			model=model,
@@ -36,7 +39,12 @@ class XLeRobotAgent(LLMAgent):
 			tts=tts,
 			history_len=history_len,
 			use_memory=use_memory,
-			lidar_usb_port=lidar_usb_port
+			lidar_usb_port=lidar_usb_port,
+			**kwargs,
 		)
 
 	# No new features or methods; inherits all behavior from LLMAgent
+
+
+class AsyncXLeRobotAgent(AsyncLLMAgent, XLeRobotAgent):
+	"""XLeRobotAgent driven by asyncio, run it with `await agent.ago()`."""
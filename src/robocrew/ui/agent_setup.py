@@ -22,6 +22,13 @@ from robocrew.robots.XLeRobot.tools import (
 )
 
 CALIBRATION_TTYD_PORT = 8283
+# ROBOCREW_SIM=1 runs the UI on simulated camera, servos and lidar (see robocrew.core.sim)
+SIM_HARDWARE = bool(os.getenv("ROBOCREW_SIM"))
+# ROBOCREW_CAMERA_BROKER=1 reads cameras from a running robocrew-camera-broker (center=..., right=...),
+# so VLA tools share them with the agent instead of releasing and reopening the devices
+CAMERA_BROKER = bool(os.getenv("ROBOCREW_CAMERA_BROKER"))
+CENTER_CAMERA = "broker:center" if CAMERA_BROKER else "/dev/camera_center"
+RIGHT_CAMERA = "broker:right" if CAMERA_BROKER else "/dev/camera_right"
 VLA_FILE = os.path.join(os.path.expanduser("~"), ".cache", "robocrew", "tools", "vla_tools.json")
 
 def _is_process_running(process) -> bool:
@@ -63,14 +70,16 @@ def _get_missing_calibration_files() -> list[str]:
 
 @st.cache_resource
 def get_hardware():
-    return RobotCamera("/dev/camera_center"), ServoControler("/dev/arm_right", "/dev/arm_left")
+    if SIM_HARDWARE:
+        return RobotCamera("sim:synthetic", background_capture=True), ServoControler("sim:arm_right", "sim:arm_left")
+    return RobotCamera(CENTER_CAMERA, background_capture=True), ServoControler("/dev/arm_right", "/dev/arm_left")
 
 def init_agent():
     if st.session_state.recording_process:
         st.session_state.init_error = "Hardware busy: Recording in progress."
         return
 
-    missing_files = _get_missing_calibration_files()
+    missing_files = [] if SIM_HARDWARE else _get_missing_calibration_files()
     calibration_process = st.session_state.get("calibration_process")
     if not missing_files and calibration_process is not None and calibration_process.poll() is not None:
         st.session_state.calibration_process = None
@@ -100,7 +109,7 @@ def init_agent():
                         if not t.get("active", True): 
                             continue
                             
-                        cam_cfg = {"main": {"index_or_path": "/dev/camera_center"}, "right_arm": {"index_or_path": "/dev/camera_right"}}
+                        cam_cfg = {"main": {"index_or_path": CENTER_CAMERA}, "right_arm": {"index_or_path": RIGHT_CAMERA}}
                         
                         vla_tools.append(create_vla_single_arm_manipulation(
                             tool_name=t["tool_name"], tool_description=t["tool_description"],
@@ -130,7 +139,7 @@ def init_agent():
                 tools=tools,
                 main_camera=main_camera,
                 servo_controler=servo_controller,
-                lidar_usb_port="/dev/lidar" if os.path.exists("/dev/lidar") else None,
+                lidar_usb_port="sim:scene" if SIM_HARDWARE else ("/dev/lidar" if os.path.exists("/dev/lidar") else None),
                 history_len=8
             )
             st.session_state.init_error = ""
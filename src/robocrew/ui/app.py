@@ -96,7 +96,7 @@ with st.sidebar:
 
     if st.button("🛑 EMERGENCY STOP", type="primary", use_container_width=True):
         if st.session_state.agent:
-            st.session_state.agent.task = None
+            st.session_state.agent.cancel_task()
         st.session_state.agent_active = False
         st.session_state.agent_step = 0
         
@@ -5,6 +5,8 @@ from streamlit.web import cli as stcli
 def main():
     curr_path = os.path.dirname(__file__)
     file_path = os.path.join(curr_path, "app.py")
+    if "--sim" in sys.argv[1:]:
+        os.environ["ROBOCREW_SIM"] = "1"  # simulated camera, servos and lidar
     
     sys.argv = ["streamlit", "run", file_path]
     sys.exit(stcli.main())
\ No newline at end of file
@@ -1,5 +1,13 @@
+import base64
 import streamlit as st
 import speech_recognition as sr
+from robocrew.core import tracing
+
+@st.cache_resource
+def get_step_timings():
+    sink = tracing.RingBufferSink(maxlen=500)
+    tracing.enable(sink)
+    return sink
 
 def render_conversation_tab():
     if not st.session_state.agent: return st.info("LLM Agent offline.")
@@ -15,21 +23,33 @@ def render_conversation_tab():
     
     with col_v:
         try:
-            imgs = st.session_state.agent.fetch_camera_images_base64()
-            if imgs: st.image(f"data:image/jpeg;base64,{imgs[0]}", width="stretch")
+            st.image(st.session_state.agent.display_image().jpeg, width="stretch")
         except: st.error("Vision broken")
         
         try:
             if getattr(st.session_state.agent, "latest_lidar_b64", None):
                 st.image(f"data:image/png;base64,{st.session_state.agent.latest_lidar_b64}", width="stretch")
         except: pass
+
+        last_step = get_step_timings().last_step()
+        if last_step:
+            with st.expander(f"⏱️ Step {last_step[-1]['step']} timings"):
+                st.dataframe([{"span": r["name"], "ms": round(r["duration_ms"])} for r in last_step], hide_index=True)
         
         status_container = st.container()
                 
     with col_c:
         chat_container = st.container(height=370)
         with chat_container:
-            for msg in st.session_state.agent.message_history:
+            messages = st.session_state.agent.message_history
+            archive = getattr(st.session_state.agent, "history_archive", None)
+            show_images = False
+            if archive is not None and archive.archived_count:
+                if st.toggle(f"Show {archive.archived_count} archived messages with images"):
+                    # images spilled to disk are loaded back, for messages still in RAM too
+                    messages = list(archive.archived_messages(restore_images=True)) + [archive.restore(m) for m in messages]
+                    show_images = True
+            for msg in messages:
                 if msg.type == "system": continue
                 if msg.type == "tool":
                     with st.chat_message("assistant"):
@@ -40,7 +60,10 @@ def render_conversation_tab():
                     elif isinstance(msg.content, list):
                         for item in msg.content:
                             if item.get("type") == "text": st.write(item.get("text"))
-                            elif item.get("type") == "image_url": st.markdown("🖼️ *[Image]*")
+                            elif item.get("type") == "image_url":
+                                url = item["image_url"]["url"]
+                                if show_images and url.startswith("data:"): st.image(base64.b64decode(url.split(",", 1)[1]), width=240)
+                                else: st.markdown("🖼️ *[Image]*")
                 if hasattr(msg, 'tool_calls') and msg.tool_calls:
                     for tc in msg.tool_calls: st.info(f"⚙️ {tc['name']}")
         
@@ -63,7 +86,8 @@ def render_conversation_tab():
     if st.session_state.agent_active:
         with status_container:
             if st.button("🛑 STOP", use_container_width=True):
-                st.session_state.agent_active, st.session_state.agent.task = False, None
+                st.session_state.agent_active = False
+                st.session_state.agent.cancel_task()
                 st.rerun()
                 
             with st.spinner(f"🧠 Step {st.session_state.agent_step+1}"):
@@ -13,8 +13,7 @@ def render_manual_tab():
         col_c, col_btn = st.columns([2, 1])
         with col_c:
             try:
-                imgs = st.session_state.agent.fetch_camera_images_base64()
-                if imgs: st.image(f"data:image/jpeg;base64,{imgs[0]}", width="stretch")
+                st.image(st.session_state.agent.display_image().jpeg, width="stretch")
             except Exception as e:
                 st.error(f"Vision link broken: {e}")
                 
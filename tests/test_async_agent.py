@@ -0,0 +1,207 @@
+import os
+import sys
+import asyncio
+import threading
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from langchain_core.messages import AIMessage, AIMessageChunk, ToolMessage
+from langchain_core.tools import tool
+
+from robocrew.core.tool_executor import uses_resources
+
+
+# ---------------------------------------------------------------------------
+# Helper: build a minimal AsyncLLMAgent without real hardware or LLM API calls
+# ---------------------------------------------------------------------------
+
+def make_async_agent(tools=(), **kwargs):
+    with patch("robocrew.core.LLMAgent.init_chat_model") as mock_llm_factory:
+        mock_llm_factory.return_value.bind_tools.return_value = MagicMock()
+        from robocrew.core.async_agent import AsyncLLMAgent
+        agent = AsyncLLMAgent(
+            model="fake-model",
+            tools=list(tools),
+            main_camera=MagicMock(),
+            sounddevice_index_or_alias=None,
+            tts=False,
+            lidar_usb_port=None,
+            servo_controler=None,
+            **kwargs,
+        )
+    agent.fetch_camera_images_base64 = MagicMock(return_value=["frame"])
+    return agent
+
+
+def ai_message(*tool_calls):
+    return AIMessage(content="", tool_calls=[
+        {"name": name, "args": args, "id": f"call_{i}"} for i, (name, args) in enumerate(tool_calls)
+    ])
+
+
+@tool
+def finish_task(report: str) -> str:
+    """Finish the task."""
+    return "Task finished"
+
+
+# ---------------------------------------------------------------------------
+# async loop step
+# ---------------------------------------------------------------------------
+
+class TestAsyncMainLoop(unittest.TestCase):
+
+    def test_step_uses_ainvoke_and_appends_tool_results(self):
+        calls = []
+
+        @tool
+        def move(distance: float) -> str:
+            """Move."""
+            calls.append(distance)
+            return "moved"
+
+        agent = make_async_agent(tools=[move, finish_task])
+        agent.task = "explore"
+        agent.llm.ainvoke = AsyncMock(return_value=ai_message(("move", {"distance": 1.0})))
+        result = asyncio.run(agent.amain_loop_content())
+        self.assertIsNone(result)
+        self.assertEqual(calls, [1.0])
+        self.assertIsInstance(agent.message_history[-1], ToolMessage)
+        self.assertEqual(agent.message_history[-1].content, "moved")
+        agent.llm.invoke.assert_not_called()
+        agent.cleanup()
+
+    def test_finish_task_returns_report_and_drops_later_calls(self):
+        calls = []
+
+        @tool
+        def move(distance: float) -> str:
+            """Move."""
+            calls.append(distance)
+            return "moved"
+
+        agent = make_async_agent(tools=[move, finish_task])
+        agent.task = "explore"
+        agent.llm.ainvoke = AsyncMock(return_value=ai_message(
+            ("finish_task", {"report": "done"}), ("move", {"distance": 1.0})))
+        report = asyncio.run(agent.amain_loop_content())
+        self.assertEqual(report, "done")
+        self.assertIsNone(agent.task)
+        self.assertEqual(calls, [])
+        agent.cleanup()
+
+    def test_independent_tools_run_concurrently_with_parallel_tools(self):
+        barrier = threading.Barrier(2, timeout=2)
+
+        @uses_resources("speaker")
+        @tool
+        def say(text: str) -> str:
+            """Say."""
+            barrier.wait()
+            return "said"
+
+        @uses_resources("wheels")
+        @tool
+        def move(distance: float) -> str:
+            """Move."""
+            barrier.wait()
+            return "moved"
+
+        agent = make_async_agent(tools=[say, move], parallel_tools=True)
+        results = asyncio.run(agent.ainvoke_tools([
+            {"name": "say", "args": {"text": "hi"}, "id": "a"},
+            {"name": "move", "args": {"distance": 1.0}, "id": "b"},
+        ]))
+        self.assertEqual([msg.content for msg, _ in results], ["said", "moved"])
+        agent.cleanup()
+
+    def test_tools_run_in_order_without_parallel_tools(self):
+        order = []
+
+        @tool
+        async def first() -> str:
+            """First."""
+            await asyncio.sleep(0.05)
+            order.append("first")
+            return "1"
+
+        @tool
+        async def second() -> str:
+            """Second."""
+            order.append("second")
+            return "2"
+
+        agent = make_async_agent(tools=[first, second])
+        asyncio.run(agent.ainvoke_tools([
+            {"name": "first", "args": {}, "id": "a"},
+            {"name": "second", "args": {}, "id": "b"},
+        ]))
+        self.assertEqual(order, ["first", "second"])
+        agent.cleanup()
+
+    def test_streamed_tool_call_starts_before_stream_ends(self):
+        started = asyncio.Event()
+
+        @tool
+        async def move() -> str:
+            """Move."""
+            started.set()
+            return "moved"
+
+        agent = make_async_agent(tools=[move], stream_response=True)
+        agent.task = "explore"
+
+        async def astream(messages):
+            yield AIMessageChunk(content="", tool_call_chunks=[
+                {"index": 0, "name": "move", "args": "{}", "id": "a", "type": "tool_call_chunk"}])
+            await asyncio.wait_for(started.wait(), timeout=2)
+            yield AIMessageChunk(content="Done.")
+
+        agent.llm.astream = astream
+        asyncio.run(agent.amain_loop_content())
+        self.assertEqual(agent.message_history[-1].content, "moved")
+        agent.cleanup()
+
+    def test_two_agents_share_one_event_loop(self):
+        async def run_both():
+            barrier = asyncio.Barrier(2)
+
+            async def ainvoke(messages):
+                await asyncio.wait_for(barrier.wait(), timeout=2)
+                return ai_message()
+
+            agents = [make_async_agent(), make_async_agent()]
+            for agent in agents:
+                agent.task = "explore"
+                agent.llm.ainvoke = ainvoke
+            await asyncio.gather(*(agent.amain_loop_content() for agent in agents))
+            for agent in agents:
+                agent.cleanup()
+
+        asyncio.run(run_both())
+
+
+# ---------------------------------------------------------------------------
+# create_async_execute_subtask
+# ---------------------------------------------------------------------------
+
+class TestAsyncExecuteSubtask(unittest.TestCase):
+
+    def test_runs_executor_until_task_finished(self):
+        from robocrew.core.tools import create_async_execute_subtask
+        executor = make_async_agent(tools=[finish_task])
+        executor.llm.ainvoke = AsyncMock(side_effect=[
+            ai_message(),
+            ai_message(("finish_task", {"report": "reached the door"})),
+        ])
+        execute_subtask = create_async_execute_subtask(executor)
+        result = asyncio.run(execute_subtask.ainvoke({"reasoning": "door ahead", "subtask": "go to the door"}))
+        self.assertEqual(result, "reached the door")
+        self.assertEqual(executor.llm.ainvoke.call_count, 2)
+        executor.cleanup()
+
+
+if __name__ == "__main__":
+    unittest.main()
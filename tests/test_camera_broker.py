@@ -0,0 +1,173 @@
+import os
+import sys
+import threading
+import time
+import types
+import unittest
+from unittest.mock import patch
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from robocrew.core.camera import RobotCamera
+from robocrew.core.camera_broker import BrokerCv2, BrokerVideoCapture, CameraBroker, FrameRing, broker_opencv_cameras
+from robocrew.core.sim import open_video_capture
+
+
+def camera_name(label):
+    return f"test_{label}_{os.getpid()}"
+
+
+def numbered_frame(number, shape=(48, 64, 3)):
+    return np.full(shape, number % 256, np.uint8)
+
+
+# ---------------------------------------------------------------------------
+# shared-memory ring
+# ---------------------------------------------------------------------------
+
+class TestFrameRing(unittest.TestCase):
+
+    def setUp(self):
+        self.name = camera_name("ring")
+        self.ring = FrameRing.create(self.name, (48, 64, 3), slots=3, fps=30)
+        self.addCleanup(self.ring.close)
+
+    def test_reader_sees_written_frames(self):
+        reader = FrameRing.attach(self.name)
+        self.addCleanup(reader.close)
+        self.assertEqual(reader.latest, -1)
+        self.ring.write(numbered_frame(7), 12.5)
+        frame, grabbed_at = reader.read(reader.latest)
+        self.assertEqual(reader.latest, 0)
+        self.assertEqual(frame[0, 0, 0], 7)
+        self.assertEqual(grabbed_at, 12.5)
+        self.assertEqual(reader.fps, 30)
+
+    def test_overwritten_frame_not_returned(self):
+        for number in range(4):
+            self.ring.write(numbered_frame(number), float(number))
+        self.assertIsNone(self.ring.read(0))  # slot reused by frame 3
+        self.assertEqual(self.ring.read(3)[0][0, 0, 0], 3)
+
+    def test_grayscale_frames(self):
+        ring = FrameRing.create(camera_name("gray"), (48, 64), slots=2)
+        self.addCleanup(ring.close)
+        ring.write(np.full((48, 64), 9, np.uint8), 1.0)
+        frame, _ = ring.read(0)
+        self.assertEqual(frame.shape, (48, 64))
+
+
+class TestBrokerVideoCapture(unittest.TestCase):
+
+    def setUp(self):
+        self.name = camera_name("capture")
+        self.ring = FrameRing.create(self.name, (48, 64, 3), slots=4, fps=50)
+        self.addCleanup(self.ring.close)
+        self.ring.write(numbered_frame(0), time.monotonic())
+
+    def test_reads_newest_frame_then_waits_for_next(self):
+        capture = open_video_capture(f"broker:{self.name}")
+        self.addCleanup(capture.release)
+        self.assertIsInstance(capture, BrokerVideoCapture)
+        ok, frame = capture.read()
+        self.assertTrue(ok)
+        self.assertEqual(frame[0, 0, 0], 0)
+
+        def publish():
+            time.sleep(0.05)
+            self.ring.write(numbered_frame(1), time.monotonic())
+
+        threading.Thread(target=publish).start()
+        start = time.monotonic()
+        ok, frame = capture.read()
+        self.assertGreater(time.monotonic() - start, 0.03)
+        self.assertEqual(frame[0, 0, 0], 1)
+        self.assertEqual(capture.get(cv2.CAP_PROP_FRAME_WIDTH), 64)
+        self.assertEqual(capture.get(cv2.CAP_PROP_FPS), 50)
+
+    def test_grab_then_read_returns_same_frame_without_waiting(self):
+        camera = RobotCamera(f"broker:{self.name}")
+        self.addCleanup(camera.release)
+        start = time.monotonic()
+        frame = camera.read_frame()  # grab() + read(), like for a real device
+        self.assertLess(time.monotonic() - start, 0.05)
+        self.assertEqual(frame[0, 0, 0], 0)
+
+    def test_set_accepts_only_broker_settings(self):
+        capture = BrokerVideoCapture(f"broker:{self.name}")
+        self.addCleanup(capture.release)
+        self.assertTrue(capture.set(cv2.CAP_PROP_FRAME_WIDTH, 64))
+        self.assertTrue(capture.set(cv2.CAP_PROP_FRAME_HEIGHT, 48))
+        self.assertTrue(capture.set(cv2.CAP_PROP_FPS, 50.0))
+        self.assertTrue(capture.set(cv2.CAP_PROP_BUFFERSIZE, 1))
+        self.assertFalse(capture.set(cv2.CAP_PROP_FRAME_WIDTH, 640))
+        self.assertFalse(capture.set(cv2.CAP_PROP_FPS, 30))
+        self.assertEqual(capture.get(cv2.CAP_PROP_FRAME_WIDTH), 64)
+
+    def test_cv2_proxy_opens_broker_sources_only(self):
+        proxy = BrokerCv2(cv2)
+        capture = proxy.VideoCapture(f"broker:{self.name}")
+        self.addCleanup(capture.release)
+        self.assertIsInstance(capture, BrokerVideoCapture)
+        self.assertEqual(proxy.CAP_PROP_FPS, cv2.CAP_PROP_FPS)
+        self.assertIsNot(cv2.VideoCapture, proxy.VideoCapture)
+
+    def test_cv2_patch_lasts_until_last_user_ends(self):
+        camera_opencv = types.SimpleNamespace(cv2=cv2)
+        lerobot_opencv = types.SimpleNamespace(camera_opencv=camera_opencv)
+        with patch.dict(sys.modules, {"lerobot.cameras.opencv": lerobot_opencv}):
+            first, second = broker_opencv_cameras(), broker_opencv_cameras()
+            first.__enter__()
+            second.__enter__()
+            self.assertIsInstance(camera_opencv.cv2, BrokerCv2)
+            first.__exit__(None, None, None)
+            # a camera of the still running client reconnecting now must open from the broker
+            capture = camera_opencv.cv2.VideoCapture(f"broker:{self.name}")
+            self.addCleanup(capture.release)
+            self.assertIsInstance(capture, BrokerVideoCapture)
+            second.__exit__(None, None, None)
+            self.assertIs(camera_opencv.cv2, cv2)
+
+    def test_timeout_without_new_frames(self):
+        capture = BrokerVideoCapture(f"broker:{self.name}", frame_timeout=0.05)
+        self.addCleanup(capture.release)
+        capture.read()
+        self.assertEqual(capture.read(), (False, None))
+
+    def test_no_broker(self):
+        capture = BrokerVideoCapture("broker:" + camera_name("missing"), attach_timeout=0.05)
+        self.assertFalse(capture.isOpened())
+        self.assertEqual(capture.read(), (False, None))
+
+
+# ---------------------------------------------------------------------------
+# broker processes
+# ---------------------------------------------------------------------------
+
+class TestCameraBroker(unittest.TestCase):
+
+    def test_consumers_share_camera_without_device_churn(self):
+        name = camera_name("broker")
+        with CameraBroker({name: "sim:synthetic?width=160&height=120&fps=50"}):
+            agent_camera = RobotCamera(f"broker:{name}", background_capture=True)
+            policy_camera = RobotCamera(f"broker:{name}")
+            self.assertEqual(policy_camera.read_frame().shape, (120, 160, 3))
+            self.assertIsNotNone(agent_camera.capture_image())
+
+            start = time.monotonic()
+            agent_camera.release()
+            agent_camera.reopen()
+            self.assertIsNotNone(agent_camera.capture_image(newer_than=time.monotonic()))
+            self.assertLess(time.monotonic() - start, 0.5)
+
+            agent_camera.release()
+            policy_camera.release()
+        with self.assertRaises(FileNotFoundError):
+            FrameRing.attach(name)
+
+
+if __name__ == "__main__":
+    unittest.main()
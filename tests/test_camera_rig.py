@@ -0,0 +1,121 @@
+import os
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from robocrew.core.camera import RobotCamera
+from robocrew.core.camera_rig import CameraRig
+from test_llm_agent import make_agent
+
+
+def sim_camera(fps=50):
+    return f"sim:synthetic?width=160&height=120&fps={fps}"
+
+
+# ---------------------------------------------------------------------------
+# CameraRig
+# ---------------------------------------------------------------------------
+
+class TestCameraRig(unittest.TestCase):
+
+    def make_rig(self, cameras, **kwargs):
+        rig = CameraRig(cameras, **kwargs)
+        self.addCleanup(rig.release)
+        return rig
+
+    def test_bundle_frames_within_tolerance(self):
+        rig = self.make_rig({"center": sim_camera(), "left": sim_camera(), "right": sim_camera()}, tolerance=0.015)
+        for _ in range(5):
+            bundle = rig.capture()
+            self.assertEqual(set(bundle.frames), {"center", "left", "right"})
+            self.assertLessEqual(bundle.skew, 0.015)
+            self.assertEqual(bundle["left"].shape, (120, 160, 3))
+
+    def test_newer_than(self):
+        rig = self.make_rig({"a": sim_camera(), "b": sim_camera()})
+        motion_end = time.monotonic()
+        bundle = rig.capture(newer_than=motion_end)
+        self.assertGreater(min(bundle.timestamps.values()), motion_end)
+        self.assertEqual(bundle.captured_at, min(bundle.timestamps.values()))
+
+    def test_frames_are_copies(self):
+        rig = self.make_rig({"a": sim_camera(), "b": sim_camera()})
+        bundle = rig.capture()
+        bundle["a"][:] = 0
+        camera = rig.cameras["a"]
+        with camera.frame_ready:
+            self.assertFalse(any(frame is bundle["a"] for _, frame in camera.recent_frames))
+
+    def test_no_match_raises(self):
+        rig = self.make_rig({"a": sim_camera(), "b": sim_camera()}, frame_timeout=0.2)
+        with self.assertRaises(RuntimeError):
+            rig.capture(tolerance=-1)
+
+    def test_shared_camera_switched_to_background_capture(self):
+        main_camera = RobotCamera(sim_camera())
+        rig = self.make_rig({"main": main_camera, "right": sim_camera()})
+        self.assertTrue(main_camera.grabber.is_alive())
+        self.assertEqual(rig.name_of(main_camera), "main")
+        self.assertIsNotNone(main_camera.capture_image())
+
+    def test_stats(self):
+        rig = self.make_rig({"fast": sim_camera(50), "slow": sim_camera(20)})
+        time.sleep(0.5)
+        stats = rig.stats()
+        self.assertAlmostEqual(stats["fast"]["fps"], 50, delta=10)
+        self.assertAlmostEqual(stats["slow"]["fps"], 20, delta=5)
+        self.assertGreater(stats["fast"]["frames"], stats["slow"]["frames"])
+        self.assertEqual(stats["fast"]["failed_reads"], 0)
+
+
+class TestRobotCameraDrops(unittest.TestCase):
+
+    def test_gaps_counted_as_dropped(self):
+        camera = RobotCamera(sim_camera(50))
+        self.addCleanup(camera.release)
+        stall = camera.capture.grab
+
+        def slow_grab():
+            if camera.frames_grabbed == 5:
+                time.sleep(0.1)  # about 5 frames missed at 50 fps
+            return stall()
+
+        camera.capture.grab = slow_grab
+        camera.start_grabber()
+        deadline = time.monotonic() + 2
+        while camera.frames_grabbed < 8 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertGreaterEqual(camera.stats()["dropped"], 4)
+
+
+# ---------------------------------------------------------------------------
+# agent observation
+# ---------------------------------------------------------------------------
+
+class TestAgentCameraRig(unittest.TestCase):
+
+    def test_rig_cameras_added_to_observation(self):
+        main_camera = RobotCamera(sim_camera())
+        rig = CameraRig({"center": main_camera, "right": sim_camera()})
+        self.addCleanup(rig.release)
+        agent = make_agent(main_camera=main_camera, camera_rig=rig)
+        agent.task = "look around"
+        observation = agent.capture_observation()
+        self.assertEqual(len(observation["camera_images"]), 2)
+        content = agent.observation_content(observation)
+        texts = [item["text"] for item in content if item["type"] == "text"]
+        self.assertIn("\nright camera view:", texts)
+        self.assertIn("Your task is", texts[-1])
+        self.assertEqual(sum(item["type"] == "image_url" for item in content), 2)
+
+    def test_rig_without_main_camera_rejected(self):
+        rig = CameraRig({"right": sim_camera()})
+        self.addCleanup(rig.release)
+        with self.assertRaises(ValueError):
+            make_agent(main_camera=RobotCamera(sim_camera()), camera_rig=rig)
+
+
+if __name__ == "__main__":
+    unittest.main()
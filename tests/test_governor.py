@@ -0,0 +1,134 @@
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from langchain_core.messages import AIMessage
+
+from robocrew.core.governor import TokenGovernor
+from robocrew.core.image_budget import ImageBudget
+from test_llm_agent import make_agent
+
+
+def response(input_tokens=1000, output_tokens=100, reasoning=0):
+    return AIMessage(content="ok", usage_metadata={
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "total_tokens": input_tokens + output_tokens,
+        "output_token_details": {"reasoning": reasoning},
+    })
+
+
+def make_governed_agent(governor, thinking_level="high", **kwargs):
+    agent = make_agent(token_governor=governor, thinking_level=thinking_level, **kwargs)
+    agent.task = "inspect"
+    return agent
+
+
+# ---------------------------------------------------------------------------
+# totals
+# ---------------------------------------------------------------------------
+
+class TestTotals(unittest.TestCase):
+
+    def test_accumulates_per_agent_and_task(self):
+        governor = TokenGovernor()
+        agent = make_governed_agent(governor)
+        governor.record(agent, response(reasoning=50), llm_latency=2.0)
+        agent.task = "next"
+        governor.record(agent, response(input_tokens=500), llm_latency=1.0)
+        self.assertEqual(governor.totals()["input_tokens"], 1500)
+        self.assertEqual(governor.totals()["steps"], 2)
+        self.assertEqual(governor.totals("inspect")["reasoning_tokens"], 50)
+        self.assertEqual(governor.totals("next")["llm_seconds"], 1.0)
+        self.assertEqual(governor.totals("unknown")["steps"], 0)
+
+    def test_counts_images_in_request(self):
+        governor = TokenGovernor()
+        agent = make_governed_agent(governor)
+        agent.message_history.append(MagicMock(content=[
+            {"type": "image_url", "image_url": {"url": "data:image/jpeg;base64,AAAA"}},
+            {"type": "text", "text": "view"},
+        ]))
+        governor.record(agent, response())
+        self.assertEqual(governor.totals()["images"], 1)
+
+
+# ---------------------------------------------------------------------------
+# adjustments
+# ---------------------------------------------------------------------------
+
+class TestAdjustments(unittest.TestCase):
+
+    def run_steps(self, governor, agent, steps, **usage):
+        changes = []
+        for _ in range(steps):
+            change = governor.record(agent, response(**usage))
+            if change:
+                changes.append(change)
+        return changes
+
+    def test_levers_applied_in_order_window_apart(self):
+        governor = TokenGovernor(max_reasoning_tokens_per_step=1000, window=2)
+        agent = make_governed_agent(governor)
+        agent.set_thinking_level = MagicMock(side_effect=lambda level: setattr(agent, "thinking_level", level))
+        changes = self.run_steps(governor, agent, 12, reasoning=5000)
+        self.assertEqual(changes[:4], [
+            "thinking level high -> medium",
+            "thinking level medium -> low",
+            "thinking level low -> minimal",
+            "history length None -> 8",
+        ])
+        self.assertEqual(agent.thinking_level, "minimal")
+        self.assertEqual(agent.history_len, 4)
+
+    def test_images_shrunk_after_other_levers(self):
+        governor = TokenGovernor(max_tokens_per_step=100, window=1, min_history_len=8, image_width=800)
+        agent = make_governed_agent(governor, thinking_level=None, history_len=8)
+        changes = self.run_steps(governor, agent, 2)
+        self.assertEqual(changes, ["image width limited to 800", "image width 800 -> 600"])
+        self.assertEqual(agent.current_image_budget().max_width, 600)
+
+    def test_latency_target(self):
+        governor = TokenGovernor(latency_target=1.0, window=1)
+        agent = make_governed_agent(governor, thinking_level="low")
+        agent.set_thinking_level = MagicMock()
+        governor.record(agent, response(), llm_latency=3.0)
+        agent.set_thinking_level.assert_called_once_with("minimal")
+
+    def test_reverts_last_change_when_well_under_budget(self):
+        governor = TokenGovernor(max_tokens_per_step=2000, window=1)
+        agent = make_governed_agent(governor, thinking_level=None, history_len=10)
+        self.assertEqual(governor.record(agent, response(input_tokens=5000)), "history length 10 -> 8")
+        self.assertEqual(governor.record(agent, response(input_tokens=100)), "restored after history length 10 -> 8")
+        self.assertEqual(agent.history_len, 10)
+
+    def test_task_budget_keeps_agent_stepped_down(self):
+        governor = TokenGovernor(max_tokens_per_task=3000, window=1)
+        agent = make_governed_agent(governor, thinking_level=None, history_len=6)
+        governor.record(agent, response(input_tokens=3500))
+        governor.record(agent, response(input_tokens=10))
+        self.assertEqual(agent.history_len, 2)
+
+    def test_agent_rebinds_llm_with_new_thinking_level(self):
+        with patch("robocrew.core.LLMAgent.init_chat_model") as mock_llm_factory:
+            agent = make_agent(thinking_level="high")
+            agent.set_thinking_level("low")
+        config = mock_llm_factory.call_args.kwargs["model_kwargs"]["generation_config"]
+        self.assertEqual(config["thinking_config"]["thinking_level"], "LOW")
+
+    def test_agent_step_prints_adjustment(self):
+        governor = TokenGovernor(max_tokens_per_step=10, window=1)
+        agent = make_governed_agent(governor, thinking_level=None, image_budget=ImageBudget(max_width=640))
+        agent.history_len = 2
+        agent.fetch_camera_images_base64 = MagicMock(return_value=["frame"])
+        agent.llm.invoke.return_value = response()
+        agent.main_loop_content()
+        self.assertEqual(agent.image_budget.max_width, 480)
+        self.assertGreater(governor.totals()["llm_seconds"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
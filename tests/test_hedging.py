@@ -0,0 +1,164 @@
+import os
+import sys
+import time
+import asyncio
+import unittest
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from langchain_core.messages import AIMessage
+
+from robocrew.core.hedging import HedgedInvoker, LLMDeadlineExceeded
+from test_llm_agent import make_agent
+
+
+class FakeLLM:
+    """Answers after `delay` seconds, raising the first `failures` times."""
+
+    def __init__(self, name, delay=0.0, failures=0):
+        self.name = name
+        self.delay = delay
+        self.failures = failures
+        self.calls = 0
+        self.cancelled = False
+
+    def invoke(self, messages):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.calls <= self.failures:
+            raise ConnectionError(f"{self.name} failed")
+        return AIMessage(content=self.name)
+
+    async def ainvoke(self, messages):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.calls <= self.failures:
+            raise ConnectionError(f"{self.name} failed")
+        return AIMessage(content=self.name)
+
+
+# ---------------------------------------------------------------------------
+# HedgedInvoker
+# ---------------------------------------------------------------------------
+
+class TestHedgedInvoker(unittest.TestCase):
+
+    def test_fast_primary_is_not_hedged(self):
+        backup = FakeLLM("backup")
+        invoker = HedgedInvoker(backup, hedge_delay=0.5)
+        self.assertEqual(invoker.invoke(FakeLLM("primary"), []).content, "primary")
+        self.assertEqual(backup.calls, 0)
+        self.assertEqual(invoker.last_stats["path"], "primary")
+        self.assertFalse(invoker.last_stats["hedged"])
+
+    def test_slow_primary_hedged_to_backup(self):
+        invoker = HedgedInvoker(FakeLLM("backup", delay=0.01), hedge_delay=0.05)
+        start = time.monotonic()
+        self.assertEqual(invoker.invoke(FakeLLM("primary", delay=1.0), []).content, "backup")
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(invoker.last_stats["path"], "backup")
+        self.assertTrue(invoker.last_stats["hedged"])
+        invoker.shutdown()
+
+    def test_abandoned_primary_latency_recorded(self):
+        invoker = HedgedInvoker(FakeLLM("backup"), hedge_delay=0.05)
+        invoker.invoke(FakeLLM("primary", delay=0.5), [])
+        # recorded when the backup won, not only once the primary returns
+        self.assertEqual(len(invoker.latencies), 1)
+        self.assertGreaterEqual(invoker.latencies[0], 0.05)
+        time.sleep(0.6)
+        self.assertEqual(len(invoker.latencies), 1)
+        invoker.shutdown()
+
+    def test_no_hedge_while_losers_hold_the_workers(self):
+        backup = FakeLLM("backup")
+        invoker = HedgedInvoker(backup, hedge_delay=0.02, max_in_flight=3)
+        invoker.invoke(FakeLLM("primary", delay=0.5), [])
+        self.assertEqual(backup.calls, 1)
+        # the first primary still runs, a second backup would leave no worker for the next primary
+        self.assertEqual(invoker.invoke(FakeLLM("primary", delay=0.1), []).content, "primary")
+        self.assertEqual(backup.calls, 1)
+        self.assertFalse(invoker.last_stats["hedged"])
+        invoker.shutdown()
+
+    def test_hedge_delay_follows_latency_percentile(self):
+        invoker = HedgedInvoker(hedge_percentile=90, min_samples=3, hedge_delay=9.0)
+        self.assertEqual(invoker.hedge_after(), 9.0)
+        invoker.latencies.extend([1.0] * 9 + [5.0])
+        self.assertEqual(invoker.hedge_after(), 1.0)
+        invoker.latencies.extend([5.0] * 2)
+        self.assertEqual(invoker.hedge_after(), 5.0)
+
+    def test_failed_primary_falls_back_to_backup_immediately(self):
+        invoker = HedgedInvoker(FakeLLM("backup"), hedge_delay=10.0)
+        self.assertEqual(invoker.invoke(FakeLLM("primary", failures=1), []).content, "backup")
+
+    def test_retries_with_exponential_backoff(self):
+        primary = FakeLLM("primary", failures=2)
+        invoker = HedgedInvoker(max_retries=2, backoff=0.02, backoff_factor=2.0)
+        start = time.monotonic()
+        self.assertEqual(invoker.invoke(primary, []).content, "primary")
+        self.assertGreaterEqual(time.monotonic() - start, 0.06)
+        self.assertEqual(invoker.last_stats["attempts"], 3)
+
+    def test_gives_up_after_max_retries(self):
+        invoker = HedgedInvoker(max_retries=1, backoff=0.0)
+        with self.assertRaises(ConnectionError):
+            invoker.invoke(FakeLLM("primary", failures=5), [])
+
+    def test_deadline(self):
+        invoker = HedgedInvoker(deadline=0.05)
+        start = time.monotonic()
+        with self.assertRaises(LLMDeadlineExceeded):
+            invoker.invoke(FakeLLM("primary", delay=1.0), [])
+        self.assertLess(time.monotonic() - start, 0.5)
+        invoker.shutdown()
+
+    def test_async_hedge_cancels_loser(self):
+        primary = FakeLLM("primary", delay=1.0)
+        invoker = HedgedInvoker(FakeLLM("backup"), hedge_delay=0.02)
+        response = asyncio.run(invoker.ainvoke(primary, []))
+        self.assertEqual(response.content, "backup")
+        self.assertTrue(primary.cancelled)
+        self.assertEqual(len(invoker.latencies), 1)  # cancelled primary still counts
+
+
+# ---------------------------------------------------------------------------
+# agent integration
+# ---------------------------------------------------------------------------
+
+class TestAgentHedging(unittest.TestCase):
+
+    def make_agent(self, **kwargs):
+        agent = make_agent(**kwargs)
+        agent.task = "explore"
+        agent.fetch_camera_images_base64 = MagicMock(return_value=["frame"])
+        return agent
+
+    def test_no_invoker_by_default(self):
+        self.assertIsNone(make_agent().hedged_invoker)
+
+    def test_backup_answer_used(self):
+        agent = self.make_agent(backup_model="backup-model")
+        agent.hedged_invoker.backup_llm = FakeLLM("backup")
+        agent.hedged_invoker.hedge_delay = 0.02
+        agent.llm = FakeLLM("primary", delay=1.0)
+        agent.main_loop_content()
+        self.assertEqual(agent.message_history[-1].content, "backup")
+        agent.cleanup()
+
+    def test_step_skipped_after_deadline(self):
+        agent = self.make_agent(llm_deadline=0.05)
+        agent.llm = FakeLLM("primary", delay=1.0)
+        agent.main_loop_content()
+        self.assertEqual(len(agent.message_history), 1)  # only the system message
+        agent.cleanup()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+import os
+import sys
+import base64
+import unittest
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+from robocrew.core.history import (
+    HistoryCompactor,
+    IMAGE_PLACEHOLDER,
+    estimate_message_size,
+    image_block_url,
+    is_image_block,
+    safe_cut_indices,
+)
+
+
+def make_data_url(width=640, height=480):
+    image = np.random.randint(0, 255, (height, width, 3), dtype=np.uint8)
+    _, buffer = cv2.imencode(".jpg", image)
+    return "data:image/jpeg;base64," + base64.b64encode(buffer).decode("utf-8")
+
+
+def observation(url):
+    return HumanMessage([
+        {"type": "text", "text": "Main camera view:"},
+        {"type": "image_url", "image_url": {"url": url}},
+    ])
+
+
+def build_history(n_steps):
+    """System message + n_steps of (observation, AI with one tool call, tool result)."""
+    messages = [SystemMessage("system")]
+    urls = []
+    for i in range(n_steps):
+        url = make_data_url()
+        urls.append(url)
+        messages.append(observation(url))
+        messages.append(AIMessage("", tool_calls=[{"name": "move", "args": {}, "id": f"call_{i}"}]))
+        messages.append(ToolMessage("moved", tool_call_id=f"call_{i}"))
+    return messages, urls
+
+
+def image_urls(message):
+    return [image_block_url(block) for block in message.content if is_image_block(block)]
+
+
+class TestSafeCutIndices(unittest.TestCase):
+
+    def test_extra_human_message_between_tool_results_is_not_a_cut(self):
+        messages = [
+            SystemMessage("system"),
+            HumanMessage("observation"),
+            AIMessage("", tool_calls=[
+                {"name": "look_around", "args": {}, "id": "a"},
+                {"name": "move", "args": {}, "id": "b"},
+            ]),
+            ToolMessage("looked", tool_call_id="a"),
+            HumanMessage("look around images"),
+            ToolMessage("moved", tool_call_id="b"),
+            HumanMessage("next observation"),
+        ]
+        self.assertEqual(safe_cut_indices(messages), [1, 6])
+
+
+class TestHistoryCompactor(unittest.TestCase):
+
+    def test_newest_images_kept_at_full_fidelity(self):
+        messages, urls = build_history(4)
+        current_url = make_data_url()
+        messages.append(observation(current_url))  # agent compacts right before the request
+        compacted = HistoryCompactor(full_image_steps=2).compact(messages)
+        self.assertEqual(image_urls(compacted[-1]), [current_url])
+        self.assertEqual(image_urls(compacted[-4]), [urls[-1]])
+        self.assertNotEqual(image_urls(compacted[-7]), [urls[-2]])
+
+    def test_older_images_become_thumbnails(self):
+        messages, urls = build_history(4)
+        compacted = HistoryCompactor(full_image_steps=2, thumbnail_steps=4, thumbnail_width=64).compact(messages)
+        thumbnail_url = image_urls(compacted[1])[0]
+        self.assertNotEqual(thumbnail_url, urls[0])
+        self.assertLess(len(thumbnail_url), len(urls[0]))
+        thumbnail = cv2.imdecode(np.frombuffer(base64.b64decode(thumbnail_url.split(",")[1]), np.uint8), cv2.IMREAD_COLOR)
+        self.assertEqual(thumbnail.shape[1], 64)
+
+    def test_oldest_images_become_placeholders(self):
+        messages, _ = build_history(4)
+        compacted = HistoryCompactor(full_image_steps=1, thumbnail_steps=1).compact(messages)
+        self.assertEqual(image_urls(compacted[1]), [])
+        self.assertIn(IMAGE_PLACEHOLDER, [block.get("text") for block in compacted[1].content])
+
+    def test_repeated_compaction_reuses_thumbnails(self):
+        messages, _ = build_history(4)
+        compactor = HistoryCompactor(full_image_steps=2)
+        once = compactor.compact(messages)
+        twice = compactor.compact(once)
+        self.assertEqual(image_urls(once[1]), image_urls(twice[1]))
+
+    def test_budget_drops_oldest_steps_and_keeps_pairs(self):
+        messages, urls = build_history(5)
+        per_step = estimate_message_size(messages[-3])[0]
+        compactor = HistoryCompactor(full_image_steps=10, max_bytes=int(per_step * 2.5))
+        compacted = compactor.compact(messages)
+        self.assertEqual(compacted[0].type, "system")
+        self.assertEqual(compacted[1].type, "human")
+        self.assertLessEqual(compactor.last_stats["bytes"], int(per_step * 2.5))
+        self.assertEqual(image_urls(compacted[-3]), [urls[-1]])
+        tool_ids = {m.tool_call_id for m in compacted if m.type == "tool"}
+        call_ids = {c["id"] for m in compacted if m.type == "ai" for c in m.tool_calls}
+        self.assertEqual(tool_ids, call_ids)
+
+    def test_original_messages_not_modified(self):
+        messages, urls = build_history(4)
+        HistoryCompactor(full_image_steps=1, thumbnail_steps=0).compact(messages)
+        self.assertEqual(image_urls(messages[1]), [urls[0]])
+
+
+if __name__ == "__main__":
+    unittest.main()
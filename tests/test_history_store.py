@@ -0,0 +1,122 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from langchain_core.messages import AIMessage
+
+from robocrew.core.history import IMAGE_PLACEHOLDER, estimate_message_size
+from robocrew.core.history_store import BlobStore, MessageArchive
+from test_history import build_history, image_urls, make_data_url
+from test_llm_agent import make_agent
+
+
+def total_bytes(messages):
+    return sum(estimate_message_size(message)[0] for message in messages)
+
+
+# ---------------------------------------------------------------------------
+# BlobStore
+# ---------------------------------------------------------------------------
+
+class TestBlobStore(unittest.TestCase):
+
+    def test_round_trip_and_deduplication(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = BlobStore(tmp)
+            digest = store.put(b"frame")
+            self.assertEqual(store.put(b"frame"), digest)
+            self.assertIn(digest, store)
+            self.assertEqual(store.get(digest), b"frame")
+            blob_files = [name for _, _, names in os.walk(tmp) for name in names]
+            self.assertEqual(len(blob_files), 1)
+
+
+# ---------------------------------------------------------------------------
+# MessageArchive
+# ---------------------------------------------------------------------------
+
+class TestMessageArchive(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.messages, self.urls = build_history(6)
+        self.image_bytes = len(self.urls[0])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_under_cap_is_untouched(self):
+        archive = MessageArchive(self.tmp.name, max_bytes=10 ** 9)
+        self.assertEqual(archive.spill(self.messages), self.messages)
+        self.assertEqual(archive.last_stats["spilled_images"], 0)
+
+    def test_old_images_spilled_and_restored(self):
+        archive = MessageArchive(self.tmp.name, max_bytes=self.image_bytes * 3, keep_steps=2)
+        kept = archive.spill(self.messages)
+        self.assertEqual(len(kept), len(self.messages))
+        self.assertLessEqual(total_bytes(kept), archive.max_bytes)
+        self.assertEqual(image_urls(kept[1]), [])
+        self.assertEqual(kept[1].content[1]["text"], IMAGE_PLACEHOLDER)
+        self.assertEqual(image_urls(archive.restore(kept[1])), [self.urls[0]])
+        # newest steps keep their images
+        self.assertEqual(image_urls(kept[-3]), [self.urls[-1]])
+        self.assertEqual(image_urls(kept[-6]), [self.urls[-2]])
+
+    def test_oldest_steps_archived_when_still_over_cap(self):
+        archive = MessageArchive(self.tmp.name, max_bytes=self.image_bytes * 2 + 200, keep_steps=2)
+        for i in range(6, 12):
+            self.messages.append(AIMessage("x" * 2000))
+        kept = archive.spill(self.messages)
+        self.assertEqual(kept[0], self.messages[0])
+        self.assertEqual(kept[1].type, "human")  # tool call pairs are never separated
+        archived = list(archive.archived_messages())
+        self.assertEqual(len(archived), archive.archived_count)
+        self.assertEqual(len(archived) + len(kept), len(self.messages))
+        restored = list(archive.archived_messages(restore_images=True))
+        self.assertEqual(image_urls(restored[0]), [self.urls[0]])
+
+    def test_keep_no_steps(self):
+        archive = MessageArchive(self.tmp.name, max_bytes=0, keep_steps=0)
+        kept = archive.spill(self.messages)
+        self.assertEqual(sum(len(image_urls(message)) for message in kept), 0)
+        self.assertEqual(archive.last_stats["spilled_images"], 6)
+
+    def test_spilled_images_shared_between_messages_stored_once(self):
+        url = make_data_url()
+        messages, _ = build_history(4)
+        for message in messages[1:7:3]:
+            message.content[1]["image_url"]["url"] = url
+        archive = MessageArchive(self.tmp.name, max_bytes=0, keep_steps=1)
+        archive.spill(messages)
+        digests = {message_digest for message in archive.archived_messages()
+                   for message_digest in message.response_metadata.get("spilled_images", {}).values()}
+        self.assertEqual(len(digests), 2)
+
+
+# ---------------------------------------------------------------------------
+# agent integration
+# ---------------------------------------------------------------------------
+
+class TestAgentHistoryArchive(unittest.TestCase):
+
+    def test_history_stays_under_cap_during_long_run(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            frame = make_data_url().split(",", 1)[1]
+            archive = MessageArchive(tmp, max_bytes=len(frame) * 3)
+            agent = make_agent(history_archive=archive)
+            agent.task = "patrol"
+            agent.fetch_camera_images_base64 = MagicMock(return_value=[frame])
+            agent.llm.invoke.return_value = AIMessage(content="Looking.")
+            for _ in range(10):
+                agent.main_loop_content()
+            self.assertLessEqual(total_bytes(agent.message_history), archive.max_bytes + 1000)
+            images_in_ram = sum(len(image_urls(message)) for message in agent.message_history if message.type == "human")
+            self.assertEqual(images_in_ram, archive.keep_steps)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from robocrew.core.image_budget import ImageBudget, align_to_tiles, estimate_image_tokens
+from test_llm_agent import make_agent
+
+
+def frame(width=640, height=480):
+    image = np.zeros((height, width, 3), np.uint8)
+    cv2.rectangle(image, (width // 4, height // 4), (width // 2, height // 2), (0, 200, 255), -1)
+    return image
+
+
+def decode(jpeg_bytes):
+    return cv2.imdecode(np.frombuffer(jpeg_bytes, np.uint8), cv2.IMREAD_UNCHANGED)
+
+
+# ---------------------------------------------------------------------------
+# token estimates and tile alignment
+# ---------------------------------------------------------------------------
+
+class TestTokenEstimate(unittest.TestCase):
+
+    def test_openai_tiles(self):
+        self.assertEqual(estimate_image_tokens(512, 512, "openai"), 85 + 170)
+        self.assertEqual(estimate_image_tokens(640, 480, "openai"), 85 + 170 * 2)
+        # downscaled to 768 px shortest side first: 1024x768 -> 2x2 tiles
+        self.assertEqual(estimate_image_tokens(2048, 1536, "openai"), 85 + 170 * 4)
+
+    def test_gemini_tiles(self):
+        self.assertEqual(estimate_image_tokens(384, 288, "google_genai"), 258)
+        self.assertEqual(estimate_image_tokens(1280, 720, "google_genai"), 2 * 258)
+
+    def test_anthropic_area(self):
+        self.assertEqual(estimate_image_tokens(750, 100, "anthropic"), 100)
+
+    def test_align_drops_tile_column(self):
+        self.assertEqual(align_to_tiles(600, 450, 512), (512, 384))
+
+    def test_align_keeps_size_when_shrink_too_big(self):
+        self.assertEqual(align_to_tiles(1000, 400, 512), (1000, 400))
+
+
+# ---------------------------------------------------------------------------
+# ImageBudget
+# ---------------------------------------------------------------------------
+
+class TestImageBudget(unittest.TestCase):
+
+    def test_downscale_aligned_to_provider_tiles(self):
+        budget = ImageBudget(max_width=600, provider="openai")
+        image = decode(budget.encode(frame()))
+        self.assertEqual(image.shape[:2], (384, 512))
+        self.assertEqual(budget.last_stats["tokens"], 85 + 170)
+        self.assertEqual(budget.last_stats["native_tokens"], 85 + 170 * 2)
+
+    def test_never_upscales(self):
+        budget = ImageBudget(max_width=1280)
+        self.assertEqual(decode(budget.encode(frame(320, 240))).shape[:2], (240, 320))
+
+    def test_quality_reduces_bytes(self):
+        noisy = np.random.default_rng(0).integers(0, 255, (240, 320, 3), dtype=np.uint8)
+        high = ImageBudget(quality=95).encode(noisy)
+        low = ImageBudget(quality=40).encode(noisy)
+        self.assertLess(len(low), len(high))
+
+    def test_grayscale_and_roi(self):
+        budget = ImageBudget(grayscale=True, roi=(0, 0.5, 1, 1))
+        image = decode(budget.encode(frame()))
+        self.assertEqual(image.shape, (240, 640))
+
+
+# ---------------------------------------------------------------------------
+# agent integration
+# ---------------------------------------------------------------------------
+
+class TestAgentImageBudget(unittest.TestCase):
+
+    def test_budget_per_navigation_mode(self):
+        normal, precision = ImageBudget(max_width=512), ImageBudget(max_width=1024, quality=95)
+        agent = make_agent(image_budget={"normal": normal, "precision": precision})
+        self.assertIs(agent.current_image_budget(), normal)
+        agent.navigation_mode = "precision"
+        self.assertIs(agent.current_image_budget(), precision)
+
+    def test_provider_filled_from_model_name(self):
+        budget = ImageBudget(max_width=512)
+        with patch("robocrew.core.LLMAgent.init_chat_model"):
+            from robocrew.core.LLMAgent import LLMAgent
+            LLMAgent(model="google_genai:gemini-3-flash-preview", tools=[], main_camera=MagicMock(), image_budget=budget)
+        self.assertEqual(budget.provider, "google_genai")
+
+    def test_camera_receives_budget(self):
+        budget = ImageBudget(max_width=512)
+        agent = make_agent(image_budget=budget)
+        agent.fetch_camera_images_base64()
+        self.assertIs(agent.main_camera.capture_payload.call_args.kwargs["budget"], budget)
+
+    def test_encode_frame_without_budget_keeps_native_size(self):
+        agent = make_agent()
+        self.assertEqual(decode(agent.encode_frame(frame())).shape[:2], (480, 640))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import os
+import sys
+import base64
+import time
+import unittest
+from unittest.mock import patch
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from robocrew.core.image_budget import ImageBudget
+from robocrew.core.image_payload import ImagePayload, as_image_payload, image_base64, image_data_url
+from robocrew.core.progress import frame_hash, hamming_distance
+from test_llm_agent import make_agent
+
+
+def frame(width=640, height=480):
+    image = np.zeros((height, width, 3), np.uint8)
+    cv2.rectangle(image, (width // 4, height // 4), (width // 2, height // 2), (0, 200, 255), -1)
+    return image
+
+
+def jpeg_base64(image):
+    return base64.b64encode(cv2.imencode(".jpg", image)[1]).decode("utf-8")
+
+
+# ---------------------------------------------------------------------------
+# ImagePayload
+# ---------------------------------------------------------------------------
+
+class TestImagePayload(unittest.TestCase):
+
+    def test_frame_encoded_once(self):
+        image = ImagePayload(frame=frame())
+        with patch("robocrew.core.image_payload.cv2.imencode", wraps=cv2.imencode) as imencode:
+            self.assertIs(image.jpeg, image.jpeg)
+            self.assertIs(image.base64, image.base64)
+            self.assertEqual(image.data_url, f"data:image/jpeg;base64,{image.base64}")
+        self.assertEqual(imencode.call_count, 1)
+        self.assertTrue(image.has_frame)
+
+    def test_from_base64_keeps_string_and_decodes_lazily(self):
+        data = jpeg_base64(frame())
+        image = ImagePayload.from_base64(data)
+        self.assertIs(image.base64, data)
+        self.assertFalse(image.has_frame)
+        self.assertEqual(image.frame.shape, (480, 640, 3))
+        self.assertTrue(image.has_frame)
+
+    def test_budget_used_for_encoding(self):
+        image = ImagePayload(frame=frame(), budget=ImageBudget(max_width=320))
+        decoded = cv2.imdecode(np.frombuffer(image.jpeg, np.uint8), cv2.IMREAD_COLOR)
+        self.assertEqual(decoded.shape[1], 320)
+
+    def test_thumbnail_made_once(self):
+        image = ImagePayload(frame=frame())
+        thumbnail = image.thumbnail(160)
+        self.assertEqual(thumbnail.frame.shape[:2], (120, 160))
+        self.assertIs(image.thumbnail(160), thumbnail)
+        self.assertIs(image.thumbnail(1000), image)
+
+    def test_needs_some_image(self):
+        with self.assertRaises(ValueError):
+            ImagePayload()
+
+    def test_helpers_accept_base64_strings(self):
+        data = jpeg_base64(frame())
+        image = ImagePayload.from_base64(data)
+        self.assertIs(as_image_payload(image), image)
+        self.assertEqual(as_image_payload(data).base64, data)
+        self.assertIs(image_base64(data), data)
+        self.assertEqual(image_data_url(data), image_data_url(image))
+
+    def test_frame_hash_without_decoding(self):
+        image = ImagePayload(frame=frame())
+        self.assertLessEqual(hamming_distance(frame_hash(image), frame_hash(image.base64)), 2)
+
+
+# ---------------------------------------------------------------------------
+# agent
+# ---------------------------------------------------------------------------
+
+class TestAgentImages(unittest.TestCase):
+
+    def test_request_uses_payload_data_url(self):
+        agent = make_agent()
+        image = ImagePayload(frame=frame())
+        agent.main_camera.capture_payload.return_value = image
+        agent.task = "explore"
+        content = agent.observation_content(agent.capture_observation())
+        self.assertIs(content[1]["image_url"]["url"], image.data_url)
+
+    def test_display_image_reuses_recent_step(self):
+        agent = make_agent()
+        image = ImagePayload(frame=frame())
+        agent.last_observation = {"captured_at": time.monotonic(), "camera_images": [image], "lidar_scan": None}
+        self.assertIs(agent.display_image(), image)
+        agent.main_camera.capture_payload.assert_not_called()
+
+    def test_display_image_captures_when_stale(self):
+        agent = make_agent()
+        agent.last_observation = {"captured_at": time.monotonic() - 5, "camera_images": ["old"], "lidar_scan": None}
+        fresh = ImagePayload(frame=frame())
+        agent.main_camera.capture_payload.return_value = fresh
+        self.assertIs(agent.display_image(), fresh)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -13,11 +13,11 @@ from langchain_core.messages import HumanMessage, SystemMessage, ToolMessage
 # Helper: build a minimal LLMAgent without real hardware or LLM API calls
 # ---------------------------------------------------------------------------
 
-def make_agent():
+def make_agent(**kwargs):
     """
     Construct an LLMAgent with all hardware and LLM calls mocked out.
     - init_chat_model is patched so no API key is needed.
-    - main_camera is a MagicMock (never used in unit tests).
+    - main_camera is a MagicMock unless given.
     - No sound device, no TTS, no LiDAR, no servo.
     """
     with patch("robocrew.core.LLMAgent.init_chat_model") as mock_llm_factory:
@@ -27,11 +27,12 @@ def make_agent():
         agent = LLMAgent(
             model="fake-model",
             tools=[],
-            main_camera=MagicMock(),
+            main_camera=kwargs.pop("main_camera", MagicMock()),
             sounddevice_index_or_alias=None,
             tts=False,
             lidar_usb_port=None,
             servo_controler=None,
+            **kwargs,
         )
     return agent
 
@@ -213,6 +214,199 @@ class TestInvokeTool(unittest.TestCase):
         tool_msg, _ = agent.invoke_tool({"name": "look_around", "args": {}, "id": "c3"})
         self.assertEqual(tool_msg.content, "Looked around")
 
+    def test_artifact_kept_on_tool_message(self):
+        """A third tuple element (e.g. look_around timings) goes to the ToolMessage artifact, not the content."""
+        agent = make_agent()
+        timings = {"total": 1.2}
+        mock_tool = self._make_mock_tool("look_around", ("Looked around", [{"type": "text", "text": "Left"}], timings))
+        agent.tool_name_to_tool = {"look_around": mock_tool}
+        tool_msg, additional = agent.invoke_tool({"name": "look_around", "args": {}, "id": "c4"})
+        self.assertEqual(tool_msg.content, "Looked around")
+        self.assertEqual(tool_msg.artifact, timings)
+        self.assertIsInstance(additional, HumanMessage)
+
+
+# ---------------------------------------------------------------------------
+# observation prefetch
+# ---------------------------------------------------------------------------
+
+class TestObservationPrefetch(unittest.TestCase):
+
+    def _observation(self, captured_at, image="img"):
+        return {"captured_at": captured_at, "camera_images": [image], "lidar_scan": None}
+
+    def test_prefetch_disabled_by_default(self):
+        agent = make_agent()
+        agent.prefetch_observation()
+        self.assertIsNone(agent.prefetch_executor)
+        self.assertIsNone(agent.prefetch_future)
+
+    def test_uses_prefetched_observation_captured_after_motion(self):
+        agent = make_agent(prefetch_observations=True)
+        agent.last_motion_end = 10.0
+        future = MagicMock()
+        future.result.return_value = self._observation(11.0, "prefetched")
+        agent.prefetch_future = future
+        agent.capture_observation = MagicMock(return_value=self._observation(12.0, "fresh"))
+        observation = agent.next_observation()
+        self.assertEqual(observation["camera_images"], ["prefetched"])
+        agent.capture_observation.assert_not_called()
+
+    def test_recaptures_when_prefetched_observation_is_stale(self):
+        agent = make_agent(prefetch_observations=True)
+        agent.last_motion_end = 10.0
+        future = MagicMock()
+        future.result.return_value = self._observation(9.0, "stale")
+        agent.prefetch_future = future
+        agent.capture_observation = MagicMock(return_value=self._observation(12.0, "fresh"))
+        observation = agent.next_observation()
+        self.assertEqual(observation["camera_images"], ["fresh"])
+        self.assertIsNone(agent.prefetch_future)
+
+    def test_prefetch_runs_capture_on_background_worker(self):
+        agent = make_agent(prefetch_observations=True)
+        agent.fetch_camera_images_base64 = MagicMock(return_value=["bg"])
+        agent.prefetch_observation()
+        observation = agent.prefetch_future.result(timeout=5)
+        self.assertEqual(observation["camera_images"], ["bg"])
+        agent.cleanup()
+
+    def test_main_loop_prefetches_next_observation_after_tools(self):
+        agent = make_agent(prefetch_observations=True)
+        agent.task = "explore"
+        agent.fetch_camera_images_base64 = MagicMock(return_value=["frame"])
+        response = MagicMock()
+        response.content = ""
+        response.usage_metadata = {}
+        response.tool_calls = [{"name": "move_tool", "args": {}, "id": "c1"}]
+        agent.llm.invoke.return_value = response
+        move_tool = MagicMock()
+        move_tool.name = "move_tool"
+        move_tool.invoke.return_value = "moved"
+        agent.tool_name_to_tool = {"move_tool": move_tool}
+        agent.main_loop_content()
+        observation = agent.prefetch_future.result(timeout=5)
+        self.assertGreaterEqual(observation["captured_at"], agent.last_motion_end)
+        agent.cleanup()
+
+    def test_prefetch_kept_after_step_without_motion(self):
+        agent = make_agent(prefetch_observations=True)
+        pending = agent.prefetch_future = MagicMock()
+        tool_call = {"name": "check_tool", "args": {}, "id": "c1"}
+        agent.tool_call_resources = MagicMock(return_value=frozenset())
+        agent.add_tool_results([tool_call], [(ToolMessage("ok", tool_call_id="c1"), None)])
+        self.assertIs(agent.prefetch_future, pending)
+        agent.tool_call_resources = MagicMock(return_value=None)  # undeclared tools may move the robot
+        agent.add_tool_results([tool_call], [(ToolMessage("ok", tool_call_id="c1"), None)])
+        self.assertIsNot(agent.prefetch_future, pending)
+        agent.cleanup()
+
+
+# ---------------------------------------------------------------------------
+# parallel tool execution
+# ---------------------------------------------------------------------------
+
+class TestParallelTools(unittest.TestCase):
+
+    def _make_tool(self, name, return_value, resources=None):
+        t = MagicMock()
+        t.name = name
+        t.metadata = {"resources": resources} if resources is not None else None
+        t.invoke.return_value = return_value
+        return t
+
+    def test_sequential_by_default(self):
+        agent = make_agent()
+        self.assertIsNone(agent.tool_executor)
+
+    def test_results_appended_in_original_order(self):
+        agent = make_agent(parallel_tools=True)
+        agent.tool_name_to_tool = {
+            "say": self._make_tool("say", "said", frozenset({"speaker"})),
+            "move": self._make_tool("move", "moved", frozenset({"wheels"})),
+        }
+        results = agent.invoke_tools([
+            {"name": "say", "args": {}, "id": "a"},
+            {"name": "move", "args": {}, "id": "b"},
+        ])
+        self.assertEqual([msg.tool_call_id for msg, _ in results], ["a", "b"])
+        self.assertEqual([msg.content for msg, _ in results], ["said", "moved"])
+        agent.cleanup()
+
+    def test_speech_only_is_not_motion(self):
+        agent = make_agent()
+        agent.tool_name_to_tool = {
+            "say": self._make_tool("say", "said", frozenset({"speaker"})),
+            "custom": self._make_tool("custom", "done"),
+        }
+        self.assertFalse(agent.is_motion_call({"name": "say"}))
+        self.assertTrue(agent.is_motion_call({"name": "custom"}))
+
+
+# ---------------------------------------------------------------------------
+# streamed responses
+# ---------------------------------------------------------------------------
+
+class TestStreamResponse(unittest.TestCase):
+
+    def _make_tool(self, name, return_value):
+        t = MagicMock()
+        t.name = name
+        t.metadata = None
+        t.invoke.return_value = return_value
+        return t
+
+    def _chunks(self):
+        from langchain_core.messages import AIMessageChunk
+        return [
+            AIMessageChunk(content="Going."),
+            AIMessageChunk(content="", tool_call_chunks=[
+                {"index": 0, "name": "move", "args": "{}", "id": "a", "type": "tool_call_chunk"}]),
+            AIMessageChunk(content="", tool_call_chunks=[
+                {"index": 1, "name": "finish_task", "args": '{"report": "ok"}', "id": "b", "type": "tool_call_chunk"}]),
+            AIMessageChunk(content="", tool_call_chunks=[
+                {"index": 2, "name": "move", "args": "{}", "id": "c", "type": "tool_call_chunk"}]),
+        ]
+
+    def test_streaming_uses_sequential_executor(self):
+        agent = make_agent(stream_response=True)
+        self.assertIsNotNone(agent.tool_executor)
+        self.assertTrue(agent.tool_executor.get_resources({"name": "say"}) is None)
+        agent.cleanup()
+
+    def test_tool_starts_before_stream_ends(self):
+        agent = make_agent(stream_response=True)
+        move = self._make_tool("move", "moved")
+        agent.tool_name_to_tool = {"move": move}
+        chunks = self._chunks()[:2]
+
+        def stream(messages):
+            yield chunks[0]
+            yield chunks[1]
+            agent.tool_executor.pending[0][1].result(timeout=5)
+            self.assertTrue(move.invoke.called)
+
+        agent.llm.stream.side_effect = stream
+        response, started = agent.stream_llm([])
+        self.assertEqual([c["id"] for c in started], ["a"])
+        self.assertEqual(response.content, "Going.")
+        agent.tool_executor.collect()
+        agent.cleanup()
+
+    def test_calls_after_finish_task_not_started(self):
+        agent = make_agent(stream_response=True)
+        agent.task = "explore"
+        agent.fetch_camera_images_base64 = MagicMock(return_value=["frame"])
+        move = self._make_tool("move", "moved")
+        agent.tool_name_to_tool = {"move": move, "finish_task": self._make_tool("finish_task", "ok")}
+        agent.llm.stream.return_value = iter(self._chunks())
+        report = agent.main_loop_content()
+        self.assertEqual(report, "ok")
+        self.assertEqual(move.invoke.call_count, 1)
+        tool_ids = [m.tool_call_id for m in agent.message_history if isinstance(m, ToolMessage)]
+        self.assertEqual(tool_ids, ["a", "b"])
+        agent.cleanup()
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,152 @@
+import os
+import sys
+import time
+import asyncio
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from langchain_core.messages import AIMessage
+
+from robocrew.core.llm_scheduler import LLMScheduler, default_scheduler
+from test_llm_agent import make_agent
+
+
+def hold_slot(scheduler, provider, seconds, **kwargs):
+    def run():
+        with scheduler.slot(provider, **kwargs):
+            time.sleep(seconds)
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def wait_until_waiting(scheduler, provider, count):
+    deadline = time.monotonic() + 2
+    while len(scheduler.waiting[provider]) < count and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+
+# ---------------------------------------------------------------------------
+# LLMScheduler
+# ---------------------------------------------------------------------------
+
+class TestLLMScheduler(unittest.TestCase):
+
+    def test_concurrency_limit_per_provider(self):
+        scheduler = LLMScheduler(default_concurrency=1)
+        holder = hold_slot(scheduler, "openai", 0.1)
+        time.sleep(0.02)
+        with scheduler.slot("google_genai") as other_provider:
+            self.assertLess(other_provider.queue_delay, 0.05)
+        with scheduler.slot("openai") as ticket:
+            self.assertGreater(ticket.queue_delay, 0.05)
+        holder.join()
+
+    def test_executor_before_planner(self):
+        scheduler = LLMScheduler(default_concurrency=1)
+        order = []
+        holder = hold_slot(scheduler, "openai", 0.1)
+        time.sleep(0.02)
+
+        def request(priority):
+            with scheduler.slot("openai", priority):
+                order.append(priority)
+
+        planner = threading.Thread(target=request, args=("planner",))
+        planner.start()
+        wait_until_waiting(scheduler, "openai", 1)
+        executor = threading.Thread(target=request, args=("executor",))
+        executor.start()
+        wait_until_waiting(scheduler, "openai", 2)
+        for thread in (holder, planner, executor):
+            thread.join()
+        self.assertEqual(order, ["executor", "planner"])
+
+    def test_tokens_per_minute(self):
+        scheduler = LLMScheduler()
+        scheduler.configure("openai", tokens_per_minute=1000)
+        with patch("robocrew.core.llm_scheduler.TOKEN_WINDOW", 0.1):
+            with scheduler.slot("openai", tokens=100) as ticket:
+                ticket.tokens = 900  # real usage reported after the response
+            with scheduler.slot("openai", tokens=50) as fits:
+                pass
+            with scheduler.slot("openai", tokens=200) as over_budget:
+                pass
+        self.assertLess(fits.queue_delay, 0.05)
+        self.assertGreater(over_budget.queue_delay, 0.05)
+
+    def test_oversized_request_granted_on_empty_window(self):
+        scheduler = LLMScheduler()
+        scheduler.configure("openai", tokens_per_minute=10)
+        with scheduler.slot("openai", tokens=10_000) as ticket:
+            self.assertLess(ticket.queue_delay, 0.05)
+
+    def test_async_slot_does_not_block_event_loop(self):
+        scheduler = LLMScheduler(default_concurrency=1)
+
+        async def run():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0.01)
+
+            tick_task = asyncio.create_task(ticker())
+            holder = hold_slot(scheduler, "openai", 0.1)
+            await asyncio.sleep(0.02)
+            async with scheduler.aslot("openai") as ticket:
+                delay = ticket.queue_delay
+            tick_task.cancel()
+            await asyncio.to_thread(holder.join)
+            return delay, ticks
+
+        delay, ticks = asyncio.run(run())
+        self.assertGreater(delay, 0.05)
+        self.assertGreater(ticks, 5)
+
+    def test_stats(self):
+        scheduler = LLMScheduler()
+        with scheduler.slot("openai", "planner"):
+            pass
+        stats = scheduler.stats()
+        self.assertEqual(stats["queue_delay"]["openai/1"]["count"], 1)
+        self.assertEqual(stats["load"]["openai"], {"running": 0, "waiting": 0})
+
+
+# ---------------------------------------------------------------------------
+# agent integration
+# ---------------------------------------------------------------------------
+
+class TestAgentScheduling(unittest.TestCase):
+
+    def test_agents_share_default_scheduler(self):
+        self.assertIs(make_agent().llm_scheduler, default_scheduler)
+
+    def test_default_scheduler_has_no_cap_until_configured(self):
+        scheduler = LLMScheduler(default_concurrency=None)
+        tickets = [scheduler.acquire("google_genai") for _ in range(10)]
+        self.assertEqual(scheduler.running["google_genai"], 10)
+        for ticket in tickets:
+            scheduler.release(ticket)
+        self.assertIsNone(default_scheduler.provider_limits("google_genai")["concurrency"])
+
+    def test_call_goes_through_scheduler_with_priority(self):
+        scheduler = LLMScheduler()
+        scheduler.slot = MagicMock(wraps=scheduler.slot)
+        agent = make_agent(llm_scheduler=scheduler, llm_priority="planner")
+        agent.llm.invoke.return_value = AIMessage(content="ok", usage_metadata={
+            "input_tokens": 90, "output_tokens": 10, "total_tokens": 100,
+        })
+        agent.call_llm()
+        provider, priority, _ = scheduler.slot.call_args.args
+        self.assertEqual(priority, "planner")
+        self.assertEqual(scheduler.token_windows["default"][0][1], 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
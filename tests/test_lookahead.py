@@ -0,0 +1,164 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from langchain_core.messages import AIMessage
+
+from robocrew.core.async_agent import AsyncLLMAgent
+from robocrew.core.lookahead import SubtaskLookahead, report_as_expected
+from robocrew.core.replay import StepRecorder, load_trace
+from robocrew.core.tools import create_execute_subtask, finish_task
+from test_llm_agent import make_agent
+
+
+def make_executor(report, steps=3):
+    """Executor finishing its subtask after `steps` steps with `report`."""
+    executor = MagicMock()
+    executor.task = None
+    executor.last_observation = {"captured_at": 0.0, "camera_images": ["executor_view"], "lidar_scan": None}
+    remaining = []
+
+    def step():
+        if not remaining:
+            remaining.extend(range(steps))
+        remaining.pop()
+        if remaining:
+            return None
+        executor.task = None
+        return report
+
+    executor.main_loop_content.side_effect = step
+    return executor
+
+
+def tool_call(name, call_id, **args):
+    return {"name": name, "args": args, "id": call_id, "type": "tool_call"}
+
+
+def make_planner(lookahead, executor, planned=None, **kwargs):
+    """Planner delegating the first step; the lookahead request gets `planned`, later steps get REPLAN."""
+    planner = make_agent(lookahead=lookahead, **kwargs)
+    execute_subtask = create_execute_subtask(executor, lookahead=lookahead)
+    planner.tool_name_to_tool = {"execute_subtask": execute_subtask, "finish_task": finish_task}
+    planner.fetch_camera_images_base64 = MagicMock(return_value=["planner_view"])
+
+    def respond(messages):
+        if len(messages) <= 2:
+            return DELEGATE
+        if "still running" in str(messages[-1].content):
+            if isinstance(planned, Exception):
+                raise planned
+            return planned
+        return REPLAN
+
+    planner.llm.invoke.side_effect = respond
+    planner.task = "Clean the table"
+    return planner
+
+
+DELEGATE = AIMessage(content="", tool_calls=[
+    tool_call("execute_subtask", "call_1", reasoning="cup on table", subtask="Pick up the cup"),
+])
+FINISH = AIMessage(content="", tool_calls=[tool_call("finish_task", "call_2", report="Table is clean")])
+REPLAN = AIMessage(content="", tool_calls=[tool_call("finish_task", "call_3", report="Gave up")])
+
+
+# ---------------------------------------------------------------------------
+# report_as_expected
+# ---------------------------------------------------------------------------
+
+class TestReportCheck(unittest.TestCase):
+
+    def test_success_and_failure_reports(self):
+        self.assertTrue(report_as_expected("Pick up the cup", "Cup picked up"))
+        self.assertFalse(report_as_expected("Pick up the cup", "Could not reach the cup"))
+        self.assertFalse(report_as_expected("Pick up the cup", None))
+
+
+# ---------------------------------------------------------------------------
+# SubtaskLookahead with a planner
+# ---------------------------------------------------------------------------
+
+class TestSubtaskLookahead(unittest.TestCase):
+
+    def test_planned_step_used_when_report_as_expected(self):
+        lookahead = SubtaskLookahead()
+        planner = make_planner(lookahead, make_executor("Cup picked up"), FINISH)
+        planner.main_loop_content()
+        self.assertEqual(planner.main_loop_content(), "Table is clean")
+        self.assertEqual(planner.llm.invoke.call_count, 2)
+        planner.fetch_camera_images_base64.assert_called_once()
+        self.assertEqual(lookahead.stats["accepted"], 1)
+        # the real report is in the history, followed by the executor view the step was planned on
+        tool_message, observation, response = planner.message_history[-4:-1]
+        self.assertEqual(tool_message.content, "Cup picked up")
+        self.assertIn("executor_view", observation.content[1]["image_url"]["url"])
+        self.assertNotIn("still running", observation.content[-1]["text"])
+        self.assertIn("before 'Pick up the cup' finished", observation.content[-1]["text"])
+        self.assertIs(response, FINISH)
+
+    def test_planned_step_bookkeeping(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "trace.jsonl.gz")
+            lookahead = SubtaskLookahead()
+            executor = make_executor("Cup picked up")
+            planner = make_planner(lookahead, executor, FINISH, step_recorder=StepRecorder(path))
+            planner.compact_history = MagicMock()
+            planner.main_loop_content()
+            planner.main_loop_content()
+            planner.cleanup()
+            steps = load_trace(path)
+        self.assertEqual(len(steps), 2)
+        self.assertEqual(steps[1]["observation"]["camera_images"], ["executor_view"])
+        self.assertEqual(steps[1]["timings"]["llm"], 0.0)
+        self.assertIsNotNone(steps[1]["timings"]["lookahead_llm"])
+        self.assertIs(planner.last_observation, executor.last_observation)
+        self.assertEqual(planner.compact_history.call_count, 2)
+
+    def test_planner_sees_expected_report(self):
+        lookahead = SubtaskLookahead()
+        planner = make_planner(lookahead, make_executor("Cup picked up"), FINISH)
+        planner.main_loop_content()
+        lookahead.ready.future.result()
+        lookahead_request = planner.llm.invoke.call_args_list[1].args[0]
+        self.assertEqual(lookahead_request[-2].content, "Subtask 'Pick up the cup' finished as expected.")
+
+    def test_replans_when_report_unexpected(self):
+        lookahead = SubtaskLookahead()
+        planner = make_planner(lookahead, make_executor("Could not find the cup"), FINISH)
+        planner.main_loop_content()
+        self.assertEqual(planner.main_loop_content(), "Gave up")
+        self.assertEqual(lookahead.stats["rejected"], 1)
+
+    def test_no_lookahead_for_single_step_subtask(self):
+        lookahead = SubtaskLookahead()
+        planner = make_planner(lookahead, make_executor("Cup picked up", steps=1))
+        planner.main_loop_content()
+        self.assertEqual(planner.main_loop_content(), "Gave up")
+        self.assertEqual(lookahead.stats["accepted"], 0)
+
+    def test_planned_step_dropped_after_task_change(self):
+        lookahead = SubtaskLookahead()
+        planner = make_planner(lookahead, make_executor("Cup picked up"), FINISH)
+        planner.main_loop_content()
+        planner.task = "Water the plants"
+        self.assertEqual(planner.main_loop_content(), "Gave up")
+
+    def test_failed_planning_falls_back(self):
+        lookahead = SubtaskLookahead()
+        planner = make_planner(lookahead, make_executor("Cup picked up"), RuntimeError("quota"))
+        planner.main_loop_content()
+        self.assertEqual(planner.main_loop_content(), "Gave up")
+        self.assertEqual(lookahead.stats["failed"], 1)
+
+    def test_async_agent_rejects_lookahead(self):
+        with self.assertRaises(ValueError):
+            AsyncLLMAgent(model="fake-model", tools=[], main_camera=MagicMock(), lookahead=SubtaskLookahead())
+
+
+if __name__ == "__main__":
+    unittest.main()
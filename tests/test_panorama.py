@@ -0,0 +1,81 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from robocrew.core.panorama import PanoramaStitcher, panorama_maps
+
+ANGLES = (-120, -40, 40, 120)
+
+
+def line_frame(x, width=640, height=480):
+    """Flat gray frame with a bright vertical line at column x."""
+    frame = np.full((height, width, 3), 60, np.uint8)
+    frame[:, x - 1:x + 1] = 255
+    return frame
+
+
+def bright_columns(strip, row):
+    return np.flatnonzero(strip[row].mean(axis=1) > 150)
+
+
+class TestPanoramaStitcher(unittest.TestCase):
+
+    def stitch(self, frames, width=1280, camera_fov=120):
+        stitcher = PanoramaStitcher(width, camera_fov, ANGLES)
+        for angle, frame in frames.items():
+            stitcher.add(frame, angle)
+        return stitcher.result()
+
+    def test_view_centers_land_on_their_angles(self):
+        strip = self.stitch({angle: line_frame(320) for angle in ANGLES})
+        self.assertEqual(strip.shape[1], 1280)
+        # -160..+160 over 1280 columns: 4 px per degree
+        expected = [(angle + 160) * 4 for angle in ANGLES]
+        columns = bright_columns(strip, strip.shape[0] // 2)
+        for column in expected:
+            self.assertTrue(np.any(np.abs(columns - column) <= 1), f"no line near column {column}")
+
+    def test_off_center_pixel_lands_on_its_angle(self):
+        # 20 degrees right of the 40 degree view center, with a 120 degree fov
+        focal = 320 / np.tan(np.radians(60))
+        x = round(320 + focal * np.tan(np.radians(20)))
+        frames = {angle: np.full((480, 640, 3), 60, np.uint8) for angle in ANGLES}
+        frames[40] = line_frame(x)
+        strip = self.stitch(frames)
+        columns = bright_columns(strip, strip.shape[0] // 2)
+        self.assertTrue(np.all(np.abs(columns - (60 + 160) * 4) <= 2), columns)
+
+    def test_blend_has_no_seams_or_holes(self):
+        strip = self.stitch({angle: np.full((480, 640, 3), 60, np.uint8) for angle in ANGLES})
+        # below the angle grid and above the LEFT/RIGHT labels
+        body = strip[60:-40]
+        self.assertEqual(body.min(), 60)
+        self.assertEqual(body.max(), 60)
+
+    def test_angle_grid_drawn(self):
+        strip = self.stitch({angle: np.zeros((480, 640, 3), np.uint8) for angle in ANGLES})
+        self.assertGreater(strip[25].sum(), 0)  # grid baseline
+
+    def test_missing_view_leaves_gap(self):
+        strip = self.stitch({angle: np.full((480, 640, 3), 60, np.uint8) for angle in ANGLES if angle != 120})
+        middle = strip.shape[0] // 2
+        self.assertEqual(strip[middle, 1120].max(), 0)
+        self.assertEqual(strip[middle, 480].max(), 60)
+
+    def test_no_views(self):
+        self.assertIsNone(PanoramaStitcher().result())
+
+    def test_maps_cached(self):
+        frame = line_frame(320)
+        self.stitch({angle: frame for angle in ANGLES}, width=960)
+        hits = panorama_maps.cache_info().hits
+        self.stitch({angle: frame for angle in ANGLES}, width=960)
+        self.assertEqual(panorama_maps.cache_info().hits, hits + len(ANGLES))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+import os
+import sys
+import base64
+import unittest
+from unittest.mock import MagicMock
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from langchain_core.messages import AIMessage
+
+from robocrew.core.progress import ProgressMonitor, frame_hash, hamming_distance
+from test_llm_agent import make_agent
+
+
+def jpeg_base64(image):
+    return base64.b64encode(cv2.imencode(".jpg", image)[1]).decode("utf-8")
+
+
+def scene(shift=0, noise_seed=None):
+    image = np.full((240, 320, 3), 90, np.uint8)
+    cv2.rectangle(image, (40 + shift, 60), (140 + shift, 200), (20, 160, 220), -1)
+    cv2.circle(image, (240 + shift, 100), 40, (200, 40, 40), -1)
+    if noise_seed is not None:
+        noise = np.random.default_rng(noise_seed).integers(-3, 4, image.shape)
+        image = np.clip(image.astype(int) + noise, 0, 255).astype(np.uint8)
+    return jpeg_base64(image)
+
+
+def observation(image, front_cm=None):
+    return {"camera_images": [image], "lidar_scan": ("lidar", front_cm) if front_cm is not None else None}
+
+
+MOVE = [{"name": "move_forward", "args": {"distance_meters": 1.0}, "id": "a"}]
+
+
+# ---------------------------------------------------------------------------
+# frame hash
+# ---------------------------------------------------------------------------
+
+class TestFrameHash(unittest.TestCase):
+
+    def test_noise_keeps_hash_close(self):
+        self.assertLessEqual(hamming_distance(frame_hash(scene(noise_seed=1)), frame_hash(scene(noise_seed=2))), 4)
+
+    def test_moved_scene_changes_hash(self):
+        self.assertGreater(hamming_distance(frame_hash(scene()), frame_hash(scene(shift=80))), 4)
+
+
+# ---------------------------------------------------------------------------
+# ProgressMonitor
+# ---------------------------------------------------------------------------
+
+class TestProgressMonitor(unittest.TestCase):
+
+    def run_steps(self, monitor, observations, tool_calls=MOVE, moved=True):
+        for obs in observations:
+            monitor.observe(obs)
+            reason = monitor.stuck_reason()
+            if reason:
+                return reason
+            monitor.record_step(tool_calls, moved)
+
+    def test_repeated_tool_calls(self):
+        monitor = ProgressMonitor(repeat_limit=3)
+        frames = [observation(scene(shift=i * 40)) for i in range(4)]
+        self.assertIn("repeated", self.run_steps(monitor, frames))
+
+    def test_static_view_while_moving(self):
+        monitor = ProgressMonitor(repeat_limit=10)
+        frames = [observation(scene(noise_seed=i)) for i in range(3)]
+        self.assertIn("camera view did not change", self.run_steps(monitor, frames))
+
+    def test_static_view_without_motion_is_not_stuck(self):
+        monitor = ProgressMonitor(repeat_limit=10)
+        frames = [observation(scene(noise_seed=i)) for i in range(4)]
+        self.assertIsNone(self.run_steps(monitor, frames, tool_calls=[], moved=False))
+
+    def test_changing_lidar_distance_is_progress(self):
+        monitor = ProgressMonitor(repeat_limit=10)
+        frames = [observation(scene(noise_seed=i), front_cm=100 - i * 20) for i in range(4)]
+        self.assertIsNone(self.run_steps(monitor, frames))
+
+    def test_static_view_and_lidar(self):
+        monitor = ProgressMonitor(repeat_limit=10)
+        frames = [observation(scene(noise_seed=i), front_cm=50.0 + i * 0.5) for i in range(3)]
+        self.assertIn("lidar", self.run_steps(monitor, frames))
+
+    def test_reset_clears_history(self):
+        monitor = ProgressMonitor(repeat_limit=2)
+        monitor.record_step(MOVE, True)
+        monitor.record_step(MOVE, True)
+        self.assertIsNotNone(monitor.stuck_reason())
+        monitor.reset()
+        self.assertIsNone(monitor.stuck_reason())
+
+
+# ---------------------------------------------------------------------------
+# escalation in LLMAgent
+# ---------------------------------------------------------------------------
+
+class TestEscalation(unittest.TestCase):
+
+    def make_stuck_agent(self):
+        agent = make_agent(escalation_model="strong-model", escalation_thinking_level="high")
+        agent.escalation_llm = MagicMock()
+        agent.escalation_llm.invoke.return_value = AIMessage(content="Trying something else.")
+        agent.llm.invoke.return_value = AIMessage(content="", tool_calls=MOVE)
+        move = MagicMock()
+        move.metadata = None
+        move.invoke.return_value = "moved"
+        agent.tool_name_to_tool = {"move_forward": move}
+        agent.task = "go to the door"
+        agent.fetch_camera_images_base64 = MagicMock(side_effect=lambda: [scene(noise_seed=agent.step_count)])
+        return agent
+
+    def test_no_monitor_without_escalation_model(self):
+        self.assertIsNone(make_agent().progress_monitor)
+
+    def test_stuck_step_uses_escalation_model_then_drops_back(self):
+        agent = self.make_stuck_agent()
+        for _ in range(3):
+            agent.main_loop_content()
+        self.assertEqual(agent.llm.invoke.call_count, 2)
+        self.assertEqual(agent.escalation_llm.invoke.call_count, 1)
+        stuck_message = agent.message_history[-2]
+        self.assertIn("you seem to be stuck", stuck_message.content[-1]["text"])
+        agent.main_loop_content()
+        self.assertEqual(agent.llm.invoke.call_count, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
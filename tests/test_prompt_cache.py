@@ -0,0 +1,95 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from unittest.mock import MagicMock, patch
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from robocrew.core.prompt_cache import (
+    CacheStats,
+    cache_bind_kwargs,
+    cacheable_system_message,
+    model_provider,
+    with_cache_markers,
+)
+from test_llm_agent import make_agent
+
+
+class ChatAnthropic:
+    """Stands in for langchain_anthropic.ChatAnthropic, only its package matters."""
+
+
+ChatAnthropic.__module__ = "langchain_anthropic.chat_models"
+
+
+class TestPromptCache(unittest.TestCase):
+
+    def test_model_provider_from_model_string(self):
+        self.assertEqual(model_provider("google_genai:gemini-3-flash-preview"), "google_genai")
+        self.assertIsNone(model_provider("my-finetune"))
+
+    def test_model_provider_inferred_without_prefix(self):
+        self.assertEqual(model_provider("gpt-5"), "openai")
+        self.assertEqual(model_provider("claude-sonnet-4-5"), "anthropic")
+        self.assertEqual(model_provider(ChatAnthropic()), "anthropic")
+        self.assertIsNone(model_provider(MagicMock()))
+
+    def test_anthropic_system_prompt_marked_for_caching(self):
+        message = cacheable_system_message("You are a robot.", "anthropic")
+        self.assertEqual(message.content[0]["text"], "You are a robot.")
+        self.assertEqual(message.content[0]["cache_control"], {"type": "ephemeral"})
+
+    def test_other_providers_keep_plain_system_prompt(self):
+        message = cacheable_system_message("You are a robot.", "google_genai")
+        self.assertEqual(message.content, "You are a robot.")
+
+    def test_openai_gets_prompt_cache_key(self):
+        self.assertEqual(cache_bind_kwargs("openai", "robocrew-Planner"), {"prompt_cache_key": "robocrew-Planner"})
+        self.assertEqual(cache_bind_kwargs("google_genai", "robocrew-Planner"), {})
+
+    def test_cache_markers_added_when_called(self):
+        llm = MagicMock(side_effect=lambda messages: messages)
+        self.assertIs(with_cache_markers(llm, "google_genai"), llm)
+        messages = [SystemMessage(content="You are a robot."), HumanMessage(content="hi")]
+        sent = with_cache_markers(llm, "anthropic").invoke(messages)
+        self.assertEqual(sent[0].content[0]["cache_control"], {"type": "ephemeral"})
+        self.assertEqual(sent[1].content, "hi")
+
+
+class TestAgentPromptCaching(unittest.TestCase):
+
+    def test_bind_kwargs_follow_each_model_provider(self):
+        primary, backup = MagicMock(), MagicMock()
+        agent = make_agent(prompt_caching=True, name="Planner")
+        with patch("robocrew.core.LLMAgent.init_chat_model", side_effect=[primary, backup]):
+            agent._init_llm("openai:gpt-5", None, [])
+            agent._init_llm("google_genai:gemini-3-flash-preview", None, [])
+        primary.bind_tools.assert_called_once_with([], prompt_cache_key="robocrew-Planner")
+        backup.bind_tools.assert_called_once_with([])
+        self.assertIsInstance(agent.system_message.content, str)
+
+
+class TestCacheStats(unittest.TestCase):
+
+    def test_records_hits_and_cached_tokens(self):
+        stats = CacheStats()
+        stats.record({"input_tokens": 1000, "input_token_details": {"cache_read": 0, "cache_creation": 900}})
+        step = stats.record({"input_tokens": 1100, "input_token_details": {"cache_read": 900}})
+        self.assertTrue(step["hit"])
+        summary = stats.summary()
+        self.assertEqual((summary["hits"], summary["misses"]), (1, 1))
+        self.assertEqual(summary["cached_tokens"], 900)
+        self.assertAlmostEqual(summary["cached_ratio"], 900 / 2100)
+
+    def test_missing_usage_metadata_counts_as_miss(self):
+        stats = CacheStats()
+        step = stats.record(None)
+        self.assertFalse(step["hit"])
+        self.assertEqual(stats.misses, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from langchain_core.messages import AIMessage
+
+from robocrew.core.replay import (
+    ReplayAgent,
+    ReplayChatModel,
+    StepRecorder,
+    load_trace,
+    make_synthetic_trace,
+    run_replay,
+)
+from test_llm_agent import make_agent
+
+
+# ---------------------------------------------------------------------------
+# recording
+# ---------------------------------------------------------------------------
+
+class TestStepRecorder(unittest.TestCase):
+
+    def test_agent_steps_written_and_loaded(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "run.jsonl.gz")
+            agent = make_agent(step_recorder=StepRecorder(path))
+            agent.task = "explore"
+            agent.fetch_camera_images_base64 = MagicMock(return_value=["frame"])
+            agent.llm.invoke.return_value = AIMessage(content="Moving.", tool_calls=[
+                {"name": "look_around", "args": {}, "id": "a"},
+            ])
+            look_around = MagicMock()
+            look_around.invoke.return_value = ("Looked around", [{"type": "text", "text": "left view"}])
+            agent.tool_name_to_tool = {"look_around": look_around}
+            agent.main_loop_content()
+            agent.main_loop_content()
+            agent.cleanup()
+            steps = load_trace(path)
+        self.assertEqual([step["step"] for step in steps], [1, 2])
+        step = steps[0]
+        self.assertEqual(step["task"], "explore")
+        self.assertEqual(step["observation"]["camera_images"], ["frame"])
+        self.assertEqual(step["response"]["data"]["content"], "Moving.")
+        self.assertEqual(step["tool_results"][0]["content"], "Looked around")
+        self.assertEqual(step["tool_results"][0]["additional"], [{"type": "text", "text": "left view"}])
+        self.assertEqual(step["request"]["messages"], 2)
+        self.assertGreaterEqual(step["timings"]["step"], step["timings"]["llm"])
+
+    def test_image_payloads_written_as_base64(self):
+        steps = make_synthetic_trace(2, width=160, height=120)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "replayed.jsonl.gz")
+            agent = ReplayAgent(steps, augment=False, step_recorder=StepRecorder(path))
+            agent.main_loop_content()
+            agent.cleanup()
+            recorded = load_trace(path)
+        self.assertEqual(recorded[0]["observation"]["camera_images"], steps[0]["observation"]["camera_images"])
+
+
+# ---------------------------------------------------------------------------
+# replay
+# ---------------------------------------------------------------------------
+
+class TestReplay(unittest.TestCase):
+
+    def setUp(self):
+        self.steps = make_synthetic_trace(3, width=160, height=120)
+
+    def test_chat_model_returns_recorded_responses_in_order(self):
+        model = ReplayChatModel.from_steps(self.steps)
+        self.assertIs(model.bind_tools([]), model)
+        names = [model.invoke([]).tool_calls[0]["name"] for _ in self.steps]
+        self.assertEqual(names, ["turn_left", "turn_left", "finish_task"])
+        with self.assertRaises(RuntimeError):
+            model.invoke([])
+
+    def test_chat_model_streams_tool_calls(self):
+        model = ReplayChatModel.from_steps(self.steps)
+        response = None
+        for chunk in model.stream([]):
+            response = chunk if response is None else response + chunk
+        self.assertEqual([call["name"] for call in response.tool_calls], ["turn_left", "move_forward"])
+
+    def test_agent_replays_tool_results(self):
+        agent = ReplayAgent(self.steps)
+        agent.task = self.steps[0]["task"]
+        agent.main_loop_content()
+        tool_messages = [message for message in agent.message_history if message.type == "tool"]
+        self.assertEqual([message.content for message in tool_messages], ["turn_left done.", "move_forward done."])
+        agent.cleanup()
+
+    def test_run_replay_finishes_task_and_reports_stats(self):
+        stats = run_replay(self.steps, history_len=2)
+        self.assertEqual(stats["steps"], 3)
+        self.assertGreater(stats["steps_per_s"], 0)
+        self.assertIn("p95", stats["step_ms"])
+
+    def test_recorded_trace_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "run.jsonl.gz")
+            agent = ReplayAgent(self.steps, step_recorder=StepRecorder(path))
+            for step in self.steps:
+                agent.task = step["task"]
+                agent.main_loop_content()
+            agent.cleanup()
+            stats = run_replay(path, augment=False)
+        self.assertEqual(stats["steps"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
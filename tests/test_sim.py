@@ -0,0 +1,220 @@
+import os
+import sys
+import json
+import time
+import tempfile
+import unittest
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from robocrew.core.sim import (
+    POSITION_MODE,
+    VELOCITY_MODE,
+    SimLidar,
+    SimMotorsBus,
+    SimVideoCapture,
+    is_sim_port,
+    open_video_capture,
+    parse_sim_port,
+)
+
+
+class TestSimPort(unittest.TestCase):
+
+    def test_parse_kind_argument_and_options(self):
+        self.assertEqual(parse_sim_port("sim:video:/a.mp4?fps=15&name=x"), ("video", "/a.mp4", {"fps": 15.0, "name": "x"}))
+        self.assertEqual(parse_sim_port("sim:synthetic"), ("synthetic", None, {}))
+
+    def test_is_sim_port(self):
+        self.assertTrue(is_sim_port("sim:scene"))
+        self.assertFalse(is_sim_port("/dev/lidar"))
+        self.assertFalse(is_sim_port(0))
+
+
+# ---------------------------------------------------------------------------
+# camera
+# ---------------------------------------------------------------------------
+
+class TestSimVideoCapture(unittest.TestCase):
+
+    def test_synthetic_frames_have_requested_size_and_change(self):
+        capture = open_video_capture("sim:synthetic?width=320&height=240&fps=0")
+        self.assertIsInstance(capture, SimVideoCapture)
+        ok1, frame1 = capture.read()
+        capture.grab()
+        ok2, frame2 = capture.read()
+        self.assertTrue(ok1 and ok2)
+        self.assertEqual(frame1.shape, (240, 320, 3))
+        self.assertFalse(np.array_equal(frame1, frame2))
+
+    def test_set_changes_frame_size(self):
+        capture = SimVideoCapture("sim:synthetic?fps=0")
+        capture.set(cv2.CAP_PROP_FRAME_WIDTH, 160)
+        capture.set(cv2.CAP_PROP_FRAME_HEIGHT, 120)
+        self.assertEqual(capture.read()[1].shape, (120, 160, 3))
+
+    def test_reads_paced_to_fps(self):
+        capture = SimVideoCapture("sim:synthetic?width=64&height=48&fps=50")
+        start = time.monotonic()
+        for _ in range(4):
+            capture.read()
+        self.assertGreaterEqual(time.monotonic() - start, 0.055)
+
+    def test_image_directory_looped(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for i, value in enumerate((10, 200)):
+                cv2.imwrite(os.path.join(tmp, f"{i}.png"), np.full((48, 64, 3), value, np.uint8))
+            capture = SimVideoCapture(f"sim:images:{tmp}?width=64&height=48&fps=0")
+            values = [int(capture.read()[1][0, 0, 0]) for _ in range(3)]
+        self.assertEqual(values, [10, 200, 10])
+
+    def test_released_capture_returns_no_frame(self):
+        capture = SimVideoCapture("sim:synthetic?fps=0")
+        capture.release()
+        self.assertEqual(capture.read(), (False, None))
+        capture.open()
+        self.assertTrue(capture.read()[0])
+
+    def test_robot_camera_uses_sim_capture(self):
+        from robocrew.core.camera import RobotCamera
+        camera = RobotCamera("sim:synthetic?width=640&height=480&fps=0")
+        image = cv2.imdecode(np.frombuffer(camera.capture_image(camera_fov=90), np.uint8), cv2.IMREAD_COLOR)
+        self.assertIsNotNone(image)
+        camera.release()
+        camera.reopen()
+        self.assertTrue(camera.capture.isOpened())
+
+
+class TestRobotCameraBackgroundCapture(unittest.TestCase):
+
+    def setUp(self):
+        from robocrew.core.camera import RobotCamera
+        self.camera = RobotCamera("sim:synthetic?width=320&height=240&fps=50", background_capture=True)
+
+    def tearDown(self):
+        self.camera.release()
+
+    def test_returns_latest_frame_without_waiting_for_device(self):
+        self.camera.capture_image()  # first frame
+        start = time.monotonic()
+        image = self.camera.capture_image(camera_fov=90)
+        self.assertLess(time.monotonic() - start, 0.015)
+        self.assertIsNotNone(cv2.imdecode(np.frombuffer(image, np.uint8), cv2.IMREAD_COLOR))
+
+    def test_waits_for_frame_newer_than(self):
+        motion_end = time.monotonic()
+        self.camera.capture_image(newer_than=motion_end)
+        self.assertGreater(self.camera.latest_frame_time, motion_end)
+
+    def test_no_new_frame_raises(self):
+        self.camera.frame_timeout = 0.05
+        with self.assertRaises(RuntimeError):
+            self.camera.capture_image(newer_than=time.monotonic() + 10)
+
+    def test_release_stops_and_reopen_restarts_grabber(self):
+        self.camera.capture_image()
+        self.camera.release()
+        self.assertIsNone(self.camera.grabber)
+        self.assertIsNone(self.camera.latest_frame)
+        self.camera.reopen()
+        self.assertTrue(self.camera.grabber.is_alive())
+        self.assertIsNotNone(self.camera.capture_image())
+
+
+# ---------------------------------------------------------------------------
+# servo bus
+# ---------------------------------------------------------------------------
+
+class TestSimMotorsBus(unittest.TestCase):
+
+    def make_bus(self, **kwargs):
+        bus = SimMotorsBus("sim:bus", motors={7: None, 8: None}, **kwargs)
+        bus.connect()
+        return bus
+
+    def test_position_moves_towards_goal_at_speed(self):
+        bus = self.make_bus(position_speed=1000.0)
+        bus.write("Operating_Mode", 7, POSITION_MODE)
+        bus.enable_torque()
+        bus.sync_write("Goal_Position", {7: 50.0})
+        self.assertLess(bus.read("Present_Position", 7), 50.0)
+        time.sleep(0.08)
+        self.assertEqual(bus.read("Present_Position", 7), 50.0)
+        self.assertEqual(bus.read("Moving", 7), 0)
+
+    def test_no_motion_without_torque(self):
+        bus = self.make_bus(position_speed=1000.0)
+        bus.write("Goal_Position", 7, 50.0)
+        time.sleep(0.02)
+        self.assertEqual(bus.read("Present_Position", 7), 0.0)
+
+    def test_velocity_mode_integrates_position(self):
+        bus = self.make_bus()
+        bus.write("Operating_Mode", 8, VELOCITY_MODE)
+        bus.enable_torque()
+        bus.sync_write("Goal_Velocity", {8: 100})
+        time.sleep(0.05)
+        bus.sync_write("Goal_Velocity", {8: 0})
+        self.assertGreater(bus.read("Present_Position", 8), 3.0)
+        self.assertEqual(bus.read("Present_Velocity", 8), 0)
+
+    def test_sync_read_returns_all_motors(self):
+        bus = self.make_bus()
+        self.assertEqual(set(bus.sync_read("Present_Position")), {7, 8})
+
+    def test_latency_per_transaction(self):
+        bus = SimMotorsBus("sim:bus?latency=0.01", motors={7: None})
+        start = time.monotonic()
+        bus.sync_write("Goal_Position", {7: 1.0})
+        bus.read("Present_Position", 7)
+        self.assertGreaterEqual(time.monotonic() - start, 0.02)
+        self.assertEqual(bus.transactions, 2)
+
+
+# ---------------------------------------------------------------------------
+# lidar
+# ---------------------------------------------------------------------------
+
+class TestSimLidar(unittest.TestCase):
+
+    def test_scene_front_distance(self):
+        lidar = SimLidar("sim:scene?rotation_time=0&noise_mm=0")
+        scan = next(lidar.iter_scans())
+        self.assertEqual(len(scan), 360)
+        quality, angle, distance = scan[0]
+        self.assertEqual(angle, 0.0)
+        self.assertAlmostEqual(distance, 2500.0)  # wall 2.5 m in front
+
+    def test_pose_changes_scan(self):
+        lidar = SimLidar("sim:scene?rotation_time=0&noise_mm=0", pose=(0.0, 1.5, 0.0))
+        self.assertAlmostEqual(lidar.scan_scene()[0][2], 1000.0)
+        lidar.pose = (0.0, 0.0, 90.0)  # facing the right wall
+        self.assertAlmostEqual(lidar.scan_scene()[0][2], 3000.0)
+
+    def test_recording_replayed_in_loop(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False) as f:
+            f.write(json.dumps([[15, 0.0, 1000.0], [15, 90.0, 2000.0]]) + "\n")
+            f.write(json.dumps([[15, 0.0, 1100.0]]) + "\n")
+            path = f.name
+        try:
+            scans = SimLidar(f"sim:recording:{path}?rotation_time=0").iter_scans()
+            first, second, third = next(scans), next(scans), next(scans)
+        finally:
+            os.remove(path)
+        self.assertEqual(first[1], (15, 90.0, 2000.0))
+        self.assertEqual(second, [(15, 0.0, 1100.0)])
+        self.assertEqual(third, first)
+
+    def test_init_lidar_and_run_scanner(self):
+        from robocrew.core.lidar import init_lidar, run_scanner
+        lidar, bg, scale = init_lidar("sim:scene?rotation_time=0&noise_mm=0")
+        buf, front_cm = run_scanner(lidar, bg, scale)
+        self.assertAlmostEqual(front_cm, (2500 - 195) / 10)
+        self.assertIsNotNone(cv2.imdecode(np.frombuffer(buf.getvalue(), np.uint8), cv2.IMREAD_COLOR))
+
+
+if __name__ == "__main__":
+    unittest.main()
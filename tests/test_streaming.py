@@ -0,0 +1,62 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from langchain_core.messages import AIMessageChunk
+
+from robocrew.core.streaming import ToolCallStream
+
+
+def call_chunk(index, name=None, args=None, id=None):
+    return AIMessageChunk(content="", tool_call_chunks=[
+        {"index": index, "name": name, "args": args, "id": id, "type": "tool_call_chunk"},
+    ])
+
+
+# ---------------------------------------------------------------------------
+# ToolCallStream
+# ---------------------------------------------------------------------------
+
+class TestToolCallStream(unittest.TestCase):
+
+    def test_call_emitted_once_args_are_complete(self):
+        stream = ToolCallStream()
+        self.assertEqual(stream.add(call_chunk(0, "move_forward", '{"distance', "a")), [])
+        new_calls = stream.add(call_chunk(0, None, '_meters": 1.0}'))
+        self.assertEqual(len(new_calls), 1)
+        self.assertEqual(new_calls[0]["name"], "move_forward")
+        self.assertEqual(new_calls[0]["args"], {"distance_meters": 1.0})
+        self.assertEqual(new_calls[0]["id"], "a")
+
+    def test_first_call_emitted_before_second_finishes(self):
+        stream = ToolCallStream()
+        stream.add(call_chunk(0, "say", '{"text": "hi"}', "a"))
+        new_calls = stream.add(call_chunk(1, "turn_left", '{"angle', "b"))
+        self.assertEqual(new_calls, [])
+        self.assertEqual([c["name"] for c in stream.emitted], ["say"])
+
+    def test_call_without_args_completed_by_next_call(self):
+        stream = ToolCallStream()
+        self.assertEqual(stream.add(call_chunk(0, "look_around", "", "a")), [])
+        new_calls = stream.add(call_chunk(1, "say", '{"text": "hi"}', "b"))
+        self.assertEqual([c["name"] for c in new_calls], ["look_around", "say"])
+        self.assertEqual(new_calls[0]["args"], {})
+
+    def test_finish_returns_calls_not_yet_emitted(self):
+        stream = ToolCallStream()
+        stream.add(AIMessageChunk(content="Moving on."))
+        stream.add(call_chunk(0, "look_around", "", "a"))
+        response, remaining = stream.finish()
+        self.assertEqual(response.content, "Moving on.")
+        self.assertEqual([c["name"] for c in response.tool_calls], ["look_around"])
+        self.assertEqual([c["id"] for c in remaining], ["a"])
+
+    def test_finish_without_chunks_raises(self):
+        with self.assertRaises(RuntimeError):
+            ToolCallStream().finish()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+import os
+import sys
+import time
+import unittest
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from robocrew.core.subtask_pool import SubtaskPool
+from robocrew.core.tools import create_subtask_pool_tools
+from robocrew.core.tool_executor import get_tool_resources, resources_conflict
+
+
+def make_executor(name, seconds=0.1, error=None):
+    """Executor whose single step takes `seconds` and then finishes the task."""
+    executor = MagicMock()
+    executor.name = name
+    executor.task = None
+
+    def step():
+        time.sleep(seconds)
+        if error:
+            raise error
+        finished = executor.task
+        executor.task = None
+        return f"done: {finished}"
+
+    def cancel_task():
+        executor.task = None
+
+    executor.main_loop_content.side_effect = step
+    executor.cancel_task.side_effect = cancel_task
+    return executor
+
+
+# ---------------------------------------------------------------------------
+# SubtaskPool
+# ---------------------------------------------------------------------------
+
+class TestSubtaskPool(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = SubtaskPool([make_executor("left", 0.2), make_executor("right", 0.05)])
+
+    def tearDown(self):
+        self.pool.shutdown()
+
+    def test_subtasks_on_different_executors_run_in_parallel(self):
+        start = time.monotonic()
+        first = self.pool.submit("pick up the cup", "left")
+        second = self.pool.submit("open the drawer", "right")
+        jobs = self.pool.wait_all()
+        self.assertLess(time.monotonic() - start, 0.24)
+        self.assertEqual({job.id for job in jobs}, {first, second})
+        self.assertEqual(self.pool.jobs[first].describe(),
+                         "job_1 (left: 'pick up the cup'): finished - done: pick up the cup")
+
+    def test_submit_returns_immediately(self):
+        start = time.monotonic()
+        job_id = self.pool.submit("pick up the cup", "left")
+        self.assertLess(time.monotonic() - start, 0.05)
+        self.assertEqual(self.pool.jobs[job_id].status(), "running")
+
+    def test_wait_any_returns_first_finished(self):
+        self.pool.submit("slow", "left")
+        fast = self.pool.submit("fast", "right")
+        self.assertEqual([job.id for job in self.pool.wait_any()], [fast])
+        # reported jobs are not waited for again
+        self.assertEqual([job.subtask for job in self.pool.wait_any()], ["slow"])
+        self.assertEqual(self.pool.wait_any(), [])
+
+    def test_least_busy_executor_chosen(self):
+        self.pool.submit("first", "left")
+        job_id = self.pool.submit("second")
+        self.assertEqual(self.pool.jobs[job_id].executor_name, "right")
+
+    def test_cancel_queued_and_running(self):
+        running = self.pool.submit("first", "left")
+        queued = self.pool.submit("second", "left")
+        self.pool.cancel(queued)
+        self.pool.cancel(running)
+        self.pool.wait_all()
+        self.assertEqual(self.pool.jobs[queued].status(), "cancelled")
+        self.assertEqual(self.pool.jobs[running].status(), "cancelled")
+        self.pool.executors["left"].cancel_task.assert_called_once()
+
+    def test_failed_subtask(self):
+        pool = SubtaskPool({"broken": make_executor("broken", 0, error=RuntimeError("arm stuck"))})
+        pool.submit("pick up the cup")
+        job, = pool.wait_all()
+        self.assertEqual(job.status(), "failed")
+        self.assertIn("arm stuck", job.describe())
+        pool.shutdown()
+
+    def test_unknown_names(self):
+        with self.assertRaises(ValueError):
+            self.pool.submit("fly", "drone")
+        with self.assertRaises(ValueError):
+            self.pool.wait_any(["job_99"])
+
+
+# ---------------------------------------------------------------------------
+# create_subtask_pool_tools
+# ---------------------------------------------------------------------------
+
+class TestSubtaskPoolTools(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = SubtaskPool({"left": make_executor("left", 0.1), "right": make_executor("right", 0.01)})
+        self.start, self.wait_any, self.wait_all, self.cancel = create_subtask_pool_tools(self.pool)
+
+    def tearDown(self):
+        self.pool.shutdown()
+
+    def test_start_and_wait(self):
+        self.assertIn("left, right", self.start.description)
+        reply = self.start.invoke({"reasoning": "cup is left", "subtask": "pick up the cup", "executor": "left"})
+        self.assertEqual(reply, "Started job_1 on left.")
+        self.start.invoke({"reasoning": "drawer is right", "subtask": "open the drawer"})
+        self.assertIn("job_2 (right: 'open the drawer'): finished", self.wait_any.invoke({}))
+        self.assertIn("job_1 (left: 'pick up the cup'): finished", self.wait_all.invoke({}))
+        self.assertEqual(self.wait_all.invoke({}), "No subtasks to wait for.")
+
+    def test_errors_returned_as_text(self):
+        reply = self.start.invoke({"reasoning": "", "subtask": "fly", "executor": "drone"})
+        self.assertIn("Unknown executor 'drone'", reply)
+        self.assertIn("Unknown job ids", self.wait_any.invoke({"job_ids": ["job_7"]}))
+        self.assertEqual(self.cancel.invoke({"job_id": "job_7"}), "Unknown job id: job_7")
+
+    def test_wait_timeout(self):
+        self.start.invoke({"reasoning": "", "subtask": "pick up the cup", "executor": "left"})
+        self.assertEqual(self.wait_all.invoke({"timeout_s": 0.01}), "No subtask finished within 0.01 s.")
+        self.assertEqual(self.cancel.invoke({"job_id": "job_1"}), "Cancelled job_1.")
+
+    def test_pool_tools_never_run_together(self):
+        # wait_all issued next to start_subtask must see the started job
+        tools = (self.start, self.wait_any, self.wait_all, self.cancel)
+        for tool_a in tools:
+            for tool_b in tools:
+                self.assertTrue(resources_conflict(get_tool_resources(tool_a), get_tool_resources(tool_b)))
+
+
+if __name__ == "__main__":
+    unittest.main()
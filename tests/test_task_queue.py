@@ -0,0 +1,146 @@
+import os
+import sys
+import time
+import asyncio
+import threading
+import unittest
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from robocrew.core.task_queue import TaskQueue
+from test_llm_agent import make_agent
+from test_async_agent import make_async_agent
+
+
+def put_later(task_queue, task, delay=0.05):
+    timer = threading.Timer(delay, task_queue.put, args=(task,))
+    timer.start()
+    return timer
+
+
+# ---------------------------------------------------------------------------
+# TaskQueue
+# ---------------------------------------------------------------------------
+
+class TestTaskQueue(unittest.TestCase):
+
+    def test_fifo_and_queue_interface(self):
+        task_queue = TaskQueue()
+        self.assertTrue(task_queue.empty())
+        task_queue.put("a")
+        task_queue.put("b")
+        self.assertEqual(task_queue.qsize(), 2)
+        self.assertEqual([task_queue.get(), task_queue.get_nowait()], ["a", "b"])
+        self.assertIsNone(task_queue.get_nowait())
+
+    def test_get_wakes_up_when_task_arrives(self):
+        task_queue = TaskQueue()
+        put_later(task_queue, "go to the kitchen")
+        start = time.monotonic()
+        self.assertEqual(task_queue.get(timeout=2), "go to the kitchen")
+        self.assertLess(time.monotonic() - start, 0.5)
+
+    def test_get_timeout(self):
+        self.assertIsNone(TaskQueue().get(timeout=0.01))
+
+    def test_cancel_wakes_up_waiter_and_drops_pending(self):
+        task_queue = TaskQueue()
+        threading.Timer(0.05, task_queue.cancel).start()
+        self.assertIsNone(task_queue.get(timeout=2))
+        task_queue.put("old")
+        task_queue.cancel()
+        self.assertTrue(task_queue.empty())
+
+    def test_aget_wakes_up_from_other_thread(self):
+        task_queue = TaskQueue()
+
+        async def wait():
+            put_later(task_queue, "explore")
+            return await asyncio.wait_for(task_queue.aget(), timeout=2)
+
+        self.assertEqual(asyncio.run(wait()), "explore")
+        self.assertFalse(task_queue._wakers)
+
+    def test_aget_returns_none_on_cancel(self):
+        task_queue = TaskQueue()
+
+        async def wait():
+            threading.Timer(0.05, task_queue.cancel).start()
+            return await asyncio.wait_for(task_queue.aget(), timeout=2)
+
+        self.assertIsNone(asyncio.run(wait()))
+
+
+# ---------------------------------------------------------------------------
+# agent loop
+# ---------------------------------------------------------------------------
+
+class TestAgentTaskDelivery(unittest.TestCase):
+
+    def test_idle_go_starts_submitted_task_immediately(self):
+        agent = make_agent()
+        started = {}
+
+        def main_loop_content():
+            started["task"], started["at"] = agent.task, time.monotonic()
+            raise KeyboardInterrupt
+
+        agent.main_loop_content = main_loop_content
+        agent.cleanup = MagicMock()
+        loop = threading.Thread(target=agent.go)
+        loop.start()
+        time.sleep(0.05)
+        submitted_at = time.monotonic()
+        agent.submit_task("find the red cup")
+        loop.join(timeout=2)
+        self.assertFalse(loop.is_alive())
+        self.assertEqual(started["task"], "find the red cup")
+        self.assertLess(started["at"] - submitted_at, 0.1)
+        agent.cleanup.assert_called_once()
+
+    def test_idle_go_starts_task_set_directly(self):
+        # the UI and the MCP runtime set agent.task instead of submitting it
+        agent = make_agent()
+        started = {}
+
+        def main_loop_content():
+            started["task"] = agent.task
+            raise KeyboardInterrupt
+
+        agent.main_loop_content = main_loop_content
+        agent.cleanup = MagicMock()
+        loop = threading.Thread(target=agent.go)
+        loop.start()
+        time.sleep(0.05)
+        agent.task = "find the red cup"
+        loop.join(timeout=2)
+        self.assertFalse(loop.is_alive())
+        self.assertEqual(started["task"], "find the red cup")
+
+    def test_idle_ago_starts_task_set_directly(self):
+        agent = make_async_agent()
+        agent.amain_loop_content = MagicMock(side_effect=asyncio.CancelledError)
+        agent.cleanup = MagicMock()
+
+        async def run():
+            loop = asyncio.create_task(agent.ago())
+            await asyncio.sleep(0.05)
+            threading.Thread(target=setattr, args=(agent, "task", "find the red cup")).start()
+            with self.assertRaises(asyncio.CancelledError):
+                await asyncio.wait_for(loop, timeout=2)
+
+        asyncio.run(run())
+        agent.amain_loop_content.assert_called_once()
+
+    def test_cancel_task_clears_current_and_queued(self):
+        agent = make_agent()
+        agent.task = "explore"
+        agent.submit_task("next")
+        agent.cancel_task()
+        self.assertIsNone(agent.task)
+        self.assertTrue(agent.task_queue.empty())
+
+
+if __name__ == "__main__":
+    unittest.main()
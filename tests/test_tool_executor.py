@@ -0,0 +1,101 @@
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from langchain_core.tools import tool
+
+from robocrew.core.tool_executor import (
+    ToolExecutor,
+    uses_resources,
+    get_tool_resources,
+    resources_conflict,
+    WHEELS,
+    SPEAKER,
+)
+
+
+def make_executor(resources_by_name, invoke_tool):
+    return ToolExecutor(invoke_tool, lambda tool_call: resources_by_name[tool_call["name"]])
+
+
+class TestResourceDeclaration(unittest.TestCase):
+
+    def test_uses_resources_sets_tool_metadata(self):
+        @uses_resources(WHEELS)
+        @tool
+        def drive() -> str:
+            """Drive."""
+            return "ok"
+        self.assertEqual(get_tool_resources(drive), frozenset({WHEELS}))
+
+    def test_undeclared_tool_has_no_resources(self):
+        @tool
+        def anything() -> str:
+            """Anything."""
+            return "ok"
+        self.assertIsNone(get_tool_resources(anything))
+
+    def test_undeclared_resources_conflict_with_everything(self):
+        self.assertTrue(resources_conflict(None, frozenset()))
+        self.assertTrue(resources_conflict(frozenset({SPEAKER}), None))
+
+    def test_disjoint_resources_do_not_conflict(self):
+        self.assertFalse(resources_conflict(frozenset({WHEELS}), frozenset({SPEAKER})))
+        self.assertTrue(resources_conflict(frozenset({WHEELS}), frozenset({WHEELS, SPEAKER})))
+
+
+class TestToolExecutor(unittest.TestCase):
+
+    def test_results_keep_original_order(self):
+        delays = {"slow": 0.2, "fast": 0.0}
+        def invoke(tool_call):
+            time.sleep(delays[tool_call["name"]])
+            return tool_call["name"]
+        executor = make_executor({"slow": frozenset({WHEELS}), "fast": frozenset({SPEAKER})}, invoke)
+        results = executor.run([{"name": "slow"}, {"name": "fast"}])
+        self.assertEqual(results, ["slow", "fast"])
+
+    def test_independent_calls_run_concurrently(self):
+        barrier = threading.Barrier(2, timeout=2)
+        def invoke(tool_call):
+            barrier.wait()  # raises BrokenBarrierError if calls were serialized
+            return tool_call["name"]
+        executor = make_executor({"say": frozenset({SPEAKER}), "move": frozenset({WHEELS})}, invoke)
+        self.assertEqual(executor.run([{"name": "say"}, {"name": "move"}]), ["say", "move"])
+
+    def test_conflicting_calls_run_in_order(self):
+        events = []
+        def invoke(tool_call):
+            events.append(("start", tool_call["id"]))
+            time.sleep(0.05)
+            events.append(("end", tool_call["id"]))
+        resources = {"move": frozenset({WHEELS})}
+        executor = make_executor(resources, invoke)
+        executor.run([{"name": "move", "id": 1}, {"name": "move", "id": 2}])
+        self.assertEqual(events, [("start", 1), ("end", 1), ("start", 2), ("end", 2)])
+
+    def test_exclusive_call_waits_for_earlier_calls(self):
+        events = []
+        def invoke(tool_call):
+            events.append(tool_call["name"])
+            time.sleep(0.05)
+            events.append(tool_call["name"] + "_done")
+        executor = make_executor({"say": frozenset({SPEAKER}), "custom": None}, invoke)
+        executor.run([{"name": "say"}, {"name": "custom"}])
+        self.assertEqual(events, ["say", "say_done", "custom", "custom_done"])
+
+    def test_failure_is_raised_by_run(self):
+        def invoke(tool_call):
+            raise ValueError("servo error")
+        executor = make_executor({"move": frozenset({WHEELS})}, invoke)
+        with self.assertRaises(ValueError):
+            executor.run([{"name": "move"}])
+        self.assertEqual(executor.pending, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+import os
+import sys
+import json
+import tempfile
+import unittest
+import urllib.request
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
+
+from langchain_core.messages import AIMessage
+
+from robocrew.core import tracing
+from test_llm_agent import make_agent
+
+
+class TracingTestCase(unittest.TestCase):
+
+    def setUp(self):
+        tracing.disable()
+        self.sink = tracing.RingBufferSink()
+        tracing.enable(self.sink)
+
+    def tearDown(self):
+        tracing.disable()
+
+
+# ---------------------------------------------------------------------------
+# tracer
+# ---------------------------------------------------------------------------
+
+class TestTracer(TracingTestCase):
+
+    def test_disabled_span_is_shared_noop(self):
+        tracing.disable()
+        self.assertIs(tracing.span("a"), tracing.span("b"))
+        with tracing.span("capture"):
+            pass
+        self.assertEqual(self.sink.spans(), [])
+
+    def test_span_records_name_duration_and_attributes(self):
+        with tracing.span("encode", size=10) as s:
+            s.set(quality=90)
+        [record] = self.sink.spans()
+        self.assertEqual(record["name"], "encode")
+        self.assertGreaterEqual(record["duration_ms"], 0)
+        self.assertEqual(record["size"], 10)
+        self.assertEqual(record["quality"], 90)
+
+    def test_span_marks_error(self):
+        with self.assertRaises(ValueError):
+            with tracing.span("tool:move"):
+                raise ValueError()
+        self.assertEqual(self.sink.spans()[0]["error"], "ValueError")
+
+    def test_spans_tagged_with_current_step(self):
+        tracing.begin_step("Planner", 3)
+        tracing.record("llm_ttft", 0.5)
+        record = self.sink.spans()[0]
+        self.assertEqual((record["agent"], record["step"]), ("Planner", 3))
+        self.assertEqual(record["duration_ms"], 500)
+
+
+# ---------------------------------------------------------------------------
+# sinks
+# ---------------------------------------------------------------------------
+
+class TestSinks(TracingTestCase):
+
+    def test_ring_buffer_last_step_and_summary(self):
+        tracing.begin_step("A", 1)
+        tracing.record("llm_total", 1.0)
+        tracing.begin_step("A", 2)
+        tracing.record("llm_total", 3.0)
+        tracing.record("capture", 0.1)
+        self.assertEqual([r["name"] for r in self.sink.last_step()], ["llm_total", "capture"])
+        summary = self.sink.summary()
+        self.assertEqual(summary["llm_total"]["count"], 2)
+        self.assertEqual(summary["llm_total"]["mean_ms"], 2000)
+        self.assertEqual(summary["llm_total"]["max_ms"], 3000)
+
+    def test_ring_buffer_keeps_newest(self):
+        sink = tracing.RingBufferSink(maxlen=2)
+        for i in range(3):
+            sink.write({"name": str(i), "agent": None, "step": None, "duration_ms": 1})
+        self.assertEqual([r["name"] for r in sink.spans()], ["1", "2"])
+
+    def test_jsonl_sink_writes_lines(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "trace.jsonl")
+            sink = tracing.JsonlSink(path)
+            tracing.enable(sink)
+            tracing.record("lidar_scan", 0.2)
+            sink.close()
+            with open(path) as f:
+                lines = [json.loads(line) for line in f]
+        self.assertEqual(lines[0]["name"], "lidar_scan")
+
+    def test_prometheus_render_and_serve(self):
+        sink = tracing.PrometheusSink()
+        tracing.enable(sink)
+        tracing.begin_step("Robot", 1)
+        tracing.record("llm_total", 0.3)
+        tracing.record("llm_total", 2.0)
+        text = sink.render()
+        self.assertIn('robocrew_span_seconds_count{agent="Robot",span="llm_total"} 2', text)
+        self.assertIn('robocrew_span_seconds_bucket{agent="Robot",span="llm_total",le="0.5"} 1', text)
+        self.assertIn('robocrew_span_seconds_bucket{agent="Robot",span="llm_total",le="+Inf"} 2', text)
+        server = sink.serve(port=0, host="127.0.0.1")
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+            body = urllib.request.urlopen(url, timeout=5).read().decode()
+        finally:
+            sink.close()
+        self.assertIn("robocrew_span_seconds_sum", body)
+
+
+# ---------------------------------------------------------------------------
+# agent instrumentation
+# ---------------------------------------------------------------------------
+
+class TestAgentSpans(TracingTestCase):
+
+    def test_step_records_llm_and_tool_spans(self):
+        agent = make_agent(name="Robot")
+        agent.task = "explore"
+        agent.fetch_camera_images_base64 = MagicMock(return_value=["frame"])
+        agent.llm.invoke.return_value = AIMessage(content="", tool_calls=[{"name": "move", "args": {}, "id": "a"}])
+        move = MagicMock()
+        move.invoke.return_value = "moved"
+        agent.tool_name_to_tool = {"move": move}
+        agent.history_len = 2
+        agent.main_loop_content()
+        names = [r["name"] for r in self.sink.last_step("Robot")]
+        self.assertIn("llm_total", names)
+        self.assertIn("tool:move", names)
+        self.assertIn("history_trim", names)
+        self.assertEqual(self.sink.last_step("Robot")[0]["step"], 1)
+
+    def test_parallel_tool_spans_keep_step(self):
+        agent = make_agent(name="Robot", parallel_tools=True)
+        move = MagicMock()
+        move.metadata = None
+        move.invoke.return_value = "moved"
+        agent.tool_name_to_tool = {"move": move}
+        agent.begin_step()
+        agent.invoke_tools([{"name": "move", "args": {}, "id": "a"}])
+        record = self.sink.spans()[-1]
+        self.assertEqual((record["name"], record["agent"], record["step"]), ("tool:move", "Robot", 1))
+        agent.cleanup()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -10,6 +10,10 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../src'))
 from robocrew.core.utils import (
     calculate_angle_marks,
     basic_augmentation,
+    draw_angle_grid,
+    apply_overlay,
+    cached_overlay,
+    Overlay,
     draw_precision_mode_aug,
     stop_listening_during_tool_execution,
 )
@@ -174,6 +178,61 @@ class TestBasicAugmentation(unittest.TestCase):
         self.assertFalse(mask.any(), "Green pixels found in normal mode — unexpected")
 
 
+# ---------------------------------------------------------------------------
+# overlay cache
+# ---------------------------------------------------------------------------
+
+class TestOverlayCache(unittest.TestCase):
+
+    def random_image(self, width=640, height=480):
+        return np.random.default_rng(0).integers(0, 256, (height, width, 3), dtype=np.uint8)
+
+    def assert_matches_direct_drawing(self, *args):
+        img = self.random_image()
+        cached = basic_augmentation(img.copy(), *args).astype(int)
+        direct = draw_angle_grid(img.copy(), *args).astype(int)
+        # anti-aliased text edges may round differently
+        self.assertLessEqual(np.abs(cached - direct).max(), 1)
+
+    def test_matches_direct_drawing(self):
+        self.assert_matches_direct_drawing(90, 0, "normal")
+        self.assert_matches_direct_drawing(120, -40, "precision")
+
+    def test_composited_overlay_matches_direct_drawing(self):
+        img = self.random_image()
+        overlay = Overlay(draw_precision_mode_aug, 640, 480, 640, 480)
+        composited = overlay.apply(img.copy()).astype(int)
+        direct = draw_precision_mode_aug(img.copy(), 640, 480).astype(int)
+        self.assertLessEqual(np.abs(composited - direct).max(), 1)
+
+    def test_large_overlays_drawn_directly(self):
+        # the diagonal arm range lines make many wide crops, slower to composite than to draw
+        self.assertFalse(cached_overlay(draw_precision_mode_aug, 640, 480, 640, 480).composite)
+        self.assertFalse(cached_overlay(draw_angle_grid, 1920, 1080, 90, 0, "precision").composite)
+        self.assertTrue(cached_overlay(draw_angle_grid, 640, 480, 90, 0, "normal").composite)
+        img = self.random_image()
+        result = apply_overlay(img.copy(), draw_precision_mode_aug, 640, 480)
+        np.testing.assert_array_equal(result, draw_precision_mode_aug(img.copy(), 640, 480))
+
+    def test_overlay_rendered_once_per_configuration(self):
+        cached_overlay.cache_clear()
+        for _ in range(3):
+            basic_augmentation(make_image(), 90, 40)
+        basic_augmentation(make_image(), 90, -40)
+        basic_augmentation(make_image(320, 240), 90, 40)
+        info = cached_overlay.cache_info()
+        self.assertEqual((info.misses, info.hits), (3, 2))
+
+    def test_non_contiguous_frame(self):
+        img = self.random_image()[:, ::-1]
+        result = basic_augmentation(img, 90, 0)
+        self.assertEqual(list(result[25, 200]), [0, 255, 255])
+
+    def test_grayscale_frame_drawn_directly(self):
+        img = np.zeros((480, 640), dtype=np.uint8)
+        self.assertEqual(basic_augmentation(img).shape, (480, 640))
+
+
 # ---------------------------------------------------------------------------
 # stop_listening_during_tool_execution decorator
 # ---------------------------------------------------------------------------